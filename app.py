@@ -6,19 +6,31 @@ that extracts structured data from college websites.
 """
 import os
 import json
+import click
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, abort, session
+from flask import (
+    Flask, render_template, request, jsonify, redirect, url_for, flash, abort, session, g,
+    Response, stream_with_context
+)
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
 from bson import ObjectId, json_util
+from pymongo.errors import DuplicateKeyError
 from models import init_db, close_db_connection
-from services.auth_service import User, init_auth, login, register_user, create_admin_if_none_exists
+from models.college import normalize_website, get_college_by_website_key
+from services.auth_service import (
+    User, init_auth, login, register_user, create_admin_if_none_exists, is_login_rate_limited
+)
 from services.database_service import (
     get_colleges_paginated, import_colleges_from_file, export_colleges_to_file,
-    get_database_statistics, get_college_filter_options, backup_database
+    generate_college_export, get_database_statistics, get_college_filter_options, backup_database,
+    restore_database, get_last_backup_time, invalidate_database_statistics,
+    normalize_structured_data, canonicalize_company_data, migrate_website_keys
 )
-from services.crawler_service import start_college_crawl, get_crawl_status, get_crawl_progress
+from services.crawler_service import start_college_crawl, get_crawl_status, build_crawl_progress
+from services.scheduler_service import init_scheduler
 from services.ai_service import get_model_status, load_ai_model, unload_ai_model
+from services.realtime_service import init_realtime
 from workers import crawler_worker, ai_worker
 from config import get_config
 import logging
@@ -47,6 +59,9 @@ login_manager.login_message_category = 'info'
 # Initialize authentication
 init_auth(login_manager)
 
+# Initialize SocketIO for pushing live updates
+socketio = init_realtime(app)
+
 # Custom JSON encoder for MongoDB objects
 class MongoJSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -67,6 +82,8 @@ def init_workers():
     logging.info("Crawler workers initialized")
     # Initialize AI workers
     ai_worker.init_workers()
+    # Start scheduled re-crawls of stale colleges
+    init_scheduler()
     
     # Create admin if none exists
     create_admin_if_none_exists()
@@ -79,6 +96,34 @@ with app.app_context():
 def teardown_db(exception):
     close_db_connection()
 
+def get_request_colleges(college_ids):
+    """
+    Resolve colleges through a per-request identity map
+    
+    Colleges already loaded during this request are reused; the rest are
+    fetched with a single $in query. Only the listing fields are loaded.
+    
+    Args:
+        college_ids: List of college IDs
+        
+    Returns:
+        Dictionary mapping college ObjectId to college document
+    """
+    from models.college import get_colleges_by_ids
+    from models.projections import get_projection
+    
+    if 'colleges' not in g:
+        g.colleges = {}
+    
+    object_ids = [ObjectId(college_id) if isinstance(college_id, str) else college_id
+                  for college_id in college_ids if college_id]
+    missing_ids = [college_id for college_id in object_ids if college_id not in g.colleges]
+    
+    if missing_ids:
+        g.colleges.update(get_colleges_by_ids(db, missing_ids, get_projection('colleges', 'summary')))
+    
+    return {college_id: g.colleges[college_id] for college_id in object_ids if college_id in g.colleges}
+
 # ===== Authentication Routes =====
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -91,6 +136,10 @@ def login_page():
         password = request.form.get('password')
         remember = 'remember' in request.form
         
+        if is_login_rate_limited(request.remote_addr):
+            flash('Too many login attempts. Please try again later.', 'danger')
+            return render_template('auth/login.html'), 429
+        
         user = login(email_or_username, password)
         
         if user:
@@ -180,9 +229,10 @@ def colleges():
     # Get sort parameters
     sort_by = request.args.get('sort', 'name')
     sort_order = int(request.args.get('order', 1))
+    cursor = request.args.get('cursor')
     
     # Get colleges
-    result = get_colleges_paginated(page, per_page, filters, sort_by, sort_order)
+    result = get_colleges_paginated(page, per_page, filters, sort_by, sort_order, cursor)
     
     # Get filter options
     filter_options = get_college_filter_options()
@@ -343,8 +393,17 @@ def edit_college(college_id):
         if contact_info:
             update_data['contact_info'] = contact_info
         
+        existing = get_college_by_website_key(db, website)
+        if existing and existing['_id'] != college['_id']:
+            flash(f"{existing['name']} already has this website.", 'danger')
+            return redirect(url_for('edit_college', college_id=college_id))
+        
         # Update college
-        success = update_college(db, college_id, update_data)
+        try:
+            success = update_college(db, college_id, update_data)
+        except DuplicateKeyError:
+            flash('Another college already has this website.', 'danger')
+            return redirect(url_for('edit_college', college_id=college_id))
         
         if success:
             flash('College updated successfully.', 'success')
@@ -379,11 +438,14 @@ def delete_college(college_id):
         from models.admission_data import delete_admission_data_for_college
         from models.placement_data import delete_placement_data_for_college
         from models.internship_data import delete_internship_data_for_college
+        from models.url_state import delete_url_states_for_college
         
         delete_raw_content_for_college(db, college_id)
         delete_admission_data_for_college(db, college_id)
         delete_placement_data_for_college(db, college_id)
         delete_internship_data_for_college(db, college_id)
+        delete_url_states_for_college(db, college_id)
+        invalidate_database_statistics()
         
         flash('College and all associated data deleted successfully.', 'success')
     else:
@@ -458,33 +520,29 @@ def export_colleges():
         # Get format
         export_format = request.form.get('format', 'json')
         
+        if export_format not in ['json', 'csv']:
+            flash(f'Unsupported export format: {export_format}', 'danger')
+            return redirect(url_for('export_colleges'))
+        
         # Get selected colleges (if any)
+        export_all = request.form.get('export_all') == '1'
         college_ids = request.form.getlist('college_ids')
         
-        if not college_ids:
+        if not college_ids and not export_all:
             flash('No colleges selected for export.', 'warning')
             return redirect(url_for('colleges'))
         
-        # Create export directory
-        export_dir = os.path.join(os.getcwd(), 'exports')
-        os.makedirs(export_dir, exist_ok=True)
-        
         # Generate filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f'colleges_export_{timestamp}.{export_format}'
-        file_path = os.path.join(export_dir, filename)
-        
-        # Export colleges
-        success, message, count = export_colleges_to_file(file_path, college_ids)
-        
-        if success:
-            # Prepare file for download
-            # TODO: Implement file download
-            flash(f'{message}', 'success')
-        else:
-            flash(message, 'danger')
         
-        return redirect(url_for('colleges'))
+        # Stream the export as a chunked download
+        mimetype = 'text/csv' if export_format == 'csv' else 'application/json'
+        return Response(
+            stream_with_context(generate_college_export(export_format, None if export_all else college_ids)),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
     
     # Get colleges for selection
     result = get_colleges_paginated(1, 1000)  # Get all colleges for selection
@@ -542,9 +600,9 @@ def crawl_status_route(job_id):
     # Convert job to dictionary with string IDs
     job_dict = json_util.loads(json_util.dumps(job))
     
-    # Add progress info for running jobs
+    # Add progress info for running jobs from the document we already have
     if job.get('status') == 'running':
-        job_dict['progress'] = get_crawl_progress(job_id)
+        job_dict['progress'] = build_crawl_progress(job)
     
     return jsonify(job_dict)
 
@@ -567,11 +625,11 @@ def crawl_jobs():
     # Calculate pagination info
     total_pages = (total + per_page - 1) // per_page  # Ceiling division
     
-    # Get college details for each job
-    from models.college import get_college_by_id
+    # Get college details for all jobs in one query
+    colleges_by_id = get_request_colleges([job['college_id'] for job in jobs])
     
     for job in jobs:
-        job['college'] = get_college_by_id(db, job['college_id'])
+        job['college'] = colleges_by_id.get(job['college_id'])
     
     return render_template(
         'crawling/jobs.html',
@@ -604,7 +662,7 @@ def crawl_job_details(job_id):
     # Get extracted content
     from models.raw_content import get_raw_content_for_college
     raw_content = get_raw_content_for_college(
-        db, job['college_id'], processed=None, skip=0, limit=100
+        db, job['college_id'], processed=None, skip=0, limit=100, fields='summary'
     )
     
     # Group content by type
@@ -695,35 +753,30 @@ def ai_jobs():
     # Get pagination parameters
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
     
     # Get filter parameters
     status = request.args.get('status')
     content_type = request.args.get('content_type')
+    college_id = request.args.get('college_id')
     
-    # Get AI jobs
-    from models.ai_processing_job import get_queued_ai_processing_jobs, count_ai_processing_jobs
+    # Get AI jobs, filtered and paginated by the database
+    from models.ai_processing_job import get_ai_processing_jobs, count_ai_processing_jobs
     
-    # For simplicity, use the same function but limit the results
-    jobs = get_queued_ai_processing_jobs(db, content_type, 100)
-    
-    # Filter by status if provided
-    if status:
-        jobs = [job for job in jobs if job['status'] == status]
-    
-    # Apply pagination
-    total = len(jobs)
-    start = (page - 1) * per_page
-    end = start + per_page
-    jobs = jobs[start:end]
+    jobs, next_cursor = get_ai_processing_jobs(
+        db, status, content_type, college_id,
+        cursor=cursor, skip=(page - 1) * per_page, limit=per_page
+    )
+    total = count_ai_processing_jobs(db, status, content_type, college_id)
     
     # Calculate pagination info
     total_pages = (total + per_page - 1) // per_page  # Ceiling division
     
-    # Get college details for each job
-    from models.college import get_college_by_id
+    # Get college details for all jobs in one query
+    colleges_by_id = get_request_colleges([job['college_id'] for job in jobs])
     
     for job in jobs:
-        job['college'] = get_college_by_id(db, job['college_id'])
+        job['college'] = colleges_by_id.get(job['college_id'])
     
     return render_template(
         'ai/jobs.html',
@@ -734,10 +787,12 @@ def ai_jobs():
             'total': total,
             'total_pages': total_pages,
             'has_prev': page > 1,
-            'has_next': page < total_pages
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor
         },
         status_filter=status,
-        content_type_filter=content_type
+        content_type_filter=content_type,
+        college_filter=college_id
     )
 
 # ===== Data Exploration Routes =====
@@ -755,14 +810,9 @@ def explore_admission():
     college_ids = get_colleges_with_admission_data(db, (page - 1) * per_page, per_page)
     total = count_colleges_with_admission_data(db)
     
-    # Get college details for each ID
-    from models.college import get_college_by_id
-    
-    colleges = []
-    for college_id in college_ids:
-        college = get_college_by_id(db, college_id)
-        if college:
-            colleges.append(college)
+    # Get college details for all IDs in one query, keeping the page order
+    colleges_by_id = get_request_colleges(college_ids)
+    colleges = [colleges_by_id[college_id] for college_id in college_ids if college_id in colleges_by_id]
     
     # Calculate pagination info
     total_pages = (total + per_page - 1) // per_page  # Ceiling division
@@ -818,14 +868,9 @@ def explore_placement():
     college_ids = get_colleges_with_placement_data(db, (page - 1) * per_page, per_page)
     total = count_colleges_with_placement_data(db)
     
-    # Get college details for each ID
-    from models.college import get_college_by_id
-    
-    colleges = []
-    for college_id in college_ids:
-        college = get_college_by_id(db, college_id)
-        if college:
-            colleges.append(college)
+    # Get college details for all IDs in one query, keeping the page order
+    colleges_by_id = get_request_colleges(college_ids)
+    colleges = [colleges_by_id[college_id] for college_id in college_ids if college_id in colleges_by_id]
     
     # Calculate pagination info
     total_pages = (total + per_page - 1) // per_page  # Ceiling division
@@ -881,14 +926,9 @@ def explore_internship():
     college_ids = get_colleges_with_internship_data(db, (page - 1) * per_page, per_page)
     total = count_colleges_with_internship_data(db)
     
-    # Get college details for each ID
-    from models.college import get_college_by_id
-    
-    colleges = []
-    for college_id in college_ids:
-        college = get_college_by_id(db, college_id)
-        if college:
-            colleges.append(college)
+    # Get college details for all IDs in one query, keeping the page order
+    colleges_by_id = get_request_colleges(college_ids)
+    colleges = [colleges_by_id[college_id] for college_id in college_ids if college_id in colleges_by_id]
     
     # Calculate pagination info
     total_pages = (total + per_page - 1) // per_page  # Ceiling division
@@ -1011,8 +1051,13 @@ def admin_backup():
         # Get backup directory from form
         backup_dir = request.form.get('backup_dir', 'backups')
         
+        # Incremental backups only include documents changed since the last backup
+        since = None
+        if request.form.get('incremental'):
+            since = get_last_backup_time(backup_dir)
+        
         # Create backup
-        success, message = backup_database(backup_dir)
+        success, message = backup_database(backup_dir, since)
         
         if success:
             flash(message, 'success')
@@ -1056,9 +1101,10 @@ def api_colleges():
     # Get sort parameters
     sort_by = request.args.get('sort', 'name')
     sort_order = int(request.args.get('order', 1))
+    cursor = request.args.get('cursor')
     
     # Get colleges
-    result = get_colleges_paginated(page, per_page, filters, sort_by, sort_order)
+    result = get_colleges_paginated(page, per_page, filters, sort_by, sort_order, cursor)
     
     return jsonify(result)
 
@@ -1082,7 +1128,7 @@ def api_college_details(college_id):
 def api_crawl_status(college_id):
     # Get active crawl job for college
     from models.crawl_job import get_active_crawl_job_for_college
-    job = get_active_crawl_job_for_college(db, college_id)
+    job = get_active_crawl_job_for_college(db, college_id, fields='progress')
     
     if not job:
         return jsonify({'status': 'not_started'})
@@ -1093,7 +1139,7 @@ def api_crawl_status(college_id):
     # Get progress for running jobs
     progress = None
     if status == 'running':
-        progress = get_crawl_progress(job['_id'])
+        progress = build_crawl_progress(job)
     
     return jsonify({
         'status': status,
@@ -1184,10 +1230,16 @@ def add_college_submit():
         flash('Please fill all required fields', 'danger')
         return redirect(url_for('add_college'))
     
+    existing = get_college_by_website_key(db, website)
+    if existing:
+        flash(f"{existing['name']} already has this website.", 'danger')
+        return redirect(url_for('add_college'))
+    
     # Create college document
     college = {
         'name': name,
         'website': website,
+        'website_key': normalize_website(website),
         'type': college_type,
         'state': state,
         'location': {
@@ -1204,9 +1256,14 @@ def add_college_submit():
     }
     
     # Insert into database
-    result = db.colleges.insert_one(college)
+    try:
+        result = db.colleges.insert_one(college)
+    except DuplicateKeyError:
+        flash('Another college already has this website.', 'danger')
+        return redirect(url_for('add_college'))
     
     if result.inserted_id:
+        invalidate_database_statistics()
         flash('College added successfully', 'success')
         return redirect(url_for('college_details', college_id=result.inserted_id))
     else:
@@ -1216,7 +1273,97 @@ def add_college_submit():
 
 
 
+@app.cli.command('import-colleges')
+@click.argument('file_path')
+@click.option('--type', 'college_type', default=None, help='College type for rows that do not specify one.')
+def import_colleges_command(file_path, college_type):
+    """Import colleges from a JSON or CSV file."""
+    def report(rows, inserted, updated):
+        click.echo(f"{rows} rows processed ({inserted} new, {updated} updated)")
+    
+    success, message, count = import_colleges_from_file(file_path, college_type, report)
+    click.echo(message)
+    if not success:
+        raise SystemExit(1)
+
+@app.cli.command('export-colleges')
+@click.argument('file_path')
+def export_colleges_command(file_path):
+    """Export all colleges to a JSON or CSV file."""
+    success, message, count = export_colleges_to_file(file_path)
+    click.echo(message)
+    if not success:
+        raise SystemExit(1)
+
+@app.cli.command('migrate-website-keys')
+def migrate_website_keys_command():
+    """Set website keys on colleges created before they were stored and make them unique."""
+    success, message = migrate_website_keys()
+    click.echo(message)
+    if not success:
+        raise SystemExit(1)
+
+@app.cli.command('normalize-data')
+def normalize_data_command():
+    """Recompute numeric package, stipend, fee and count fields of stored data."""
+    success, message = normalize_structured_data()
+    click.echo(message)
+    if not success:
+        raise SystemExit(1)
+
+@app.cli.command('canonicalize-companies')
+def canonicalize_companies_command():
+    """Resolve stored company names to canonical companies and rebuild company indexes."""
+    success, message = canonicalize_company_data()
+    click.echo(message)
+    if not success:
+        raise SystemExit(1)
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the placement rollups from the placement data."""
+    from models.placement_rollup import rebuild_placement_rollups, get_rollup_status
+    
+    failed = get_rollup_status(db).get('failed_refreshes', 0)
+    if failed:
+        click.echo(f"Repairing {failed} failed rollup refreshes")
+    rebuild_placement_rollups(db)
+    invalidate_database_statistics()
+    click.echo("Rebuilt placement rollups")
+
+@app.cli.command('export-analytics')
+@click.argument('output_dir', default='analytics')
+@click.option('--full', is_flag=True, help='Rebuild every table instead of exporting changes since the last export.')
+def export_analytics_command(output_dir, full):
+    """Export placement and admission data as Parquet tables to OUTPUT_DIR."""
+    from services.analytics_service import export_analytics
+    
+    success, message = export_analytics(output_dir, incremental=not full)
+    click.echo(message)
+    if not success:
+        raise SystemExit(1)
+
+@app.cli.command('backup-db')
+@click.argument('backup_dir', default='backups')
+@click.option('--incremental', is_flag=True, help='Only back up documents changed since the last backup.')
+def backup_db_command(backup_dir, incremental):
+    """Back up the database to BACKUP_DIR."""
+    since = get_last_backup_time(backup_dir) if incremental else None
+    success, message = backup_database(backup_dir, since)
+    click.echo(message)
+    if not success:
+        raise SystemExit(1)
+
+@app.cli.command('restore-db')
+@click.argument('backup_path')
+@click.option('--drop', is_flag=True, help='Remove existing documents before restoring a full backup.')
+def restore_db_command(backup_path, drop):
+    """Restore the database from the backup in BACKUP_PATH."""
+    success, message = restore_database(backup_path, drop)
+    click.echo(message)
+    if not success:
+        raise SystemExit(1)
 
 # Run the application
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Micro-benchmark for the dashboard statistics queries
+
+Seeds a scratch database on a local MongoDB and compares the per-status
+count_documents fan-out with the single-aggregation statistics functions,
+reporting database round trips and latency for each.
+
+Usage:
+    python -m benchmarks.stats_benchmark [--docs 50000] [--runs 20]
+
+Set BENCH_MONGO_URI to point at a different server. The scratch database is
+dropped when the benchmark finishes.
+"""
+import os
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from pymongo import MongoClient, monitoring
+from models.college import get_summary_stats
+from models.raw_content import get_raw_content_stats
+from models.crawl_job import get_crawl_job_stats
+from models.ai_processing_job import get_ai_processing_stats
+
+BENCH_MONGO_URI = os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017')
+BENCH_DATABASE_NAME = 'college_data_crawler_bench'
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to the server"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def seed_database(db, num_docs):
+    """
+    Seed the scratch database with synthetic documents
+
+    Args:
+        db: Database connection
+        num_docs: Number of documents per collection
+    """
+    now = datetime.utcnow()
+    statuses = ['queued', 'running', 'completed', 'failed']
+    content_types = ['admission', 'placement', 'internship', 'general']
+    batch_size = 1000
+
+    for start in range(0, num_docs, batch_size):
+        count = min(batch_size, num_docs - start)
+
+        db.colleges.insert_many([{
+            'name': f"College {start + i}",
+            'type': random.choice(['Engineering', 'Medical']),
+            'status': random.choice(['active', 'inactive']),
+            'last_crawled': now if random.random() < 0.5 else None
+        } for i in range(count)])
+
+        db.raw_content.insert_many([{
+            'content_type': random.choice(content_types),
+            'content': 'x' * 2000,
+            'processed': random.random() < 0.5,
+            'processing_error': 'error' if random.random() < 0.1 else None
+        } for _ in range(count)])
+
+        db.crawl_jobs.insert_many([{
+            'status': random.choice(statuses),
+            'duration_seconds': random.uniform(10, 600),
+            'pages_crawled': random.randint(1, 30),
+            'timestamps': {'created': now - timedelta(minutes=i)}
+        } for i in range(count)])
+
+        db.ai_processing_jobs.insert_many([{
+            'status': random.choice(statuses),
+            'content_type': random.choice(content_types),
+            'duration_seconds': random.uniform(1, 60),
+            'confidence_score': random.random()
+        } for _ in range(count)])
+
+    # Match the indexes the application creates
+    db.colleges.create_index('type')
+    db.colleges.create_index('status')
+    db.colleges.create_index('last_crawled')
+    db.raw_content.create_index('content_type')
+    db.raw_content.create_index('processed')
+    db.crawl_jobs.create_index('status')
+    db.ai_processing_jobs.create_index('status')
+    db.ai_processing_jobs.create_index('content_type')
+
+def avg_of(collection, match, field):
+    """Run a single $avg pipeline the way the original stats functions did"""
+    result = list(collection.aggregate([
+        {'$match': match},
+        {'$group': {'_id': None, 'value': {'$avg': f'${field}'}}}
+    ]))
+    return result[0]['value'] if result else None
+
+def fanout_stats(db):
+    """
+    Compute the same statistics with one count_documents call per filter,
+    as the statistics functions did before they were collapsed
+    """
+    colleges = db.colleges
+    raw_content = db.raw_content
+    crawl_jobs = db.crawl_jobs
+    ai_jobs = db.ai_processing_jobs
+
+    return {
+        'colleges': [
+            colleges.count_documents({}),
+            colleges.count_documents({'type': 'Engineering'}),
+            colleges.count_documents({'type': 'Medical'}),
+            colleges.count_documents({'last_crawled': {'$ne': None}}),
+            colleges.count_documents({'status': 'active'}),
+            colleges.count_documents({'status': 'inactive'})
+        ],
+        'content': [
+            raw_content.count_documents({}),
+            raw_content.count_documents({'content_type': 'admission'}),
+            raw_content.count_documents({'content_type': 'placement'}),
+            raw_content.count_documents({'content_type': 'internship'}),
+            raw_content.count_documents({'processed': True}),
+            raw_content.count_documents({'processed': False}),
+            raw_content.count_documents({'processing_error': {'$ne': None}})
+        ],
+        'crawl': [
+            crawl_jobs.count_documents({'status': status})
+            for status in ['queued', 'running', 'completed', 'failed']
+        ] + [
+            avg_of(crawl_jobs, {'status': 'completed', 'duration_seconds': {'$ne': None}}, 'duration_seconds'),
+            avg_of(crawl_jobs, {'status': 'completed'}, 'pages_crawled')
+        ],
+        'ai_processing': [
+            ai_jobs.count_documents({'status': status})
+            for status in ['queued', 'running', 'completed', 'failed']
+        ] + [
+            ai_jobs.count_documents({'content_type': content_type})
+            for content_type in ['admission', 'placement', 'internship']
+        ] + [
+            avg_of(ai_jobs, {'status': 'completed', 'duration_seconds': {'$ne': None}}, 'duration_seconds'),
+            avg_of(ai_jobs, {'status': 'completed', 'confidence_score': {'$ne': None}}, 'confidence_score')
+        ]
+    }
+
+def aggregated_stats(db):
+    """Compute the statistics with the single-aggregation model functions"""
+    return {
+        'colleges': get_summary_stats(db),
+        'content': get_raw_content_stats(db),
+        'crawl': get_crawl_job_stats(db),
+        'ai_processing': get_ai_processing_stats(db)
+    }
+
+def measure(label, func, db, counter, runs):
+    """
+    Time a statistics function and count its round trips
+
+    Args:
+        label: Label to print
+        func: Function taking a database connection
+        db: Database connection
+        counter: CommandCounter registered on the client
+        runs: Number of timed runs
+    """
+    # Warm up caches before timing
+    func(db)
+
+    counter.count = 0
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(db)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    round_trips = counter.count / runs
+    print(f"{label:<24} {round_trips:>12.0f} {statistics.median(timings):>12.2f} {max(timings):>12.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard statistics queries')
+    parser.add_argument('--docs', type=int, default=50000, help='Documents per collection')
+    parser.add_argument('--runs', type=int, default=20, help='Timed runs per variant')
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = MongoClient(BENCH_MONGO_URI, event_listeners=[counter])
+    client.drop_database(BENCH_DATABASE_NAME)
+    db = client[BENCH_DATABASE_NAME]
+
+    try:
+        print(f"Seeding {args.docs} documents per collection...")
+        seed_database(db, args.docs)
+
+        print(f"{'variant':<24} {'round trips':>12} {'median ms':>12} {'max ms':>12}")
+        measure('count_documents fan-out', fanout_stats, db, counter, args.runs)
+        measure('single aggregation', aggregated_stats, db, counter, args.runs)
+    finally:
+        client.drop_database(BENCH_DATABASE_NAME)
+        client.close()
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,10 @@ class Config:
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
     CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', REDIS_URL)
     
+    # SocketIO configuration (set a message queue to emit from separate worker processes)
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', None)
+    SOCKETIO_STATUS_INTERVAL = int(os.getenv('SOCKETIO_STATUS_INTERVAL', '5'))
+    
     # File storage
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', os.path.join(os.getcwd(), 'uploads'))
     ALLOWED_EXTENSIONS = {'json', 'csv', 'xlsx'}
@@ -37,6 +41,91 @@ class Config:
     CRAWL_DELAY = float(os.getenv('CRAWL_DELAY', '1.0'))
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
     
+    # Page downloads: largest body accepted (bytes, after decompression) and read size
+    FETCH_MAX_BYTES = int(os.getenv('FETCH_MAX_BYTES', str(5 * 1024 * 1024)))
+    FETCH_CHUNK_SIZE = int(os.getenv('FETCH_CHUNK_SIZE', '65536'))
+    
+    # Linked documents (PDF, DOCX, PPTX), fetched after a college's pages: largest
+    # file (bytes), documents per crawl, pages extracted per document, extraction
+    # processes and seconds allowed for each extraction
+    DOCUMENTS_ENABLED = os.getenv('DOCUMENTS_ENABLED', 'True') == 'True'
+    DOCUMENT_MAX_BYTES = int(os.getenv('DOCUMENT_MAX_BYTES', str(20 * 1024 * 1024)))
+    DOCUMENT_MAX_PER_COLLEGE = int(os.getenv('DOCUMENT_MAX_PER_COLLEGE', '10'))
+    DOCUMENT_MAX_PAGES = int(os.getenv('DOCUMENT_MAX_PAGES', '50'))
+    DOCUMENT_WORKERS = int(os.getenv('DOCUMENT_WORKERS', '2'))
+    DOCUMENT_EXTRACT_TIMEOUT = int(os.getenv('DOCUMENT_EXTRACT_TIMEOUT', '120'))
+    
+    # Shared HTTP connection pools: hosts kept pooled, keep-alive connections per
+    # host (further requests wait for a free one) and DNS cache lifetime (seconds)
+    HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '100'))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', '4'))
+    DNS_CACHE_TTL = int(os.getenv('DNS_CACHE_TTL', '300'))
+    
+    # Per-host politeness: CRAWL_DELAY is the minimum interval between requests
+    # to one server (keyed by IP when POLITENESS_BY_IP), shared by all workers
+    # and, when POLITENESS_REDIS_URL is set, by all worker processes
+    POLITENESS_BY_IP = os.getenv('POLITENESS_BY_IP', 'True') == 'True'
+    POLITENESS_BURST = int(os.getenv('POLITENESS_BURST', '1'))
+    POLITENESS_REDIS_URL = os.getenv('POLITENESS_REDIS_URL', None)
+    
+    # Adaptive per-host throttling: CRAWL_DELAY is the starting interval, which
+    # shrinks by THROTTLE_STEP on fast responses (down to THROTTLE_MIN_DELAY) and
+    # doubles on overload or errors (up to THROTTLE_MAX_DELAY)
+    THROTTLE_MIN_DELAY = float(os.getenv('THROTTLE_MIN_DELAY', '0.25'))
+    THROTTLE_MAX_DELAY = float(os.getenv('THROTTLE_MAX_DELAY', '60'))
+    THROTTLE_STEP = float(os.getenv('THROTTLE_STEP', '0.25'))
+    THROTTLE_TARGET_LATENCY = float(os.getenv('THROTTLE_TARGET_LATENCY', '2.0'))
+    THROTTLE_MAX_RETRY_AFTER = float(os.getenv('THROTTLE_MAX_RETRY_AFTER', '600'))
+    
+    # Retries of transient fetch failures, with jittered exponential backoff (seconds)
+    FETCH_RETRIES = int(os.getenv('FETCH_RETRIES', '2'))
+    FETCH_RETRY_BACKOFF = float(os.getenv('FETCH_RETRY_BACKOFF', '2.0'))
+    
+    # robots.txt cache (seconds) and limits on sitemaps read per crawl
+    ROBOTS_CACHE_TTL = int(os.getenv('ROBOTS_CACHE_TTL', '86400'))
+    SITEMAP_MAX_FILES = int(os.getenv('SITEMAP_MAX_FILES', '10'))
+    SITEMAP_MAX_URLS = int(os.getenv('SITEMAP_MAX_URLS', '5000'))
+    
+    # Scheduled re-crawls: freshness SLA in days per college type (DEFAULT for
+    # other types), how often the scheduler runs, the most crawls it starts per
+    # hour and per run, and the random delay spread between the crawls it starts
+    RECRAWL_ENABLED = os.getenv('RECRAWL_ENABLED', 'True') == 'True'
+    RECRAWL_SLA_DAYS = {
+        'Engineering': int(os.getenv('RECRAWL_SLA_DAYS_ENGINEERING', '7')),
+        'Medical': int(os.getenv('RECRAWL_SLA_DAYS_MEDICAL', '14')),
+        'DEFAULT': int(os.getenv('RECRAWL_SLA_DAYS', '14'))
+    }
+    RECRAWL_INTERVAL_MINUTES = int(os.getenv('RECRAWL_INTERVAL_MINUTES', '10'))
+    RECRAWL_MAX_PER_HOUR = int(os.getenv('RECRAWL_MAX_PER_HOUR', '30'))
+    RECRAWL_MAX_QUEUED = int(os.getenv('RECRAWL_MAX_QUEUED', '4'))
+    RECRAWL_JITTER_SECONDS = int(os.getenv('RECRAWL_JITTER_SECONDS', '60'))
+    
+    # Adaptive page revisits: bounds in days of the interval between fetches of a page
+    REVISIT_MIN_DAYS = float(os.getenv('REVISIT_MIN_DAYS', '1'))
+    REVISIT_MAX_DAYS = float(os.getenv('REVISIT_MAX_DAYS', '60'))
+    
+    # Dashboard statistics cache (seconds)
+    STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', '30'))
+    
+    # Logged-in user cache used by the session loader (seconds)
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '60'))
+    
+    # Password hashing (bcrypt work factor and concurrent hashes) and login rate limit
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    LOGIN_RATE_LIMIT = int(os.getenv('LOGIN_RATE_LIMIT', '10'))
+    LOGIN_RATE_WINDOW = int(os.getenv('LOGIN_RATE_WINDOW', '60'))
+    
+    # College imports (colleges written per bulk operation)
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+    
+    # Analytics exports (documents flattened per batch)
+    ANALYTICS_BATCH_SIZE = int(os.getenv('ANALYTICS_BATCH_SIZE', '500'))
+    
+    # Database backups
+    BACKUP_BATCH_SIZE = int(os.getenv('BACKUP_BATCH_SIZE', '1000'))
+    BACKUP_WORKERS = int(os.getenv('BACKUP_WORKERS', '4'))
+    
     # Worker configuration
     CRAWLER_WORKERS = int(os.getenv('CRAWLER_WORKERS', '2'))
     AI_PROCESSING_WORKERS = int(os.getenv('AI_PROCESSING_WORKERS', '1'))
@@ -41,8 +41,11 @@ def init_db(app=None):
         from .raw_content import create_indexes as create_raw_content_indexes
         from .admission_data import create_indexes as create_admission_indexes
         from .placement_data import create_indexes as create_placement_indexes
+        from .placement_rollup import create_indexes as create_placement_rollup_indexes
         from .internship_data import create_indexes as create_internship_indexes
+        from .company import create_indexes as create_company_indexes
         from .crawl_job import create_indexes as create_crawl_job_indexes
+        from .url_state import create_indexes as create_url_state_indexes
         from .ai_processing_job import create_indexes as create_ai_job_indexes
         
         # Create all indexes
@@ -51,8 +54,11 @@ def init_db(app=None):
         create_raw_content_indexes(db)
         create_admission_indexes(db)
         create_placement_indexes(db)
+        create_placement_rollup_indexes(db)
         create_internship_indexes(db)
+        create_company_indexes(db)
         create_crawl_job_indexes(db)
+        create_url_state_indexes(db)
         create_ai_job_indexes(db)
         
         return db
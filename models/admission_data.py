@@ -2,12 +2,34 @@
 Admission data model for storing structured admission information
 """
 from datetime import datetime
+import logging
 from bson import ObjectId
 from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+from models.normalization import ADMISSION_FIELDS, normalize_fields, normalize_items
+from models.merge import (
+    compact_item, prepare_items, merge_array_expression, merge_object_expression,
+    union_expression, upsert_merge
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
 def create_indexes(db):
     """Create indexes for the admission_data collection"""
-    db.admission_data.create_index([('college_id', ASCENDING)])
+    # One document per college, so concurrent merges can't insert duplicates
+    indexes = db.admission_data.index_information()
+    if 'college_id_1' in indexes and not indexes['college_id_1'].get('unique'):
+        db.admission_data.drop_index('college_id_1')
+    try:
+        db.admission_data.create_index([('college_id', ASCENDING)], unique=True)
+    except OperationFailure as e:
+        logger.warning(f"Could not create unique admission_data index, remove duplicate documents first: {str(e)}")
+        db.admission_data.create_index([('college_id', ASCENDING)])
     db.admission_data.create_index([('last_updated', DESCENDING)])
     # Text index on courses and eligibility for searching
     db.admission_data.create_index([
@@ -15,6 +37,23 @@ def create_indexes(db):
         ('courses.eligibility', TEXT),
         ('application_process', TEXT)
     ])
+    db.admission_data.create_index([('courses.fee_structure.tuition_inr', ASCENDING)])
+
+def normalize_admission_data(data):
+    """
+    Add canonical numeric fields (fees in INR, seat counts) to the admission
+    fields of a document or update, in place
+    
+    Args:
+        data: Dictionary that may contain courses and hostel_facilities
+            
+    Returns:
+        The same dictionary
+    """
+    normalize_items(data.get('courses'), ADMISSION_FIELDS)
+    if data.get('hostel_facilities'):
+        normalize_fields(data['hostel_facilities'], ADMISSION_FIELDS)
+    return data
 
 def get_admission_data_collection(db):
     """Get the admission_data collection"""
@@ -25,6 +64,10 @@ def store_admission_data(db, college_id, source_urls, courses=None, application_
     """
     Store structured admission data
     
+    New data is merged into the college's document on the server in a
+    single upsert: courses and important dates are merged by name and
+    event, so concurrent workers never lose each other's updates.
+    
     Args:
         db: Database connection
         college_id: ID of the college
@@ -36,7 +79,7 @@ def store_admission_data(db, college_id, source_urls, courses=None, application_
         metadata: Additional metadata (processing_id, confidence_score, etc.)
         
     Returns:
-        Inserted document ID
+        Inserted or updated document ID
     """
     collection = get_admission_data_collection(db)
     
@@ -44,82 +87,29 @@ def store_admission_data(db, college_id, source_urls, courses=None, application_
     if isinstance(college_id, str):
         college_id = ObjectId(college_id)
     
-    # Check if admission data already exists for this college
-    existing_data = collection.find_one({'college_id': college_id})
+    # Drop empty values so they don't overwrite stored ones, then add numeric fields
+    incoming = normalize_admission_data({
+        'courses': prepare_items(courses, 'name'),
+        'hostel_facilities': compact_item(hostel_facilities or {})
+    })
+    
+    now = datetime.utcnow()
+    merge_fields = {
+        'source_urls': union_expression('source_urls', source_urls),
+        'courses': merge_array_expression('courses', incoming['courses'], 'name'),
+        'important_dates': merge_array_expression(
+            'important_dates', prepare_items(important_dates, 'event'), 'event'
+        ),
+        'hostel_facilities': merge_object_expression('hostel_facilities', incoming['hostel_facilities']),
+        'application_process': {'$literal': application_process} if application_process else '$application_process',
+        'metadata': {'$literal': metadata} if metadata else {'$ifNull': ['$metadata', {}]},
+        'created_at': {'$ifNull': ['$created_at', now]},
+        'last_updated': now
+    }
     
-    if existing_data:
-        # Update existing document
-        update_data = {
-            'source_urls': list(set(existing_data.get('source_urls', []) + source_urls)),
-            'last_updated': datetime.utcnow()
-        }
-        
-        # Update courses if provided
-        if courses:
-            # Merge with existing courses
-            existing_courses = existing_data.get('courses', [])
-            # Create a dictionary of courses by name for easy lookup
-            course_dict = {course.get('name', ''): course for course in existing_courses if course.get('name')}
-            
-            for course in courses:
-                course_name = course.get('name', '')
-                if course_name in course_dict:
-                    # Update existing course with new information
-                    merged_course = course_dict[course_name].copy()
-                    merged_course.update({k: v for k, v in course.items() if v})
-                    course_dict[course_name] = merged_course
-                else:
-                    # Add new course
-                    course_dict[course_name] = course
-            
-            update_data['courses'] = list(course_dict.values())
-        
-        # Update other fields if provided
-        if application_process:
-            update_data['application_process'] = application_process
-        
-        if important_dates:
-            # Merge with existing dates
-            existing_dates = existing_data.get('important_dates', [])
-            all_dates = existing_dates + important_dates
-            # Remove duplicates by event name
-            event_dict = {date.get('event', ''): date for date in all_dates if date.get('event')}
-            update_data['important_dates'] = list(event_dict.values())
-        
-        if hostel_facilities:
-            # Merge with existing hostel facilities
-            existing_facilities = existing_data.get('hostel_facilities', {})
-            merged_facilities = existing_facilities.copy()
-            merged_facilities.update(hostel_facilities)
-            update_data['hostel_facilities'] = merged_facilities
-        
-        if metadata:
-            # Set new metadata
-            update_data['metadata'] = metadata
-        
-        # Update document
-        collection.update_one(
-            {'college_id': college_id},
-            {'$set': update_data}
-        )
-        
-        return existing_data['_id']
-    else:
-        # Create new document
-        admission_doc = {
-            'college_id': college_id,
-            'source_urls': source_urls,
-            'courses': courses or [],
-            'application_process': application_process,
-            'important_dates': important_dates or [],
-            'hostel_facilities': hostel_facilities or {},
-            'metadata': metadata or {},
-            'created_at': datetime.utcnow(),
-            'last_updated': datetime.utcnow()
-        }
-        
-        result = collection.insert_one(admission_doc)
-        return result.inserted_id
+    merged = upsert_merge(collection, {'college_id': college_id}, merge_fields, {'_id': 1})
+    
+    return merged['_id']
 
 def get_admission_data_by_college(db, college_id):
     """
@@ -4,6 +4,8 @@ AI processing job model for tracking AI processing operations
 from datetime import datetime
 from bson import ObjectId
 from pymongo import ASCENDING, DESCENDING
+from models.pagination import build_keyset_query, split_page
+from models.projections import get_projection
 
 def create_indexes(db):
     """Create indexes for the ai_processing_jobs collection"""
@@ -12,6 +14,15 @@ def create_indexes(db):
     db.ai_processing_jobs.create_index([('status', ASCENDING)])
     db.ai_processing_jobs.create_index([('content_type', ASCENDING)])
     db.ai_processing_jobs.create_index([('timestamps.started', DESCENDING)])
+    # Compound indexes for filtered listings sorted newest first
+    db.ai_processing_jobs.create_index([('timestamps.created', DESCENDING), ('_id', DESCENDING)])
+    db.ai_processing_jobs.create_index([('status', ASCENDING), ('timestamps.created', DESCENDING), ('_id', DESCENDING)])
+    db.ai_processing_jobs.create_index([('content_type', ASCENDING), ('timestamps.created', DESCENDING), ('_id', DESCENDING)])
+    db.ai_processing_jobs.create_index([
+        ('status', ASCENDING), ('content_type', ASCENDING),
+        ('timestamps.created', DESCENDING), ('_id', DESCENDING)
+    ])
+    db.ai_processing_jobs.create_index([('college_id', ASCENDING), ('timestamps.created', DESCENDING), ('_id', DESCENDING)])
 
 def get_ai_processing_jobs_collection(db):
     """Get the ai_processing_jobs collection"""
@@ -164,13 +175,14 @@ def update_ai_processing_job_result(db, job_id, model_used, confidence_score,
     
     return result.modified_count > 0
 
-def get_ai_processing_job_by_id(db, job_id):
+def get_ai_processing_job_by_id(db, job_id, fields=None):
     """
     Get an AI processing job by ID
     
     Args:
         db: Database connection
         job_id: ID of the AI processing job
+        fields: Named field set from models.projections (optional, full document by default)
         
     Returns:
         AI processing job document or None
@@ -184,7 +196,7 @@ def get_ai_processing_job_by_id(db, job_id):
         except:
             return None
     
-    return collection.find_one({'_id': job_id})
+    return collection.find_one({'_id': job_id}, get_projection('ai_processing_jobs', fields))
 
 def get_ai_processing_job_by_raw_content(db, raw_content_id):
     """
@@ -205,7 +217,7 @@ def get_ai_processing_job_by_raw_content(db, raw_content_id):
     
     return collection.find_one({'raw_content_id': raw_content_id})
 
-def get_queued_ai_processing_jobs(db, content_type=None, limit=10):
+def get_queued_ai_processing_jobs(db, content_type=None, limit=10, fields='dispatch'):
     """
     Get queued AI processing jobs
     
@@ -213,6 +225,7 @@ def get_queued_ai_processing_jobs(db, content_type=None, limit=10):
         db: Database connection
         content_type: Filter by content type (optional)
         limit: Maximum number of jobs to return
+        fields: Named field set from models.projections (None for full documents)
         
     Returns:
         List of AI processing job documents
@@ -225,13 +238,13 @@ def get_queued_ai_processing_jobs(db, content_type=None, limit=10):
         query['content_type'] = content_type
     
     # Sort by created timestamp (oldest first)
-    cursor = collection.find(query).sort(
+    cursor = collection.find(query, get_projection('ai_processing_jobs', fields)).sort(
         [('timestamps.created', ASCENDING)]
     ).limit(limit)
     
     return list(cursor)
 
-def get_ai_processing_jobs_for_college(db, college_id, status=None, skip=0, limit=20):
+def get_ai_processing_jobs_for_college(db, college_id, status=None, skip=0, limit=20, fields='summary'):
     """
     Get AI processing jobs for a specific college
     
@@ -241,6 +254,7 @@ def get_ai_processing_jobs_for_college(db, college_id, status=None, skip=0, limi
         status: Filter by status (optional)
         skip: Number of records to skip
         limit: Maximum number of records to return
+        fields: Named field set from models.projections (None for full documents)
         
     Returns:
         List of AI processing job documents
@@ -257,28 +271,24 @@ def get_ai_processing_jobs_for_college(db, college_id, status=None, skip=0, limi
         query['status'] = status
     
     # Sort by created timestamp (newest first)
-    cursor = collection.find(query).sort(
+    cursor = collection.find(query, get_projection('ai_processing_jobs', fields)).sort(
         [('timestamps.created', DESCENDING)]
     ).skip(skip).limit(limit)
     
     return list(cursor)
 
-def count_ai_processing_jobs(db, status=None, content_type=None, college_id=None):
+def build_ai_processing_job_query(status=None, content_type=None, college_id=None):
     """
-    Count AI processing jobs with optional filters
+    Build a query for AI processing jobs from optional filters
     
     Args:
-        db: Database connection
         status: Filter by status (optional)
         content_type: Filter by content type (optional)
         college_id: Filter by college ID (optional)
         
     Returns:
-        Count of matching AI processing jobs
+        Query dictionary
     """
-    collection = get_ai_processing_jobs_collection(db)
-    
-    # Build query
     query = {}
     
     if status:
@@ -293,6 +303,63 @@ def count_ai_processing_jobs(db, status=None, content_type=None, college_id=None
             college_id = ObjectId(college_id)
         query['college_id'] = college_id
     
+    return query
+
+def get_ai_processing_jobs(db, status=None, content_type=None, college_id=None,
+                           cursor=None, skip=0, limit=20):
+    """
+    Get AI processing jobs with filtering and keyset pagination, newest first
+    
+    The prompt and raw AI response are excluded from the returned documents.
+    
+    Args:
+        db: Database connection
+        status: Filter by status (optional)
+        content_type: Filter by content type (optional)
+        college_id: Filter by college ID (optional)
+        cursor: Cursor returned for the previous page (optional)
+        skip: Number of records to skip when no cursor is given
+        limit: Maximum number of records to return
+        
+    Returns:
+        Tuple of (list of AI processing job documents, next page cursor or None)
+    """
+    collection = get_ai_processing_jobs_collection(db)
+    
+    query = build_ai_processing_job_query(status, content_type, college_id)
+    sort_by = 'timestamps.created'
+    
+    if cursor:
+        keyset_query = build_keyset_query(sort_by, DESCENDING, cursor)
+        if keyset_query is None:
+            return [], None
+        query = {'$and': [query, keyset_query]} if query else keyset_query
+        skip = 0
+    
+    # Fetch one extra document to know whether there is a next page
+    docs = list(collection.find(query, get_projection('ai_processing_jobs', 'summary')).sort(
+        [(sort_by, DESCENDING), ('_id', DESCENDING)]
+    ).skip(skip).limit(limit + 1))
+    
+    return split_page(docs, sort_by, limit)
+
+def count_ai_processing_jobs(db, status=None, content_type=None, college_id=None):
+    """
+    Count AI processing jobs with optional filters
+    
+    Args:
+        db: Database connection
+        status: Filter by status (optional)
+        content_type: Filter by content type (optional)
+        college_id: Filter by college ID (optional)
+        
+    Returns:
+        Count of matching AI processing jobs
+    """
+    collection = get_ai_processing_jobs_collection(db)
+    
+    query = build_ai_processing_job_query(status, content_type, college_id)
+    
     return collection.count_documents(query)
 
 def delete_ai_processing_job(db, job_id):
@@ -327,32 +394,35 @@ def get_ai_processing_stats(db):
     """
     collection = get_ai_processing_jobs_collection(db)
     
-    # Count jobs by status
-    queued_jobs = collection.count_documents({'status': 'queued'})
-    running_jobs = collection.count_documents({'status': 'running'})
-    completed_jobs = collection.count_documents({'status': 'completed'})
-    failed_jobs = collection.count_documents({'status': 'failed'})
-    
-    # Count jobs by content type
-    admission_jobs = collection.count_documents({'content_type': 'admission'})
-    placement_jobs = collection.count_documents({'content_type': 'placement'})
-    internship_jobs = collection.count_documents({'content_type': 'internship'})
-    
-    # Get average duration of completed jobs
-    pipeline = [
-        {'$match': {'status': 'completed', 'duration_seconds': {'$ne': None}}},
-        {'$group': {'_id': None, 'avg_duration': {'$avg': '$duration_seconds'}}}
-    ]
-    duration_result = list(collection.aggregate(pipeline))
-    avg_duration = duration_result[0]['avg_duration'] if duration_result else None
-    
-    # Get average confidence score
+    # Count jobs by status and content type and average completed jobs in a single pass
+    is_completed = {'$eq': ['$status', 'completed']}
     pipeline = [
-        {'$match': {'status': 'completed', 'confidence_score': {'$ne': None}}},
-        {'$group': {'_id': None, 'avg_confidence': {'$avg': '$confidence_score'}}}
+        {'$group': {
+            '_id': None,
+            'queued_jobs': {'$sum': {'$cond': [{'$eq': ['$status', 'queued']}, 1, 0]}},
+            'running_jobs': {'$sum': {'$cond': [{'$eq': ['$status', 'running']}, 1, 0]}},
+            'completed_jobs': {'$sum': {'$cond': [is_completed, 1, 0]}},
+            'failed_jobs': {'$sum': {'$cond': [{'$eq': ['$status', 'failed']}, 1, 0]}},
+            'admission_jobs': {'$sum': {'$cond': [{'$eq': ['$content_type', 'admission']}, 1, 0]}},
+            'placement_jobs': {'$sum': {'$cond': [{'$eq': ['$content_type', 'placement']}, 1, 0]}},
+            'internship_jobs': {'$sum': {'$cond': [{'$eq': ['$content_type', 'internship']}, 1, 0]}},
+            # $avg ignores the nulls produced for non-completed jobs
+            'avg_duration': {'$avg': {'$cond': [is_completed, '$duration_seconds', None]}},
+            'avg_confidence': {'$avg': {'$cond': [is_completed, '$confidence_score', None]}}
+        }}
     ]
-    confidence_result = list(collection.aggregate(pipeline))
-    avg_confidence = confidence_result[0]['avg_confidence'] if confidence_result else None
+    result = list(collection.aggregate(pipeline))
+    counts = result[0] if result else {}
+    
+    queued_jobs = counts.get('queued_jobs', 0)
+    running_jobs = counts.get('running_jobs', 0)
+    completed_jobs = counts.get('completed_jobs', 0)
+    failed_jobs = counts.get('failed_jobs', 0)
+    admission_jobs = counts.get('admission_jobs', 0)
+    placement_jobs = counts.get('placement_jobs', 0)
+    internship_jobs = counts.get('internship_jobs', 0)
+    avg_duration = counts.get('avg_duration')
+    avg_confidence = counts.get('avg_confidence')
     
     return {
         'queued_jobs': queued_jobs,
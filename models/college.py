@@ -1,17 +1,75 @@
 """
 College model representing educational institutions
 """
-from datetime import datetime
+from datetime import datetime, timedelta
+import logging
 from bson import ObjectId
-from pymongo import ASCENDING, TEXT
+from pymongo import ASCENDING, DESCENDING, TEXT, UpdateOne
+from pymongo.errors import OperationFailure, BulkWriteError
+from models.pagination import build_keyset_query
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# MongoDB error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+# Weight of the latest crawl in a college's change_rate moving average
+CHANGE_RATE_WEIGHT = 0.3
 
 def create_indexes(db):
     """Create indexes for the colleges collection"""
     db.colleges.create_index([('name', TEXT), ('website', TEXT)])
-    db.colleges.create_index([('type', ASCENDING)])
-    db.colleges.create_index([('state', ASCENDING)])
-    db.colleges.create_index([('status', ASCENDING)])
     db.colleges.create_index([('last_crawled', ASCENDING)])
+    # Re-crawl scheduling: active colleges of a type by staleness
+    db.colleges.create_index([('status', ASCENDING), ('type', ASCENDING), ('last_crawled', ASCENDING)])
+    create_website_key_index(db)
+    # Keyset pagination over the whole list, one per sortable column
+    for sort_key in ['name', 'state', 'type', 'created_at']:
+        db.colleges.create_index([(sort_key, ASCENDING), ('_id', ASCENDING)])
+    # Keyset pagination by name within a type, state or status filter. These
+    # also serve equality lookups on the filter field, which made the
+    # single-field type, state and status indexes redundant.
+    for filter_key in ['type', 'state', 'status']:
+        db.colleges.create_index([(filter_key, ASCENDING), ('name', ASCENDING), ('_id', ASCENDING)])
+    
+    for redundant_index in ['type_1', 'state_1', 'status_1']:
+        try:
+            db.colleges.drop_index(redundant_index)
+        except OperationFailure:
+            pass
+
+def create_website_key_index(db):
+    """
+    Create the unique index on website_key that imports upsert against
+    
+    Colleges without a key yet (created before website_key was stored) are
+    left out of the index until the migrate-website-keys command sets it.
+    
+    Args:
+        db: Database connection
+        
+    Returns:
+        True if the index exists
+    """
+    existing = db.colleges.index_information().get('website_key_1')
+    if existing and not existing.get('unique'):
+        db.colleges.drop_index('website_key_1')
+    
+    try:
+        db.colleges.create_index(
+            [('website_key', ASCENDING)],
+            unique=True,
+            partialFilterExpression={'website_key': {'$type': 'string'}}
+        )
+        return True
+    except OperationFailure as e:
+        logger.warning(f"Could not create unique website_key index, run migrate-website-keys: {str(e)}")
+        return False
 
 def get_colleges_collection(db):
     """Get the colleges collection"""
@@ -47,6 +105,7 @@ def create_college(db, name, website, college_type, state, location=None, contac
     college_doc = {
         "name": name,
         "website": website,
+        "website_key": normalize_website(website),
         "type": college_type,
         "state": state,
         "location": location or {},
@@ -84,6 +143,10 @@ def update_college(db, college_id, update_data):
     # Set updated timestamp
     update_data['updated_at'] = datetime.utcnow()
     
+    # Keep the import key in step with the website
+    if 'website' in update_data:
+        update_data['website_key'] = normalize_website(update_data['website'])
+    
     # Update college document
     result = collection.update_one(
         {'_id': college_id},
@@ -111,6 +174,32 @@ def get_college_by_id(db, college_id):
     
     return collection.find_one({'_id': college_id})
 
+def get_colleges_by_ids(db, college_ids, projection=None):
+    """
+    Get multiple colleges by ID in a single query
+    
+    Args:
+        db: Database connection
+        college_ids: List of college IDs
+        projection: Fields to include/exclude (optional)
+        
+    Returns:
+        Dictionary mapping college ObjectId to college document
+    """
+    collection = get_colleges_collection(db)
+    
+    # Ensure college IDs are ObjectId and drop duplicates
+    object_ids = list({
+        ObjectId(college_id) if isinstance(college_id, str) else college_id
+        for college_id in college_ids if college_id
+    })
+    
+    if not object_ids:
+        return {}
+    
+    cursor = collection.find({'_id': {'$in': object_ids}}, projection)
+    return {college['_id']: college for college in cursor}
+
 def get_college_by_website(db, website):
     """
     Get a college by website URL
@@ -130,24 +219,33 @@ def get_college_by_website(db, website):
     
     return collection.find_one({'website': website})
 
-def get_colleges(db, filters=None, skip=0, limit=20, sort_by='name', sort_order=1):
+def get_college_by_website_key(db, website):
     """
-    Get colleges with filtering, sorting and pagination
+    Get the college whose website matches a URL once both are normalized
     
     Args:
         db: Database connection
-        filters: Dictionary of filter conditions
-        skip: Number of records to skip
-        limit: Maximum number of records to return
-        sort_by: Field to sort by
-        sort_order: Sort order (1 for ascending, -1 for descending)
+        website: College website URL
         
     Returns:
-        List of college documents
+        College document or None
     """
-    collection = get_colleges_collection(db)
+    website_key = normalize_website(website)
+    if not website_key:
+        return None
     
-    # Build query filters
+    return get_colleges_collection(db).find_one({'website_key': website_key})
+
+def build_college_query(filters=None):
+    """
+    Build a colleges query from filter conditions
+    
+    Args:
+        filters: Dictionary of filter conditions
+        
+    Returns:
+        Query dictionary
+    """
     query = {}
     if filters:
         for key, value in filters.items():
@@ -157,15 +255,73 @@ def get_colleges(db, filters=None, skip=0, limit=20, sort_by='name', sort_order=
                     query['$text'] = {'$search': value}
                 elif key in ['type', 'state', 'status']:
                     query[key] = value
+                elif key == 'ids':
+                    # Restrict to specific colleges
+                    query['_id'] = {'$in': [ObjectId(college_id) if isinstance(college_id, str) else college_id
+                                            for college_id in value]}
     
-    # Sort criteria
-    sort_criteria = [(sort_by, sort_order)]
+    return query
+
+def get_colleges(db, filters=None, skip=0, limit=20, sort_by='name', sort_order=1, cursor=None):
+    """
+    Get colleges with filtering, sorting and pagination
+    
+    Results are ordered by (sort_by, _id) so that a cursor from the last
+    document of a page picks up exactly where that page ended.
+    
+    Args:
+        db: Database connection
+        filters: Dictionary of filter conditions
+        skip: Number of records to skip (ignored when a cursor is given)
+        limit: Maximum number of records to return
+        sort_by: Field to sort by
+        sort_order: Sort order (1 for ascending, -1 for descending)
+        cursor: Keyset cursor for the position after the previous page (optional)
+        
+    Returns:
+        List of college documents
+    """
+    collection = get_colleges_collection(db)
+    
+    # Build query filters
+    query = build_college_query(filters)
+    
+    if cursor:
+        keyset_query = build_keyset_query(sort_by, sort_order, cursor)
+        if keyset_query is None:
+            return []
+        query = {'$and': [query, keyset_query]} if query else keyset_query
+        skip = 0
+    
+    # Sort criteria, with _id as a unique tie-breaker
+    sort_criteria = [(sort_by, sort_order), ('_id', sort_order)]
     
     # Execute query with pagination
     cursor = collection.find(query).sort(sort_criteria).skip(skip).limit(limit)
     
     return list(cursor)
 
+def iter_colleges(db, filters=None, projection=None, batch_size=500):
+    """
+    Iterate over all colleges matching the filters without loading them into memory
+    
+    Args:
+        db: Database connection
+        filters: Dictionary of filter conditions
+        projection: Fields to return (optional, full documents by default)
+        batch_size: Number of documents fetched per round trip
+        
+    Returns:
+        Cursor over college documents, ordered by name
+    """
+    collection = get_colleges_collection(db)
+    
+    query = build_college_query(filters)
+    
+    return collection.find(query, projection, batch_size=batch_size).sort(
+        [('name', ASCENDING), ('_id', ASCENDING)]
+    )
+
 def count_colleges(db, filters=None):
     """
     Count colleges matching the filters
@@ -180,19 +336,15 @@ def count_colleges(db, filters=None):
     collection = get_colleges_collection(db)
     
     # Build query filters
-    query = {}
-    if filters:
-        for key, value in filters.items():
-            if value:
-                if key == 'search':
-                    # Text search on name and website
-                    query['$text'] = {'$search': value}
-                elif key in ['type', 'state', 'status']:
-                    query[key] = value
+    query = build_college_query(filters)
+    
+    # The collection metadata count is exact enough when nothing is filtered
+    if not query:
+        return collection.estimated_document_count()
     
     return collection.count_documents(query)
 
-def update_college_crawl_status(db, college_id, last_crawled=None):
+def update_college_crawl_status(db, college_id, last_crawled=None, change_ratio=None):
     """
     Update the last crawled timestamp for a college
     
@@ -200,6 +352,8 @@ def update_college_crawl_status(db, college_id, last_crawled=None):
         db: Database connection
         college_id: ID of the college
         last_crawled: Timestamp of last crawl (defaults to now)
+        change_ratio: Fraction (0-1) of previously seen pages that changed in
+            this crawl, folded into the college's change_rate (optional)
         
     Returns:
         True if update successful, False otherwise
@@ -207,7 +361,68 @@ def update_college_crawl_status(db, college_id, last_crawled=None):
     if last_crawled is None:
         last_crawled = datetime.utcnow()
     
-    return update_college(db, college_id, {'last_crawled': last_crawled})
+    if change_ratio is None:
+        return update_college(db, college_id, {'last_crawled': last_crawled})
+    
+    # Ensure college_id is ObjectId
+    if isinstance(college_id, str):
+        college_id = ObjectId(college_id)
+    
+    # Exponential moving average, so the rate follows the recent change history
+    result = get_colleges_collection(db).update_one({'_id': college_id}, [{'$set': {
+        'last_crawled': last_crawled,
+        'updated_at': datetime.utcnow(),
+        'change_rate': {'$add': [
+            {'$multiply': [{'$ifNull': ['$change_rate', change_ratio]}, 1 - CHANGE_RATE_WEIGHT]},
+            change_ratio * CHANGE_RATE_WEIGHT
+        ]}
+    }}])
+    
+    return result.modified_count > 0
+
+def get_colleges_due_for_crawl(db, sla_days, exclude_ids=None, limit=20):
+    """
+    Get active colleges whose last crawl is older than their freshness SLA
+    
+    Never-crawled colleges come first, then colleges whose pages changed most
+    often, then the most overdue.
+    
+    Args:
+        db: Database connection
+        sla_days: Dictionary of college type to SLA in days, with a 'DEFAULT' entry
+        exclude_ids: College IDs to leave out, e.g. those with a crawl in progress
+        limit: Maximum number of colleges to return
+        
+    Returns:
+        List of college documents with _id, name, type and last_crawled
+    """
+    collection = get_colleges_collection(db)
+    now = datetime.utcnow()
+    
+    # One branch per type with its own SLA, plus one for every other type
+    typed = [college_type for college_type in sla_days if college_type != 'DEFAULT']
+    stale = [
+        {'type': college_type, 'last_crawled': {'$lt': now - timedelta(days=sla_days[college_type])}}
+        for college_type in typed
+    ]
+    stale.append({'type': {'$nin': typed}, 'last_crawled': {'$lt': now - timedelta(days=sla_days['DEFAULT'])}})
+    stale.append({'last_crawled': None})
+    
+    query = {'status': 'active', '$or': stale}
+    if exclude_ids:
+        query['_id'] = {'$nin': list(exclude_ids)}
+    
+    projection = {'name': 1, 'type': 1, 'last_crawled': 1, 'change_rate': 1}
+    
+    # Never-crawled colleges have no change history to rank by
+    colleges = list(collection.find({**query, 'last_crawled': None}, projection).limit(limit))
+    if len(colleges) < limit:
+        query['last_crawled'] = {'$ne': None}
+        colleges += list(collection.find(query, projection).sort(
+            [('change_rate', DESCENDING), ('last_crawled', ASCENDING)]
+        ).limit(limit - len(colleges)))
+    
+    return colleges
 
 def delete_college(db, college_id):
     """
@@ -229,50 +444,157 @@ def delete_college(db, college_id):
     result = collection.delete_one({'_id': college_id})
     return result.deleted_count > 0
 
+def normalize_website(website):
+    """
+    Normalize a website URL to a key identifying the college
+    
+    Scheme, "www.", letter case and trailing slashes are ignored, so
+    "http://www.Example.edu/" and "example.edu" give the same key.
+    
+    Args:
+        website: College website URL
+        
+    Returns:
+        Normalized website key, or None if the website is empty
+    """
+    if not website:
+        return None
+    
+    key = website.strip().lower()
+    for prefix in ['https://', 'http://']:
+        if key.startswith(prefix):
+            key = key[len(prefix):]
+            break
+    if key.startswith('www.'):
+        key = key[4:]
+    
+    return key.rstrip('/') or None
+
+def backfill_website_keys(db, batch_size=1000):
+    """
+    Set website_key on colleges created before it was stored
+    
+    Colleges are updated in unordered batches. A college whose website
+    normalizes to the key of another college is a duplicate and keeps no key.
+    
+    Args:
+        db: Database connection
+        batch_size: Number of colleges updated per bulk operation
+        
+    Returns:
+        Tuple of (number of colleges updated, number of duplicates skipped)
+    """
+    collection = get_colleges_collection(db)
+    updated = 0
+    duplicates = 0
+    operations = []
+    
+    def flush(batch):
+        nonlocal updated, duplicates
+        try:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+        except BulkWriteError as e:
+            errors = e.details['writeErrors']
+            if any(error['code'] != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            updated += e.details['nModified']
+            duplicates += len(errors)
+    
+    for college in collection.find({'website_key': None}, {'website': 1}, batch_size=batch_size):
+        website_key = normalize_website(college.get('website'))
+        if not website_key:
+            continue
+    
+        operations.append(UpdateOne({'_id': college['_id']}, {'$set': {'website_key': website_key}}))
+        if len(operations) >= batch_size:
+            flush(operations)
+            operations = []
+    
+    if operations:
+        flush(operations)
+    
+    return updated, duplicates
+
 def bulk_import_colleges(db, colleges_data):
     """
-    Import multiple colleges at once
+    Import a batch of colleges, updating colleges that already exist
+    
+    Colleges are matched on their normalized website, so importing the same
+    file twice updates the existing colleges instead of duplicating them.
+    Only fields present in the input overwrite existing values.
     
     Args:
         db: Database connection
         colleges_data: List of college dictionaries
         
     Returns:
-        Number of colleges imported
+        Tuple of (number of colleges inserted, number of colleges updated)
     """
     collection = get_colleges_collection(db)
     
-    # Prepare documents for insertion
-    docs_to_insert = []
+    # Defaults for fields missing from the input, only applied to new colleges
+    defaults = {
+        "name": '',
+        "type": 'Engineering',
+        "state": '',
+        "location": {},
+        "contact_info": {},
+        "established_year": None,
+        "affiliations": [],
+        "accreditations": [],
+        "status": 'active'
+    }
+    
+    # Last occurrence wins when a website appears twice in the batch
+    operations = {}
     current_time = datetime.utcnow()
     
     for college in colleges_data:
+        website_key = normalize_website(college.get('website'))
+        if not website_key:
+            continue
+        
         # Normalize website - ensure it has http/https
-        website = college.get('website', '')
-        if website and not website.startswith(('http://', 'https://')):
+        website = college['website'].strip()
+        if not website.startswith(('http://', 'https://')):
             website = 'https://' + website
         
-        college_doc = {
-            "name": college.get('name', ''),
+        set_fields = {
             "website": website,
-            "type": college.get('type', 'Engineering'),
-            "state": college.get('state', ''),
-            "location": college.get('location', {}),
-            "contact_info": college.get('contact_info', {}),
-            "established_year": college.get('established_year'),
-            "affiliations": college.get('affiliations', []),
-            "accreditations": college.get('accreditations', []),
-            "last_crawled": None,
-            "status": college.get('status', 'active'),
-            "created_at": current_time,
+            "website_key": website_key,
             "updated_at": current_time
         }
-        docs_to_insert.append(college_doc)
-    
-    if docs_to_insert:
-        result = collection.insert_many(docs_to_insert)
-        return len(result.inserted_ids)
-    return 0
+        for field in defaults:
+            if college.get(field) not in (None, ''):
+                set_fields[field] = college[field]
+        
+        set_on_insert = {field: value for field, value in defaults.items() if field not in set_fields}
+        set_on_insert['last_crawled'] = None
+        set_on_insert['created_at'] = current_time
+        
+        operations[website_key] = UpdateOne(
+            {'website_key': website_key},
+            {'$set': set_fields, '$setOnInsert': set_on_insert},
+            upsert=True
+        )
+    
+    if not operations:
+        return 0, 0
+    
+    operations = list(operations.values())
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        return result.upserted_count, result.matched_count
+    except BulkWriteError as e:
+        errors = e.details['writeErrors']
+        if any(error['code'] != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+        
+        # A concurrent import inserted these websites first; retried, the
+        # upserts match the new colleges and update them
+        retried = collection.bulk_write([operations[error['index']] for error in errors], ordered=False)
+        return (e.details['nUpserted'] + retried.upserted_count,
+                e.details['nMatched'] + retried.matched_count)
 
 # Helper functions
 def get_states_list(db):
@@ -300,25 +622,27 @@ def get_summary_stats(db):
     """
     collection = get_colleges_collection(db)
     
-    # Total colleges
-    total_colleges = collection.count_documents({})
-    
-    # Colleges by type
-    engineering_colleges = collection.count_documents({'type': 'Engineering'})
-    medical_colleges = collection.count_documents({'type': 'Medical'})
-    
-    # Colleges with data
-    colleges_with_data = collection.count_documents({'last_crawled': {'$ne': None}})
-    
-    # Colleges by status
-    active_colleges = collection.count_documents({'status': 'active'})
-    inactive_colleges = collection.count_documents({'status': 'inactive'})
+    # Count everything in a single pass over the collection
+    pipeline = [
+        {'$group': {
+            '_id': None,
+            'total_colleges': {'$sum': 1},
+            'engineering_colleges': {'$sum': {'$cond': [{'$eq': ['$type', 'Engineering']}, 1, 0]}},
+            'medical_colleges': {'$sum': {'$cond': [{'$eq': ['$type', 'Medical']}, 1, 0]}},
+            'colleges_with_data': {'$sum': {'$cond': [{'$ne': [{'$ifNull': ['$last_crawled', None]}, None]}, 1, 0]}},
+            'active_colleges': {'$sum': {'$cond': [{'$eq': ['$status', 'active']}, 1, 0]}},
+            'inactive_colleges': {'$sum': {'$cond': [{'$eq': ['$status', 'inactive']}, 1, 0]}}
+        }}
+    ]
+    
+    result = list(collection.aggregate(pipeline))
+    counts = result[0] if result else {}
     
     return {
-        'total_colleges': total_colleges,
-        'engineering_colleges': engineering_colleges,
-        'medical_colleges': medical_colleges,
-        'colleges_with_data': colleges_with_data,
-        'active_colleges': active_colleges,
-        'inactive_colleges': inactive_colleges
+        'total_colleges': counts.get('total_colleges', 0),
+        'engineering_colleges': counts.get('engineering_colleges', 0),
+        'medical_colleges': counts.get('medical_colleges', 0),
+        'colleges_with_data': counts.get('colleges_with_data', 0),
+        'active_colleges': counts.get('active_colleges', 0),
+        'inactive_colleges': counts.get('inactive_colleges', 0)
     }
\ No newline at end of file
@@ -0,0 +1,380 @@
+"""
+Company model for canonical recruiting company records
+
+Company names extracted from placement and internship pages vary ("TCS",
+"Tata Consultancy Services", "TCS Ltd."). Each name is resolved to one
+company record, whose ID is stored on the embedded company entries.
+"""
+import re
+import time
+import difflib
+import threading
+from datetime import datetime
+from pymongo import ASCENDING, UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Known abbreviations and alternative names, as normalized alias -> canonical name
+COMPANY_ALIASES = {
+    'tcs': 'Tata Consultancy Services',
+    'tata consultancy': 'Tata Consultancy Services',
+    'infosys technologies': 'Infosys',
+    'wipro technologies': 'Wipro',
+    'hcl': 'HCL Technologies',
+    'hcl tech': 'HCL Technologies',
+    'hcltech': 'HCL Technologies',
+    'cts': 'Cognizant',
+    'cognizant technology solutions': 'Cognizant',
+    'international business machines': 'IBM',
+    'lt': 'Larsen & Toubro',
+    'l and t': 'Larsen & Toubro',
+    'larsen and toubro': 'Larsen & Toubro',
+    'lti': 'LTIMindtree',
+    'ltimindtree': 'LTIMindtree',
+    'l and t infotech': 'LTIMindtree',
+    'tech mahindra': 'Tech Mahindra',
+    'techm': 'Tech Mahindra',
+    'accenture solutions': 'Accenture',
+    'pwc': 'PwC',
+    'pricewaterhousecoopers': 'PwC',
+    'ey': 'EY',
+    'ernst and young': 'EY',
+    'amazon development centre': 'Amazon',
+    'jpmc': 'JPMorgan Chase',
+    'jp morgan': 'JPMorgan Chase',
+    'jpmorgan': 'JPMorgan Chase',
+    'goldman sachs': 'Goldman Sachs',
+    'mu sigma': 'Mu Sigma',
+    'zs': 'ZS Associates',
+    'bosch': 'Bosch',
+    'robert bosch': 'Bosch',
+    'maruti': 'Maruti Suzuki',
+    'reliance': 'Reliance Industries',
+    'ril': 'Reliance Industries',
+    'hul': 'Hindustan Unilever',
+    'hindustan unilever': 'Hindustan Unilever',
+    'itc': 'ITC',
+    'sbi': 'State Bank of India',
+    'icici': 'ICICI Bank',
+    'hdfc': 'HDFC Bank'
+}
+
+# Legal and filler words ignored when comparing names
+COMPANY_NAME_STOPWORDS = {
+    'ltd', 'limited', 'pvt', 'private', 'inc', 'incorporated', 'llp', 'llc',
+    'corp', 'corporation', 'co', 'company', 'plc', 'the', 'india', 'group'
+}
+
+# Minimum similarity (0-1) for a fuzzy match to an existing company
+COMPANY_MATCH_CUTOFF = 0.9
+
+# Seconds before the in-process name index is reloaded from the database
+COMPANY_INDEX_TTL = 300
+
+# Leading characters of an alias that fuzzy match candidates must share
+COMPANY_BLOCK_LENGTH = 3
+
+# In-process index used for fuzzy matching: normalized alias -> company ID,
+# and block key -> aliases starting with it. Writes hold the lock; alias
+# lists are replaced rather than changed, so readers can iterate them freely.
+company_index = {
+    'aliases': {},
+    'blocks': {},
+    'expires_at': 0
+}
+company_index_lock = threading.Lock()
+
+def create_indexes(db):
+    """Create indexes for the companies collection"""
+    db.companies.create_index([('normalized_name', ASCENDING)], unique=True)
+    db.companies.create_index([('aliases', ASCENDING)])
+    db.companies.create_index([('name', ASCENDING)])
+
+def get_companies_collection(db):
+    """Get the companies collection"""
+    return db.companies
+
+def normalize_company_name(name):
+    """
+    Normalize a company name for comparison
+    
+    Lowercases, turns "&" into "and", drops punctuation and legal or filler
+    words, so "Tata Consultancy Services Ltd." -> "tata consultancy services".
+    
+    Args:
+        name: Company name
+    
+    Returns:
+        Normalized name, or None if nothing is left
+    """
+    if not name or not isinstance(name, str):
+        return None
+    
+    text = name.lower().replace('&', ' and ')
+    text = re.sub(r'[^a-z0-9 ]+', ' ', text)
+    words = [word for word in text.split() if word not in COMPANY_NAME_STOPWORDS]
+    
+    # Keep the name if it only consisted of stopwords
+    if not words:
+        words = text.split()
+    
+    return ' '.join(words) or None
+
+def get_block_key(alias):
+    """Get the block an alias is filed under for fuzzy matching"""
+    return alias[:COMPANY_BLOCK_LENGTH]
+
+def get_company_index(db):
+    """
+    Get the in-process alias index, reloading it when it has expired
+    
+    Args:
+        db: Database connection
+    
+    Returns:
+        Dictionary with 'aliases' (normalized alias -> company ID) and
+        'blocks' (block key -> list of aliases)
+    """
+    now = time.time()
+    if now < company_index['expires_at']:
+        return company_index
+    
+    with company_index_lock:
+        if now >= company_index['expires_at']:
+            aliases = {}
+            blocks = {}
+            for company in get_companies_collection(db).find({}, {'aliases': 1}):
+                for alias in company.get('aliases', []):
+                    aliases[alias] = company['_id']
+                    blocks.setdefault(get_block_key(alias), []).append(alias)
+            
+            company_index['aliases'] = aliases
+            company_index['blocks'] = blocks
+            company_index['expires_at'] = now + COMPANY_INDEX_TTL
+    
+    return company_index
+
+def index_company_alias(alias, company_id):
+    """
+    Add an alias to the in-process index
+    
+    Args:
+        alias: Normalized alias
+        company_id: ID of the company
+    """
+    with company_index_lock:
+        company_index['aliases'][alias] = company_id
+        
+        block_key = get_block_key(alias)
+        block = company_index['blocks'].get(block_key, [])
+        if alias not in block:
+            company_index['blocks'][block_key] = block + [alias]
+
+def find_similar_company_id(db, key):
+    """
+    Find the company whose alias is closest to a normalized name
+    
+    Only aliases sharing the name's leading characters are compared, so
+    the cost doesn't grow with the number of known companies.
+    
+    Args:
+        db: Database connection
+        key: Normalized company name
+    
+    Returns:
+        Company ID, or None if no alias is similar enough
+    """
+    index = get_company_index(db)
+    candidates = index['blocks'].get(get_block_key(key), [])
+    
+    matches = difflib.get_close_matches(key, candidates, n=1, cutoff=COMPANY_MATCH_CUTOFF)
+    return index['aliases'].get(matches[0]) if matches else None
+
+def create_company(db, name, normalized_name):
+    """
+    Create a company, or return the existing one with the same normalized name
+    
+    Args:
+        db: Database connection
+        name: Canonical company name
+        normalized_name: Normalized company name
+    
+    Returns:
+        Company document with _id and name
+    """
+    collection = get_companies_collection(db)
+    now = datetime.utcnow()
+    
+    try:
+        company = collection.find_one_and_update(
+            {'normalized_name': normalized_name},
+            {
+                '$setOnInsert': {
+                    'name': name,
+                    'colleges': [],
+                    'internship_colleges': [],
+                    'created_at': now
+                },
+                '$addToSet': {'aliases': normalized_name},
+                '$set': {'updated_at': now}
+            },
+            projection={'name': 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another worker created it first
+        company = collection.find_one({'normalized_name': normalized_name}, {'name': 1})
+    
+    index_company_alias(normalized_name, company['_id'])
+    return company
+
+def resolve_companies(db, names):
+    """
+    Resolve company names to canonical companies
+    
+    Names are matched, in order, against the alias dictionary, stored
+    aliases and a fuzzy match on known names; names that still don't match
+    create a new company. Fuzzy matches are stored as aliases so the next
+    lookup is exact.
+    
+    Args:
+        db: Database connection
+        names: Iterable of company names as extracted
+    
+    Returns:
+        Dictionary mapping each resolvable name to (company ID, canonical name)
+    """
+    collection = get_companies_collection(db)
+    
+    # Normalized lookup key for each name, going through the alias dictionary.
+    # Names keep their input order, so a new company is always named after
+    # the first name that resolves to it.
+    keys = {}
+    for name in dict.fromkeys(names):
+        key = normalize_company_name(name)
+        if key:
+            canonical = COMPANY_ALIASES.get(key)
+            keys[name] = (normalize_company_name(canonical), canonical) if canonical else (key, name)
+    
+    if not keys:
+        return {}
+    
+    # Exact alias matches in one query
+    lookup = {key for key, _ in keys.values()}
+    companies_by_alias = {}
+    for company in collection.find({'aliases': {'$in': list(lookup)}}, {'name': 1, 'aliases': 1}):
+        for alias in company['aliases']:
+            companies_by_alias[alias] = company
+    
+    resolved = {}
+    new_aliases = []
+    for name, (key, canonical) in keys.items():
+        company = companies_by_alias.get(key)
+        
+        if not company:
+            # Fuzzy match against similar known aliases
+            company_id = find_similar_company_id(db, key)
+            if company_id:
+                company = collection.find_one({'_id': company_id}, {'name': 1})
+                if company:
+                    new_aliases.append(UpdateOne({'_id': company['_id']}, {'$addToSet': {'aliases': key}}))
+                    index_company_alias(key, company['_id'])
+        
+        if not company:
+            company = create_company(db, canonical.strip(), key)
+        
+        companies_by_alias[key] = company
+        resolved[name] = (company['_id'], company['name'])
+    
+    if new_aliases:
+        collection.bulk_write(new_aliases, ordered=False)
+    
+    return resolved
+
+def assign_company_ids(db, companies):
+    """
+    Set company_id and company_name on extracted company entries, in place
+    
+    Args:
+        db: Database connection
+        companies: List of company dictionaries with a 'name' field
+    
+    Returns:
+        The same list, with entries that have no usable name removed
+    """
+    resolved = resolve_companies(db, [company.get('name') for company in companies or [] if company.get('name')])
+    
+    assigned = []
+    for company in companies or []:
+        match = resolved.get(company.get('name'))
+        if match:
+            company['company_id'], company['company_name'] = match
+            assigned.append(company)
+    
+    companies[:] = assigned
+    return companies
+
+def add_company_colleges(db, company_ids, college_id, field='colleges'):
+    """
+    Record that companies recruited from a college
+    
+    Args:
+        db: Database connection
+        company_ids: Iterable of company IDs
+        college_id: ID of the college
+        field: 'colleges' for placements or 'internship_colleges' for internships
+    """
+    operations = [
+        UpdateOne({'_id': company_id}, {'$addToSet': {field: college_id}})
+        for company_id in set(company_ids)
+    ]
+    
+    if operations:
+        get_companies_collection(db).bulk_write(operations, ordered=False)
+
+def get_company_by_name(db, name):
+    """
+    Find the canonical company for a name without creating one
+    
+    Args:
+        db: Database connection
+        name: Company name
+    
+    Returns:
+        Company document or None
+    """
+    key = normalize_company_name(name)
+    if not key:
+        return None
+    
+    canonical = COMPANY_ALIASES.get(key)
+    if canonical:
+        key = normalize_company_name(canonical)
+    
+    company = get_companies_collection(db).find_one({'aliases': key})
+    if company:
+        return company
+    
+    company_id = find_similar_company_id(db, key)
+    if company_id:
+        return get_companies_collection(db).find_one({'_id': company_id})
+    
+    return None
+
+def get_colleges_for_company(db, name, internships=False):
+    """
+    Get the IDs of the colleges a company recruited from
+    
+    Args:
+        db: Database connection
+        name: Company name (any known alias)
+        internships: Return internship colleges instead of placement colleges
+    
+    Returns:
+        List of college IDs
+    """
+    company = get_company_by_name(db, name)
+    if not company:
+        return []
+    
+    return company.get('internship_colleges' if internships else 'colleges', [])
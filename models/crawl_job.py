@@ -5,6 +5,7 @@ from datetime import datetime
 import logging
 from bson import ObjectId
 from pymongo import ASCENDING, DESCENDING
+from models.projections import get_projection
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +21,7 @@ def create_indexes(db):
         db.crawl_jobs.create_index([('college_id', ASCENDING)])
         db.crawl_jobs.create_index([('status', ASCENDING)])
         db.crawl_jobs.create_index([('timestamps.started', DESCENDING)])
+        db.crawl_jobs.create_index([('timestamps.created', DESCENDING)])
         logger.info("Successfully created indexes for crawl_jobs collection")
     except Exception as e:
         logger.error(f"Error creating indexes for crawl_jobs: {str(e)}")
@@ -169,7 +171,8 @@ def update_crawl_job_status(db, job_id, status, current_url=None, error=None):
 def update_crawl_job_progress(db, job_id, pages_crawled=None, pages_processed=None, 
                              progress_percentage=None, current_url=None, 
                              admission_pages=None, placement_pages=None, 
-                             internship_pages=None, other_pages=None):
+                             internship_pages=None, other_pages=None, throttle=None,
+                             connections=None):
     """
     Update the progress of a crawl job
     
@@ -184,6 +187,8 @@ def update_crawl_job_progress(db, job_id, pages_crawled=None, pages_processed=No
         placement_pages: Number of placement pages found
         internship_pages: Number of internship pages found
         other_pages: Number of other pages found
+        throttle: List of per-host throttling statistics (delay, requests, errors, retries, latency)
+        connections: New connection statistics (opened, setup_time, avg_setup_time)
         
     Returns:
         True if update successful, False otherwise
@@ -224,6 +229,12 @@ def update_crawl_job_progress(db, job_id, pages_crawled=None, pages_processed=No
         if other_pages is not None:
             update_data['crawling_stats.other_pages'] = other_pages
         
+        if throttle is not None:
+            update_data['throttle'] = throttle
+        
+        if connections is not None:
+            update_data['connections'] = connections
+        
         # Only update if we have fields to update
         if update_data:
             result = collection.update_one(
@@ -240,13 +251,14 @@ def update_crawl_job_progress(db, job_id, pages_crawled=None, pages_processed=No
         logger.error(f"Error updating crawl job progress: {str(e)}", exc_info=True)
         return False
 
-def get_crawl_job_by_id(db, job_id):
+def get_crawl_job_by_id(db, job_id, fields=None):
     """
     Get a crawl job by ID
     
     Args:
         db: Database connection
         job_id: ID of the crawl job
+        fields: Named field set from models.projections (optional, full document by default)
         
     Returns:
         Crawl job document or None
@@ -263,7 +275,7 @@ def get_crawl_job_by_id(db, job_id):
                 logger.error(f"Invalid job_id format: {job_id}, error: {str(e)}")
                 return None
         
-        job = collection.find_one({'_id': job_id})
+        job = collection.find_one({'_id': job_id}, get_projection('crawl_jobs', fields))
         if job:
             logger.debug(f"Found job {job_id} with status: {job.get('status')}")
         else:
@@ -273,13 +285,14 @@ def get_crawl_job_by_id(db, job_id):
         logger.error(f"Error getting crawl job: {str(e)}", exc_info=True)
         return None
 
-def get_active_crawl_job_for_college(db, college_id):
+def get_active_crawl_job_for_college(db, college_id, fields=None):
     """
     Get an active (queued or running) crawl job for a college
     
     Args:
         db: Database connection
         college_id: ID of the college
+        fields: Named field set from models.projections (optional, full document by default)
         
     Returns:
         Crawl job document or None
@@ -295,7 +308,7 @@ def get_active_crawl_job_for_college(db, college_id):
         job = collection.find_one({
             'college_id': college_id,
             'status': {'$in': ['queued', 'running']}
-        })
+        }, get_projection('crawl_jobs', fields))
         
         if job:
             logger.debug(f"Found active job {job['_id']} for college {college_id}, status: {job['status']}")
@@ -307,6 +320,47 @@ def get_active_crawl_job_for_college(db, college_id):
         logger.error(f"Error getting active crawl job: {str(e)}", exc_info=True)
         return None
 
+def get_active_crawl_college_ids(db):
+    """
+    Get the IDs of colleges with an active (queued or running) crawl job
+    
+    Args:
+        db: Database connection
+        
+    Returns:
+        List of college IDs
+    """
+    try:
+        collection = get_crawl_jobs_collection(db)
+        return collection.distinct('college_id', {'status': {'$in': ['queued', 'running']}})
+    except Exception as e:
+        logger.error(f"Error getting active crawl colleges: {str(e)}", exc_info=True)
+        return []
+
+def count_crawl_jobs_created_since(db, since, triggered_by=None):
+    """
+    Count crawl jobs created since a timestamp
+    
+    Args:
+        db: Database connection
+        since: Datetime to count from
+        triggered_by: Filter by who triggered the jobs, e.g. 'system' (optional)
+        
+    Returns:
+        Count of matching crawl jobs
+    """
+    try:
+        collection = get_crawl_jobs_collection(db)
+        
+        query = {'timestamps.created': {'$gte': since}}
+        if triggered_by:
+            query['triggered_by'] = triggered_by
+        
+        return collection.count_documents(query)
+    except Exception as e:
+        logger.error(f"Error counting recent crawl jobs: {str(e)}", exc_info=True)
+        return 0
+
 def get_crawl_jobs_for_college(db, college_id, skip=0, limit=20):
     """
     Get crawl jobs for a specific college with pagination
@@ -459,30 +513,32 @@ def get_crawl_job_stats(db):
         logger.debug("Getting crawl job statistics")
         collection = get_crawl_jobs_collection(db)
         
-        # Count jobs by status
-        queued_jobs = collection.count_documents({'status': 'queued'})
-        running_jobs = collection.count_documents({'status': 'running'})
-        completed_jobs = collection.count_documents({'status': 'completed'})
-        failed_jobs = collection.count_documents({'status': 'failed'})
-        
-        logger.debug(f"Job counts - Queued: {queued_jobs}, Running: {running_jobs}, " +
-                   f"Completed: {completed_jobs}, Failed: {failed_jobs}")
-        
-        # Get average duration of completed jobs
+        # Count jobs by status and average completed jobs in a single pass
+        is_completed = {'$eq': ['$status', 'completed']}
         pipeline = [
-            {'$match': {'status': 'completed', 'duration_seconds': {'$ne': None}}},
-            {'$group': {'_id': None, 'avg_duration': {'$avg': '$duration_seconds'}}}
+            {'$group': {
+                '_id': None,
+                'queued_jobs': {'$sum': {'$cond': [{'$eq': ['$status', 'queued']}, 1, 0]}},
+                'running_jobs': {'$sum': {'$cond': [{'$eq': ['$status', 'running']}, 1, 0]}},
+                'completed_jobs': {'$sum': {'$cond': [is_completed, 1, 0]}},
+                'failed_jobs': {'$sum': {'$cond': [{'$eq': ['$status', 'failed']}, 1, 0]}},
+                # $avg ignores the nulls produced for non-completed jobs
+                'avg_duration': {'$avg': {'$cond': [is_completed, '$duration_seconds', None]}},
+                'avg_pages': {'$avg': {'$cond': [is_completed, '$pages_crawled', None]}}
+            }}
         ]
-        duration_result = list(collection.aggregate(pipeline))
-        avg_duration = duration_result[0]['avg_duration'] if duration_result else None
+        result = list(collection.aggregate(pipeline))
+        counts = result[0] if result else {}
         
-        # Get average number of pages per job
-        pipeline = [
-            {'$match': {'status': 'completed'}},
-            {'$group': {'_id': None, 'avg_pages': {'$avg': '$pages_crawled'}}}
-        ]
-        pages_result = list(collection.aggregate(pipeline))
-        avg_pages = pages_result[0]['avg_pages'] if pages_result else None
+        queued_jobs = counts.get('queued_jobs', 0)
+        running_jobs = counts.get('running_jobs', 0)
+        completed_jobs = counts.get('completed_jobs', 0)
+        failed_jobs = counts.get('failed_jobs', 0)
+        avg_duration = counts.get('avg_duration')
+        avg_pages = counts.get('avg_pages')
+        
+        logger.debug(f"Job counts - Queued: {queued_jobs}, Running: {running_jobs}, " +
+                   f"Completed: {completed_jobs}, Failed: {failed_jobs}")
         
         stats = {
             'queued_jobs': queued_jobs,
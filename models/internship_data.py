@@ -2,8 +2,23 @@
 Internship data model for storing structured internship information
 """
 from datetime import datetime
+import logging
 from bson import ObjectId
 from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+from models.normalization import INTERNSHIP_FIELDS, normalize_fields, normalize_items
+from models.merge import (
+    compact_item, prepare_items, merge_array_expression, merge_object_expression,
+    union_expression, upsert_merge
+)
+from models.company import assign_company_ids, add_company_colleges, get_company_by_name
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
 def create_indexes(db):
     """Create indexes for the internship_data collection"""
@@ -11,6 +26,31 @@ def create_indexes(db):
     db.internship_data.create_index([('academic_year', ASCENDING)])
     db.internship_data.create_index([('last_updated', DESCENDING)])
     db.internship_data.create_index([('internship_companies.name', TEXT)])
+    db.internship_data.create_index([('internship_companies.stipend_inr_pm', DESCENDING)])
+    db.internship_data.create_index([('internship_companies.company_id', ASCENDING)])
+    # One document per college and year, so concurrent merges can't insert duplicates
+    try:
+        db.internship_data.create_index([('college_id', ASCENDING), ('academic_year', ASCENDING)], unique=True)
+    except OperationFailure as e:
+        logger.warning(f"Could not create unique internship_data index, remove duplicate documents first: {str(e)}")
+
+def normalize_internship_data(data):
+    """
+    Add canonical numeric fields (stipends in INR per month, percentages,
+    counts) to the internship fields of a document or update, in place
+    
+    Args:
+        data: Dictionary that may contain overall_statistics,
+            department_statistics and internship_companies
+            
+    Returns:
+        The same dictionary
+    """
+    if data.get('overall_statistics'):
+        normalize_fields(data['overall_statistics'], INTERNSHIP_FIELDS)
+    normalize_items(data.get('department_statistics'), INTERNSHIP_FIELDS)
+    normalize_items(data.get('internship_companies'), INTERNSHIP_FIELDS)
+    return data
 
 def get_internship_data_collection(db):
     """Get the internship_data collection"""
@@ -21,6 +61,11 @@ def store_internship_data(db, college_id, source_urls, academic_year, overall_st
     """
     Store structured internship data
     
+    New data is merged into the college's document for the academic year on
+    the server in a single upsert: departments are merged by name and
+    companies by canonical company, so concurrent workers never lose each
+    other's updates.
+    
     Args:
         db: Database connection
         college_id: ID of the college
@@ -31,7 +76,7 @@ def store_internship_data(db, college_id, source_urls, academic_year, overall_st
         internship_companies: List of company information
         
     Returns:
-        Inserted document ID
+        Inserted or updated document ID
     """
     collection = get_internship_data_collection(db)
     
@@ -39,95 +84,42 @@ def store_internship_data(db, college_id, source_urls, academic_year, overall_st
     if isinstance(college_id, str):
         college_id = ObjectId(college_id)
     
-    # Check if internship data already exists for this college and academic year
-    existing_data = collection.find_one({
-        'college_id': college_id,
-        'academic_year': academic_year
+    # Drop empty values so they don't overwrite stored ones, then add numeric fields
+    incoming = normalize_internship_data({
+        'overall_statistics': compact_item(overall_statistics or {}),
+        'department_statistics': prepare_items(department_statistics, 'department'),
+        'internship_companies': prepare_items(internship_companies, 'name')
     })
     
-    if existing_data:
-        # Update existing document
-        update_data = {
-            'source_urls': list(set(existing_data.get('source_urls', []) + source_urls)),
-            'last_updated': datetime.utcnow()
-        }
-        
-        # Update overall statistics if provided
-        if overall_statistics:
-            # Merge with existing statistics
-            existing_stats = existing_data.get('overall_statistics', {})
-            merged_stats = existing_stats.copy()
-            merged_stats.update(overall_statistics)
-            update_data['overall_statistics'] = merged_stats
-        
-        # Update department statistics if provided
-        if department_statistics:
-            # Create a dictionary of department stats by department name
-            existing_depts = existing_data.get('department_statistics', [])
-            dept_dict = {
-                dept.get('department', ''): dept 
-                for dept in existing_depts 
-                if dept.get('department')
-            }
-            
-            for dept in department_statistics:
-                dept_name = dept.get('department', '')
-                if dept_name in dept_dict:
-                    # Update existing department stats
-                    merged_dept = dept_dict[dept_name].copy()
-                    merged_dept.update({k: v for k, v in dept.items() if v})
-                    dept_dict[dept_name] = merged_dept
-                else:
-                    # Add new department stats
-                    dept_dict[dept_name] = dept
-            
-            update_data['department_statistics'] = list(dept_dict.values())
-        
-        # Update internship companies if provided
-        if internship_companies:
-            # Create a dictionary of companies by name
-            existing_companies = existing_data.get('internship_companies', [])
-            company_dict = {
-                company.get('name', ''): company 
-                for company in existing_companies 
-                if company.get('name')
-            }
-            
-            for company in internship_companies:
-                company_name = company.get('name', '')
-                if company_name in company_dict:
-                    # Update existing company info
-                    merged_company = company_dict[company_name].copy()
-                    merged_company.update({k: v for k, v in company.items() if v})
-                    company_dict[company_name] = merged_company
-                else:
-                    # Add new company
-                    company_dict[company_name] = company
-            
-            update_data['internship_companies'] = list(company_dict.values())
-        
-        # Update document
-        collection.update_one(
-            {'_id': existing_data['_id']},
-            {'$set': update_data}
-        )
-        
-        return existing_data['_id']
-    else:
-        # Create new document
-        internship_doc = {
-            'college_id': college_id,
-            'source_urls': source_urls,
-            'academic_year': academic_year,
-            'overall_statistics': overall_statistics or {},
-            'department_statistics': department_statistics or [],
-            'internship_companies': internship_companies or [],
-            'created_at': datetime.utcnow(),
-            'last_updated': datetime.utcnow()
-        }
-        
-        result = collection.insert_one(internship_doc)
-        return result.inserted_id
+    # Resolve company names, then merge spellings of the same company
+    assign_company_ids(db, incoming['internship_companies'])
+    incoming['internship_companies'] = prepare_items(incoming['internship_companies'], 'company_id')
+    
+    now = datetime.utcnow()
+    merge_fields = {
+        'source_urls': union_expression('source_urls', source_urls),
+        'overall_statistics': merge_object_expression('overall_statistics', incoming['overall_statistics']),
+        'department_statistics': merge_array_expression(
+            'department_statistics', incoming['department_statistics'], 'department'
+        ),
+        'internship_companies': merge_array_expression(
+            'internship_companies', incoming['internship_companies'], 'company_id'
+        ),
+        'created_at': {'$ifNull': ['$created_at', now]},
+        'last_updated': now
+    }
+    
+    merged = upsert_merge(
+        collection, {'college_id': college_id, 'academic_year': academic_year},
+        merge_fields, {'_id': 1}
+    )
+    
+    add_company_colleges(
+        db, [company['company_id'] for company in incoming['internship_companies']],
+        college_id, 'internship_colleges'
+    )
+    
+    return merged['_id']
 
 def get_internship_data_by_college(db, college_id, academic_year=None):
     """
@@ -254,6 +246,9 @@ def search_company_internships(db, company_name, skip=0, limit=20):
     """
     Search for colleges where a specific company offered internships
     
+    The name is resolved to its canonical company and looked up by ID;
+    names that match no company fall back to a text search.
+    
     Args:
         db: Database connection
         company_name: Name of the company
@@ -265,6 +260,13 @@ def search_company_internships(db, company_name, skip=0, limit=20):
     """
     collection = get_internship_data_collection(db)
     
+    company = get_company_by_name(db, company_name)
+    if company:
+        cursor = collection.find(
+            {'internship_companies.company_id': company['_id']}
+        ).sort([('academic_year', DESCENDING)]).skip(skip).limit(limit)
+        return list(cursor)
+    
     # Use text search on company name
     cursor = collection.find(
         {'$text': {'$search': company_name}},
@@ -342,8 +344,8 @@ def get_internship_stats_by_year(db, academic_years=None, top_n=5):
         {'$match': match_stage} if match_stage else {'$match': {}},
         {'$group': {
             '_id': '$academic_year',
-            'avg_internship_participation': {'$avg': '$overall_statistics.participation'},
-            'avg_stipend': {'$avg': '$overall_statistics.avg_stipend'},
+            'avg_internship_participation': {'$avg': '$overall_statistics.participation_pct'},
+            'avg_stipend': {'$avg': '$overall_statistics.avg_stipend_inr_pm'},
             'college_count': {'$sum': 1},
             'companies': {'$push': '$internship_companies'}
         }},
@@ -362,10 +364,10 @@ def get_internship_stats_by_year(db, academic_years=None, top_n=5):
         for company_list in item['companies']:
             all_companies.extend(company_list)
         
-        # Count companies by name
+        # Count companies by canonical name
         company_counts = {}
         for company in all_companies:
-            name = company.get('name', '')
+            name = company.get('company_name') or company.get('name', '')
             if name:
                 company_counts[name] = company_counts.get(name, 0) + 1
         
@@ -401,19 +403,22 @@ def get_top_internship_companies(db, limit=20):
     # Aggregate pipeline
     pipeline = [
         {'$unwind': '$internship_companies'},
+        {'$match': {'internship_companies.name': {'$nin': [None, '']}}},
+        # Group spellings of the same company; entries stored before
+        # canonicalization fall back to their name
         {'$group': {
-            '_id': '$internship_companies.name',
+            '_id': {'$ifNull': ['$internship_companies.company_id', '$internship_companies.name']},
+            'name': {'$first': {'$ifNull': ['$internship_companies.company_name', '$internship_companies.name']}},
             'count': {'$sum': 1},
-            'avg_stipend': {'$avg': '$internship_companies.stipend'}
+            'avg_stipend': {'$avg': '$internship_companies.stipend_inr_pm'}
         }},
-        {'$match': {'_id': {'$ne': None, '$ne': ''}}},
         {'$sort': {'count': -1}},
         {'$limit': limit}
     ]
     
     result = collection.aggregate(pipeline)
     
-    return [{'name': item['_id'], 'count': item['count'], 'avg_stipend': item['avg_stipend']} 
+    return [{'name': item['name'], 'count': item['count'], 'avg_stipend': item['avg_stipend']} 
             for item in result]
 
 def get_department_internship_performance(db):
@@ -433,8 +438,8 @@ def get_department_internship_performance(db):
         {'$unwind': '$department_statistics'},
         {'$group': {
             '_id': '$department_statistics.department',
-            'avg_participation': {'$avg': '$department_statistics.participation'},
-            'avg_stipend': {'$avg': '$department_statistics.avg_stipend'},
+            'avg_participation': {'$avg': '$department_statistics.participation_pct'},
+            'avg_stipend': {'$avg': '$department_statistics.avg_stipend_inr_pm'},
             'college_count': {'$sum': 1}
         }},
         {'$match': {'_id': {'$ne': None, '$ne': ''}}},
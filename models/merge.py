@@ -0,0 +1,141 @@
+"""
+Server-side merge helpers for structured data documents
+
+Extracted data is merged into existing documents with a single upsert
+whose update is an aggregation pipeline, so concurrent AI workers storing
+data for the same college never overwrite each other's changes.
+"""
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+def compact_item(item):
+    """
+    Drop empty values from an extracted item so they don't overwrite stored ones
+    
+    Args:
+        item: Dictionary of extracted values
+    
+    Returns:
+        Dictionary without None or empty string values
+    """
+    return {key: value for key, value in item.items() if value is not None and value != ''}
+
+def prepare_items(items, key):
+    """
+    Prepare extracted items for merging by key
+    
+    Empty values are dropped, items without a key are skipped and the last
+    item wins when a key appears twice.
+    
+    Args:
+        items: List of extracted item dictionaries
+        key: Field identifying an item
+    
+    Returns:
+        List of item dictionaries
+    """
+    prepared = {}
+    for item in items or []:
+        if isinstance(item, dict) and item.get(key):
+            prepared[item[key]] = compact_item(item)
+    return list(prepared.values())
+
+def merge_array_expression(field, incoming, key):
+    """
+    Build an expression merging incoming items into an array field by key
+    
+    Stored items whose key matches an incoming item get the incoming values
+    merged over them; incoming items with new keys are appended.
+    
+    Args:
+        field: Name of the array field
+        incoming: List of incoming item dictionaries
+        key: Field identifying an item (e.g. 'name' or 'department')
+    
+    Returns:
+        Aggregation expression
+    """
+    return {'$let': {
+        'vars': {
+            'stored': {'$ifNull': [f'${field}', []]},
+            'incoming': {'$literal': incoming or []}
+        },
+        'in': {'$concatArrays': [
+            {'$map': {
+                'input': '$$stored',
+                'as': 'item',
+                'in': {'$mergeObjects': [
+                    '$$item',
+                    {'$arrayElemAt': [
+                        {'$filter': {
+                            'input': '$$incoming',
+                            'as': 'new',
+                            'cond': {'$eq': [f'$$new.{key}', f'$$item.{key}']}
+                        }},
+                        -1
+                    ]}
+                ]}
+            }},
+            {'$filter': {
+                'input': '$$incoming',
+                'as': 'new',
+                'cond': {'$not': [{'$in': [f'$$new.{key}', f'$$stored.{key}']}]}
+            }}
+        ]}
+    }}
+
+def merge_object_expression(field, incoming):
+    """
+    Build an expression merging incoming values over an object field
+    
+    Args:
+        field: Name of the object field
+        incoming: Dictionary of incoming values
+    
+    Returns:
+        Aggregation expression
+    """
+    return {'$mergeObjects': [{'$ifNull': [f'${field}', {}]}, {'$literal': incoming or {}}]}
+
+def union_expression(field, incoming):
+    """
+    Build an expression adding incoming values to an array field as a set
+    
+    Args:
+        field: Name of the array field
+        incoming: List of incoming values
+    
+    Returns:
+        Aggregation expression
+    """
+    return {'$setUnion': [{'$ifNull': [f'${field}', []]}, {'$literal': incoming or []}]}
+
+def upsert_merge(collection, query, merge_fields, projection=None):
+    """
+    Merge fields into the document matching a query, creating it if needed
+    
+    The whole merge runs on the server in one round trip. A unique index on
+    the query fields makes concurrent first inserts safe: the loser of the
+    race retries and merges into the winner's document.
+    
+    Args:
+        collection: MongoDB collection
+        query: Query identifying the document (equality on its key fields)
+        merge_fields: Dictionary of field name to aggregation expression
+        projection: Fields of the merged document to return (optional)
+    
+    Returns:
+        The merged document
+    """
+    pipeline = [{'$set': merge_fields}]
+    
+    try:
+        return collection.find_one_and_update(
+            query, pipeline, projection=projection,
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        return collection.find_one_and_update(
+            query, pipeline, projection=projection,
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
@@ -0,0 +1,215 @@
+"""
+Normalization of extracted numeric values (packages, stipends, fees,
+percentages and counts) into canonical numeric fields
+
+Extracted values are free text such as "12 LPA", "Rs. 4.5 lakh" or
+"85%". Each known field gets a numeric sibling with a unit suffix, e.g.
+average_package -> average_package_lpa, so aggregations can run on numbers.
+"""
+import re
+
+# Unit suffix of the numeric field added for each kind of value
+KIND_SUFFIXES = {
+    'package': '_lpa',      # Annual package in lakhs (INR) per annum
+    'stipend': '_inr_pm',   # Stipend in INR per month
+    'fee': '_inr',          # Fee in INR
+    'percent': '_pct',      # Percentage (0-100)
+    'count': '_num'         # Count of students, seats, etc.
+}
+
+# Kind of value stored in each extracted field
+PLACEMENT_FIELDS = {
+    'eligible_students': 'count',
+    'students_placed': 'count',
+    'students_hired': 'count',
+    'placement_percentage': 'percent',
+    'highest_package': 'package',
+    'average_package': 'package',
+    'avg_package': 'package',
+    'lowest_package': 'package',
+    'package_offered': 'package'
+}
+
+INTERNSHIP_FIELDS = {
+    'internships': 'count',
+    'students_hired': 'count',
+    'participation': 'percent',
+    'avg_stipend': 'stipend',
+    'stipend': 'stipend'
+}
+
+ADMISSION_FIELDS = {
+    'seats': 'count',
+    'tuition': 'fee',
+    'development': 'fee',
+    'other': 'fee',
+    'fee': 'fee'
+}
+
+# Multipliers for amount units, matched as whole words (digits may touch them, as in "50k")
+AMOUNT_UNITS = [
+    (re.compile(r'(?<![a-z])(crores?|cr)(?![a-z])'), 1e7),
+    (re.compile(r'(?<![a-z])(lakhs?|lacs?|lpa|l)(?![a-z])'), 1e5),
+    (re.compile(r'(?<![a-z])(millions?|mn)(?![a-z])'), 1e6),
+    (re.compile(r'(?<![a-z])(thousands?|k)(?![a-z])'), 1e3)
+]
+
+MONTHLY_PATTERN = re.compile(r'(per\s*month|/\s*month|/\s*mo(?![a-z])|(?<![a-z])p\.?\s*m(?![a-z])|monthly)')
+ANNUAL_PATTERN = re.compile(r'(per\s*annum|per\s*year|/\s*year|/\s*yr(?![a-z])|(?<![a-z])p\.?\s*a(?![a-z])|(?<![a-z])lpa(?![a-z])|annual|yearly)')
+FOREIGN_CURRENCY_PATTERN = re.compile(r'(\$|usd|€|eur|£|gbp)')
+# INR prefixes, removed before numbers are matched so the dot in "Rs.4.5" isn't read as a decimal point
+CURRENCY_PREFIX_PATTERN = re.compile(r'(?<![a-z])(rs\.?|inr|₹)\s*')
+# Numbers, or decimals without a leading zero (".5") when not attached to a word
+NUMBER_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?|(?<![\w.])\.\d+')
+RANGE_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(?:-|–|to)\s*(\d[\d,]*(?:\.\d+)?)')
+
+def parse_number(text):
+    """
+    Parse the number in a piece of text, using the midpoint of ranges
+    
+    Args:
+        text: Lowercase text
+    
+    Returns:
+        Float value or None
+    """
+    text = CURRENCY_PREFIX_PATTERN.sub(' ', text)
+    
+    range_match = RANGE_PATTERN.search(text)
+    if range_match:
+        low, high = (float(group.replace(',', '')) for group in range_match.groups())
+        return (low + high) / 2
+    
+    match = NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+    
+    try:
+        return float(match.group().replace(',', ''))
+    except ValueError:
+        return None
+
+def parse_amount(text):
+    """
+    Parse an INR amount with an optional unit and period
+    
+    Args:
+        text: Lowercase text
+    
+    Returns:
+        Tuple of (amount in INR or None, unit multiplier found or None,
+        period as 'month', 'year' or None)
+    """
+    if FOREIGN_CURRENCY_PATTERN.search(text):
+        # No exchange rate to convert with
+        return None, None, None
+    
+    number = parse_number(text)
+    if number is None:
+        return None, None, None
+    
+    multiplier = None
+    for pattern, unit in AMOUNT_UNITS:
+        if pattern.search(text):
+            multiplier = unit
+            break
+    
+    period = None
+    if MONTHLY_PATTERN.search(text):
+        period = 'month'
+    elif ANNUAL_PATTERN.search(text):
+        period = 'year'
+    
+    return number * (multiplier or 1), multiplier, period
+
+def normalize_value(value, kind):
+    """
+    Convert an extracted value to its canonical number
+    
+    Args:
+        value: Extracted value (string or number)
+        kind: Kind of value ('package', 'stipend', 'fee', 'percent' or 'count')
+    
+    Returns:
+        Number in the canonical unit for the kind, or None if it can't be parsed
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    
+    if isinstance(value, (int, float)):
+        text = str(value)
+    elif isinstance(value, str):
+        text = value.strip().lower()
+    else:
+        return None
+    
+    if not text:
+        return None
+    
+    if kind == 'percent':
+        number = parse_number(text)
+        return number if number is not None and 0 <= number <= 100 else None
+    
+    if kind == 'count':
+        number = parse_number(text)
+        return int(number) if number is not None else None
+    
+    amount, multiplier, period = parse_amount(text)
+    if amount is None:
+        return None
+    
+    if kind == 'package':
+        if multiplier is None and period != 'month' and amount < 1000:
+            # A bare small number is already in lakhs per annum
+            return round(amount, 2)
+        if period == 'month':
+            amount *= 12
+        return round(amount / 1e5, 2)
+    
+    if kind == 'stipend':
+        if period == 'year':
+            amount /= 12
+        return round(amount, 2)
+    
+    # Fees
+    return round(amount, 2)
+
+def normalize_fields(data, fields):
+    """
+    Add canonical numeric fields to a dictionary of extracted values, in place
+    
+    Nested dictionaries are normalized too, so e.g. a course's fee_structure
+    and a department's statistics get their numeric fields.
+    
+    Args:
+        data: Dictionary of extracted values
+        fields: Mapping of field name to kind of value
+    
+    Returns:
+        The same dictionary
+    """
+    if not isinstance(data, dict):
+        return data
+    
+    for field, value in list(data.items()):
+        if isinstance(value, dict):
+            normalize_fields(value, fields)
+        elif field in fields:
+            data[field + KIND_SUFFIXES[fields[field]]] = normalize_value(value, fields[field])
+    
+    return data
+
+def normalize_items(items, fields):
+    """
+    Add canonical numeric fields to every dictionary in a list, in place
+    
+    Args:
+        items: List of dictionaries of extracted values
+        fields: Mapping of field name to kind of value
+    
+    Returns:
+        The same list
+    """
+    for item in items or []:
+        normalize_fields(item, fields)
+    return items
@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination helpers shared by the models
+"""
+import base64
+from bson import json_util
+
+def encode_cursor(sort_value, doc_id):
+    """
+    Encode the position after a document as an opaque cursor string
+
+    Args:
+        sort_value: Value of the sort field in the last document of the page
+        doc_id: _id of the last document of the page
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json_util.dumps([sort_value, doc_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by encode_cursor
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        Tuple of (sort value, document ID), or None if the cursor is invalid
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        sort_value, doc_id = json_util.loads(payload)
+        return sort_value, doc_id
+    except Exception:
+        return None
+
+def get_nested_value(doc, field):
+    """
+    Get a possibly dotted field from a document
+
+    Args:
+        doc: Document dictionary
+        field: Field name, e.g. 'timestamps.created'
+
+    Returns:
+        Field value or None
+    """
+    value = doc
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def build_keyset_query(sort_by, sort_order, cursor):
+    """
+    Build the filter that selects documents after a cursor position
+
+    Documents are ordered by (sort_by, _id) in sort_order. Null or missing
+    sort values sort before everything else ascending and after everything
+    else descending, matching MongoDB's sort order.
+
+    Args:
+        sort_by: Field to sort by
+        sort_order: Sort order (1 for ascending, -1 for descending)
+        cursor: Cursor string
+
+    Returns:
+        Query dictionary, or None if the cursor is invalid
+    """
+    position = decode_cursor(cursor)
+    if position is None:
+        return None
+
+    last_value, last_id = position
+    id_op = '$gt' if sort_order == 1 else '$lt'
+
+    if last_value is None:
+        if sort_order == 1:
+            return {'$or': [
+                {sort_by: None, '_id': {id_op: last_id}},
+                {sort_by: {'$ne': None}}
+            ]}
+        return {sort_by: None, '_id': {id_op: last_id}}
+
+    conditions = [
+        {sort_by: {id_op: last_value}},
+        {sort_by: last_value, '_id': {id_op: last_id}}
+    ]
+    if sort_order != 1:
+        conditions.append({sort_by: None})
+
+    return {'$or': conditions}
+
+def split_page(docs, sort_by, limit):
+    """
+    Split a page fetched with limit + 1 documents into the page and its next cursor
+
+    Args:
+        docs: Documents fetched with a limit of limit + 1
+        sort_by: Field the page is sorted by
+        limit: Page size
+
+    Returns:
+        Tuple of (page documents, next cursor or None if this is the last page)
+    """
+    if len(docs) <= limit:
+        return docs, None
+
+    page = docs[:limit]
+    last_doc = page[-1]
+    return page, encode_cursor(get_nested_value(last_doc, sort_by), last_doc['_id'])
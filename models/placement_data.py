@@ -2,8 +2,27 @@
 Placement data model for storing structured placement information
 """
 from datetime import datetime
+import logging
 from bson import ObjectId
-from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo import ASCENDING, DESCENDING, TEXT, ReturnDocument
+from pymongo.errors import OperationFailure
+from models.normalization import PLACEMENT_FIELDS, normalize_fields, normalize_items
+from models.merge import (
+    compact_item, prepare_items, merge_array_expression, merge_object_expression,
+    union_expression, upsert_merge
+)
+from models.company import assign_company_ids, add_company_colleges, get_company_by_name
+from models.placement_rollup import (
+    YEAR_ROLLUPS, COMPANY_ROLLUPS, DEPARTMENT_ROLLUPS, ROLLUP_KEY_PROJECTION,
+    refresh_placement_rollups
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
 def create_indexes(db):
     """Create indexes for the placement_data collection"""
@@ -11,6 +30,34 @@ def create_indexes(db):
     db.placement_data.create_index([('academic_year', ASCENDING)])
     db.placement_data.create_index([('last_updated', DESCENDING)])
     db.placement_data.create_index([('recruiting_companies.name', TEXT)])
+    db.placement_data.create_index([('academic_year', ASCENDING), ('overall_statistics.average_package_lpa', DESCENDING)])
+    db.placement_data.create_index([('recruiting_companies.package_offered_lpa', DESCENDING)])
+    # Used to recompute the rollups of a company or department and to find a company's colleges
+    db.placement_data.create_index([('recruiting_companies.company_id', ASCENDING)])
+    db.placement_data.create_index([('department_statistics.department', ASCENDING)])
+    # One document per college and year, so concurrent merges can't insert duplicates
+    try:
+        db.placement_data.create_index([('college_id', ASCENDING), ('academic_year', ASCENDING)], unique=True)
+    except OperationFailure as e:
+        logger.warning(f"Could not create unique placement_data index, remove duplicate documents first: {str(e)}")
+
+def normalize_placement_data(data):
+    """
+    Add canonical numeric fields (packages in LPA, percentages, counts)
+    to the placement fields of a document or update, in place
+    
+    Args:
+        data: Dictionary that may contain overall_statistics,
+            department_statistics and recruiting_companies
+            
+    Returns:
+        The same dictionary
+    """
+    if data.get('overall_statistics'):
+        normalize_fields(data['overall_statistics'], PLACEMENT_FIELDS)
+    normalize_items(data.get('department_statistics'), PLACEMENT_FIELDS)
+    normalize_items(data.get('recruiting_companies'), PLACEMENT_FIELDS)
+    return data
 
 def get_placement_data_collection(db):
     """Get the placement_data collection"""
@@ -21,6 +68,11 @@ def store_placement_data(db, college_id, source_urls, academic_year, overall_sta
     """
     Store structured placement data
     
+    New data is merged into the college's document for the academic year on
+    the server in a single upsert: departments are merged by name and
+    companies by canonical company, so concurrent workers never lose each
+    other's updates.
+    
     Args:
         db: Database connection
         college_id: ID of the college
@@ -32,7 +84,7 @@ def store_placement_data(db, college_id, source_urls, academic_year, overall_sta
         placement_charts: List of charts data
         
     Returns:
-        Inserted document ID
+        Inserted or updated document ID
     """
     collection = get_placement_data_collection(db)
     
@@ -40,100 +92,41 @@ def store_placement_data(db, college_id, source_urls, academic_year, overall_sta
     if isinstance(college_id, str):
         college_id = ObjectId(college_id)
     
-    # Check if placement data already exists for this college and academic year
-    existing_data = collection.find_one({
-        'college_id': college_id,
-        'academic_year': academic_year
+    # Drop empty values so they don't overwrite stored ones, then add numeric fields
+    incoming = normalize_placement_data({
+        'overall_statistics': compact_item(overall_statistics or {}),
+        'department_statistics': prepare_items(department_statistics, 'department'),
+        'recruiting_companies': prepare_items(recruiting_companies, 'name')
     })
     
-    if existing_data:
-        # Update existing document
-        update_data = {
-            'source_urls': list(set(existing_data.get('source_urls', []) + source_urls)),
-            'last_updated': datetime.utcnow()
-        }
-        
-        # Update overall statistics if provided
-        if overall_statistics:
-            # Merge with existing statistics
-            existing_stats = existing_data.get('overall_statistics', {})
-            merged_stats = existing_stats.copy()
-            merged_stats.update(overall_statistics)
-            update_data['overall_statistics'] = merged_stats
-        
-        # Update department statistics if provided
-        if department_statistics:
-            # Create a dictionary of department stats by department name
-            existing_depts = existing_data.get('department_statistics', [])
-            dept_dict = {
-                dept.get('department', ''): dept 
-                for dept in existing_depts 
-                if dept.get('department')
-            }
-            
-            for dept in department_statistics:
-                dept_name = dept.get('department', '')
-                if dept_name in dept_dict:
-                    # Update existing department stats
-                    merged_dept = dept_dict[dept_name].copy()
-                    merged_dept.update({k: v for k, v in dept.items() if v})
-                    dept_dict[dept_name] = merged_dept
-                else:
-                    # Add new department stats
-                    dept_dict[dept_name] = dept
-            
-            update_data['department_statistics'] = list(dept_dict.values())
-        
-        # Update recruiting companies if provided
-        if recruiting_companies:
-            # Create a dictionary of companies by name
-            existing_companies = existing_data.get('recruiting_companies', [])
-            company_dict = {
-                company.get('name', ''): company 
-                for company in existing_companies 
-                if company.get('name')
-            }
-            
-            for company in recruiting_companies:
-                company_name = company.get('name', '')
-                if company_name in company_dict:
-                    # Update existing company info
-                    merged_company = company_dict[company_name].copy()
-                    merged_company.update({k: v for k, v in company.items() if v})
-                    company_dict[company_name] = merged_company
-                else:
-                    # Add new company
-                    company_dict[company_name] = company
-            
-            update_data['recruiting_companies'] = list(company_dict.values())
-        
-        # Update placement charts if provided
-        if placement_charts:
-            update_data['placement_charts'] = placement_charts
-        
-        # Update document
-        collection.update_one(
-            {'_id': existing_data['_id']},
-            {'$set': update_data}
-        )
-        
-        return existing_data['_id']
-    else:
-        # Create new document
-        placement_doc = {
-            'college_id': college_id,
-            'source_urls': source_urls,
-            'academic_year': academic_year,
-            'overall_statistics': overall_statistics or {},
-            'department_statistics': department_statistics or [],
-            'recruiting_companies': recruiting_companies or [],
-            'placement_charts': placement_charts or [],
-            'created_at': datetime.utcnow(),
-            'last_updated': datetime.utcnow()
-        }
-        
-        result = collection.insert_one(placement_doc)
-        return result.inserted_id
+    # Resolve company names, then merge spellings of the same company
+    assign_company_ids(db, incoming['recruiting_companies'])
+    incoming['recruiting_companies'] = prepare_items(incoming['recruiting_companies'], 'company_id')
+    
+    now = datetime.utcnow()
+    merge_fields = {
+        'source_urls': union_expression('source_urls', source_urls),
+        'overall_statistics': merge_object_expression('overall_statistics', incoming['overall_statistics']),
+        'department_statistics': merge_array_expression(
+            'department_statistics', incoming['department_statistics'], 'department'
+        ),
+        'recruiting_companies': merge_array_expression(
+            'recruiting_companies', incoming['recruiting_companies'], 'company_id'
+        ),
+        'placement_charts': {'$literal': placement_charts} if placement_charts else {'$ifNull': ['$placement_charts', []]},
+        'created_at': {'$ifNull': ['$created_at', now]},
+        'last_updated': now
+    }
+    
+    merged = upsert_merge(
+        collection, {'college_id': college_id, 'academic_year': academic_year},
+        merge_fields, ROLLUP_KEY_PROJECTION
+    )
+    
+    add_company_colleges(db, [company['company_id'] for company in incoming['recruiting_companies']], college_id)
+    refresh_placement_rollups(db, merged)
+    
+    return merged['_id']
 
 def get_placement_data_by_college(db, college_id, academic_year=None):
     """
@@ -203,12 +196,18 @@ def update_placement_data(db, placement_id, update_data):
     # Set updated timestamp
     update_data['last_updated'] = datetime.utcnow()
     
-    result = collection.update_one(
+    before = collection.find_one({'_id': placement_id})
+    after = collection.find_one_and_update(
         {'_id': placement_id},
-        {'$set': update_data}
+        {'$set': update_data},
+        return_document=ReturnDocument.AFTER
     )
     
-    return result.modified_count > 0
+    if not after:
+        return False
+    
+    refresh_placement_rollups(db, before, after)
+    return True
 
 def delete_placement_data(db, placement_id):
     """
@@ -227,8 +226,12 @@ def delete_placement_data(db, placement_id):
     if isinstance(placement_id, str):
         placement_id = ObjectId(placement_id)
     
-    result = collection.delete_one({'_id': placement_id})
-    return result.deleted_count > 0
+    deleted = collection.find_one_and_delete({'_id': placement_id})
+    if not deleted:
+        return False
+    
+    refresh_placement_rollups(db, deleted)
+    return True
 
 def delete_placement_data_for_college(db, college_id, academic_year=None):
     """
@@ -253,13 +256,23 @@ def delete_placement_data_for_college(db, college_id, academic_year=None):
     if academic_year:
         query['academic_year'] = academic_year
     
+    # Remember what the documents contributed to the rollups
+    deleted = list(collection.find(query, ROLLUP_KEY_PROJECTION))
+    
     result = collection.delete_many(query)
+    
+    if result.deleted_count:
+        refresh_placement_rollups(db, *deleted)
     return result.deleted_count
 
 def search_company_placements(db, company_name, skip=0, limit=20):
     """
     Search for colleges where a specific company recruited
     
+    The name is resolved to its canonical company and looked up by ID, so
+    any known alias finds the same colleges. Names that match no company
+    fall back to a text search.
+    
     Args:
         db: Database connection
         company_name: Name of the company
@@ -271,6 +284,13 @@ def search_company_placements(db, company_name, skip=0, limit=20):
     """
     collection = get_placement_data_collection(db)
     
+    company = get_company_by_name(db, company_name)
+    if company:
+        cursor = collection.find(
+            {'recruiting_companies.company_id': company['_id']}
+        ).sort([('academic_year', DESCENDING)]).skip(skip).limit(limit)
+        return list(cursor)
+    
     # Use text search on company name
     cursor = collection.find(
         {'$text': {'$search': company_name}},
@@ -336,60 +356,22 @@ def get_placement_stats_by_year(db, academic_years=None, top_n=5):
     Returns:
         Dictionary with placement statistics by year
     """
-    collection = get_placement_data_collection(db)
-    
-    # Build match stage
-    match_stage = {}
-    if academic_years:
-        match_stage['academic_year'] = {'$in': academic_years}
-    
-    # Aggregate pipeline
-    pipeline = [
-        {'$match': match_stage} if match_stage else {'$match': {}},
-        {'$group': {
-            '_id': '$academic_year',
-            'avg_placement_percentage': {'$avg': '$overall_statistics.placement_percentage'},
-            'avg_package': {'$avg': '$overall_statistics.avg_package'},
-            'college_count': {'$sum': 1},
-            'companies': {'$push': '$recruiting_companies'}
-        }},
-        {'$sort': {'_id': 1}}
-    ]
-    
-    result = collection.aggregate(pipeline)
-    
-    # Process results
-    stats_by_year = {}
-    for item in result:
-        year = item['_id']
-        
-        # Flatten companies lists
-        all_companies = []
-        for company_list in item['companies']:
-            all_companies.extend(company_list)
-        
-        # Count companies by name
-        company_counts = {}
-        for company in all_companies:
-            name = company.get('name', '')
-            if name:
-                company_counts[name] = company_counts.get(name, 0) + 1
-        
-        # Get top N companies
-        top_companies = sorted(
-            [{'name': name, 'count': count} for name, count in company_counts.items()],
-            key=lambda x: x['count'],
-            reverse=True
-        )[:top_n]
-        
-        stats_by_year[year] = {
-            'avg_placement_percentage': item['avg_placement_percentage'],
-            'avg_package': item['avg_package'],
-            'college_count': item['college_count'],
-            'top_companies': top_companies
+    # Read the precomputed year rollups
+    query = {'_id': {'$in': academic_years}} if academic_years else {}
+    cursor = db[YEAR_ROLLUPS].find(query).sort([('_id', ASCENDING)])
+    
+    return {
+        item['_id']: {
+            'avg_placement_percentage': item.get('avg_placement_percentage'),
+            'avg_package': item.get('avg_package'),
+            'college_count': item.get('college_count', 0),
+            'top_companies': [
+                {'name': company['name'], 'company_id': company.get('company_id'), 'count': company['count']}
+                for company in item.get('top_companies', [])[:top_n]
+            ]
         }
-    
-    return stats_by_year
+        for item in cursor
+    }
 
 def get_top_companies(db, limit=20):
     """
@@ -402,25 +384,12 @@ def get_top_companies(db, limit=20):
     Returns:
         List of company names with occurrence count
     """
-    collection = get_placement_data_collection(db)
-    
-    # Aggregate pipeline
-    pipeline = [
-        {'$unwind': '$recruiting_companies'},
-        {'$group': {
-            '_id': '$recruiting_companies.name',
-            'count': {'$sum': 1},
-            'avg_package': {'$avg': '$recruiting_companies.package_offered'}
-        }},
-        {'$match': {'_id': {'$ne': None, '$ne': ''}}},
-        {'$sort': {'count': -1}},
-        {'$limit': limit}
-    ]
-    
-    result = collection.aggregate(pipeline)
+    # Read the precomputed company rollups
+    cursor = db[COMPANY_ROLLUPS].find().sort([('count', DESCENDING)]).limit(limit)
     
-    return [{'name': item['_id'], 'count': item['count'], 'avg_package': item['avg_package']} 
-            for item in result]
+    return [{'name': item['name'], 'company_id': item['_id'], 'count': item['count'],
+             'avg_package': item.get('avg_package')}
+            for item in cursor]
 
 def get_department_performance(db):
     """
@@ -432,25 +401,11 @@ def get_department_performance(db):
     Returns:
         Dictionary with department statistics
     """
-    collection = get_placement_data_collection(db)
-    
-    # Aggregate pipeline
-    pipeline = [
-        {'$unwind': '$department_statistics'},
-        {'$group': {
-            '_id': '$department_statistics.department',
-            'avg_placement_percentage': {'$avg': '$department_statistics.statistics.placement_percentage'},
-            'avg_package': {'$avg': '$department_statistics.statistics.avg_package'},
-            'college_count': {'$sum': 1}
-        }},
-        {'$match': {'_id': {'$ne': None, '$ne': ''}}},
-        {'$sort': {'avg_placement_percentage': -1}}
-    ]
-    
-    result = collection.aggregate(pipeline)
+    # Read the precomputed department rollups
+    cursor = db[DEPARTMENT_ROLLUPS].find().sort([('avg_placement_percentage', DESCENDING)])
     
     return {item['_id']: {
-        'avg_placement_percentage': item['avg_placement_percentage'],
-        'avg_package': item['avg_package'],
-        'college_count': item['college_count']
-    } for item in result}
\ No newline at end of file
+        'avg_placement_percentage': item.get('avg_placement_percentage'),
+        'avg_package': item.get('avg_package'),
+        'college_count': item.get('college_count', 0)
+    } for item in cursor}
@@ -0,0 +1,284 @@
+"""
+Materialized placement rollups (per year, per year and company, per company
+and per department) kept up to date as placement data changes
+
+Companies are rolled up by canonical company ID (see models.company), so
+different spellings of a company count together.
+
+Refreshes of a rollup collection are serialized within a process. Refreshes
+from separate processes can still interleave; a failed or interleaved
+refresh is repaired by rebuild_placement_rollups().
+"""
+import logging
+import threading
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+# Rollup collection names
+YEAR_ROLLUPS = 'placement_rollups_by_year'
+YEAR_COMPANY_ROLLUPS = 'placement_rollups_by_year_company'
+COMPANY_ROLLUPS = 'placement_rollups_by_company'
+DEPARTMENT_ROLLUPS = 'placement_rollups_by_department'
+
+# Collection recording failed refreshes since the last rebuild
+ROLLUP_STATUS = 'placement_rollup_status'
+
+# Number of top companies stored on each year rollup
+ROLLUP_TOP_COMPANIES = 20
+
+# Rollup rows written per bulk operation
+ROLLUP_WRITE_BATCH_SIZE = 1000
+
+# Serializes refreshes of each rollup collection within this process
+rollup_locks = {
+    name: threading.Lock()
+    for name in (YEAR_ROLLUPS, YEAR_COMPANY_ROLLUPS, COMPANY_ROLLUPS, DEPARTMENT_ROLLUPS)
+}
+
+# Fields of a placement data document that determine the rollups it contributes to
+ROLLUP_KEY_PROJECTION = {
+    'academic_year': 1, 'recruiting_companies.company_id': 1, 'department_statistics.department': 1
+}
+
+def create_indexes(db):
+    """Create indexes for the placement rollup collections"""
+    db[YEAR_COMPANY_ROLLUPS].create_index([('academic_year', ASCENDING), ('count', DESCENDING)])
+    db[COMPANY_ROLLUPS].create_index([('count', DESCENDING)])
+    db[DEPARTMENT_ROLLUPS].create_index([('avg_placement_percentage', DESCENDING)])
+
+def get_rollup_keys(doc):
+    """
+    Get the rollup keys a placement data document contributes to
+    
+    Args:
+        doc: Placement data document (or None)
+    
+    Returns:
+        Tuple of (academic years, company IDs, department names) as sets
+    """
+    if not doc:
+        return set(), set(), set()
+    
+    years = {doc.get('academic_year')}
+    companies = {
+        company.get('company_id') for company in doc.get('recruiting_companies') or [] if company.get('company_id')
+    }
+    departments = {dept.get('department') for dept in doc.get('department_statistics') or [] if dept.get('department')}
+    
+    return years, companies, departments
+
+def merge_rollup(db, pipeline, rollup_collection, stale_query):
+    """
+    Recompute rollup rows and remove the rows the pipeline no longer produces
+    
+    Only rows matching stale_query that this run didn't produce are deleted,
+    and the whole refresh holds the collection's lock, so a concurrent
+    refresh in this process can't delete rows another one just wrote.
+    
+    Args:
+        db: Database connection
+        pipeline: Aggregation pipeline over placement_data producing rollup rows
+        rollup_collection: Name of the rollup collection
+        stale_query: Query selecting the rollup rows the pipeline recomputed
+    """
+    collection = db[rollup_collection]
+    
+    with rollup_locks[rollup_collection]:
+        produced = []
+        operations = []
+        
+        for row in db.placement_data.aggregate(pipeline):
+            produced.append(row['_id'])
+            operations.append(ReplaceOne({'_id': row['_id']}, row, upsert=True))
+            
+            if len(operations) >= ROLLUP_WRITE_BATCH_SIZE:
+                collection.bulk_write(operations, ordered=False)
+                operations = []
+        
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+        
+        # Rows for keys that no longer have any placement data
+        collection.delete_many({'$and': [stale_query, {'_id': {'$nin': produced}}]})
+
+def refresh_year_rollups(db, academic_years=None, companies=None):
+    """
+    Recompute the year and year-company rollups
+    
+    Args:
+        db: Database connection
+        academic_years: Academic years to recompute (None for all)
+        companies: Company IDs whose year-company rows are recomputed (None for all)
+    """
+    match = {'academic_year': {'$in': list(academic_years)}} if academic_years is not None else {}
+    
+    company_match = dict(match)
+    company_row_match = {'recruiting_companies.company_id': {'$ne': None}}
+    stale_query = dict(match)
+    if companies is not None:
+        company_match['recruiting_companies.company_id'] = {'$in': list(companies)}
+        company_row_match = {'recruiting_companies.company_id': {'$in': list(companies)}}
+        stale_query['company_id'] = {'$in': list(companies)}
+    
+    merge_rollup(db, [
+        {'$match': company_match},
+        {'$unwind': '$recruiting_companies'},
+        {'$match': company_row_match},
+        {'$group': {
+            '_id': {'academic_year': '$academic_year', 'company_id': '$recruiting_companies.company_id'},
+            'company': {'$first': '$recruiting_companies.company_name'},
+            'count': {'$sum': 1},
+            'avg_package': {'$avg': '$recruiting_companies.package_offered_lpa'}
+        }},
+        {'$addFields': {'academic_year': '$_id.academic_year', 'company_id': '$_id.company_id'}}
+    ], YEAR_COMPANY_ROLLUPS, stale_query)
+    
+    merge_rollup(db, [
+        {'$match': match},
+        {'$group': {
+            '_id': '$academic_year',
+            'avg_placement_percentage': {'$avg': '$overall_statistics.placement_percentage_pct'},
+            'avg_package': {'$avg': {'$ifNull': [
+                '$overall_statistics.average_package_lpa', '$overall_statistics.avg_package_lpa'
+            ]}},
+            'college_count': {'$sum': 1}
+        }}
+    ], YEAR_ROLLUPS, {'_id': match['academic_year']} if match else {})
+    
+    # Store the top companies on each year so readers need a single lookup
+    years = academic_years if academic_years is not None else db[YEAR_ROLLUPS].distinct('_id')
+    for year in years:
+        top_companies = [
+            {'name': row['company'], 'company_id': row['company_id'], 'count': row['count'],
+             'avg_package': row.get('avg_package')}
+            for row in db[YEAR_COMPANY_ROLLUPS].find(
+                {'academic_year': year}, {'company': 1, 'company_id': 1, 'count': 1, 'avg_package': 1}
+            ).sort([('count', DESCENDING)]).limit(ROLLUP_TOP_COMPANIES)
+        ]
+        
+        db[YEAR_ROLLUPS].update_one({'_id': year}, {'$set': {'top_companies': top_companies}})
+
+def refresh_company_rollups(db, companies=None):
+    """
+    Recompute the per-company rollups
+    
+    Args:
+        db: Database connection
+        companies: Company IDs to recompute (None for all)
+    """
+    match = {'recruiting_companies.company_id': {'$in': list(companies)}} if companies is not None else {}
+    
+    merge_rollup(db, [
+        {'$match': match},
+        {'$unwind': '$recruiting_companies'},
+        {'$match': match or {'recruiting_companies.company_id': {'$ne': None}}},
+        {'$group': {
+            '_id': '$recruiting_companies.company_id',
+            'name': {'$first': '$recruiting_companies.company_name'},
+            'count': {'$sum': 1},
+            'avg_package': {'$avg': '$recruiting_companies.package_offered_lpa'}
+        }}
+    ], COMPANY_ROLLUPS, {'_id': {'$in': list(companies)}} if companies is not None else {})
+
+def refresh_department_rollups(db, departments=None):
+    """
+    Recompute the per-department rollups
+    
+    Args:
+        db: Database connection
+        departments: Department names to recompute (None for all)
+    """
+    match = {'department_statistics.department': {'$in': list(departments)}} if departments is not None else {}
+    
+    merge_rollup(db, [
+        {'$match': match},
+        {'$unwind': '$department_statistics'},
+        {'$match': match or {'department_statistics.department': {'$nin': [None, '']}}},
+        {'$group': {
+            '_id': '$department_statistics.department',
+            'avg_placement_percentage': {'$avg': '$department_statistics.statistics.placement_percentage_pct'},
+            'avg_package': {'$avg': '$department_statistics.statistics.avg_package_lpa'},
+            'college_count': {'$sum': 1}
+        }}
+    ], DEPARTMENT_ROLLUPS, {'_id': {'$in': list(departments)}} if departments is not None else {})
+
+def refresh_placement_rollups(db, *docs):
+    """
+    Update the rollups affected by changes to placement data documents
+    
+    Pass each changed document as it was before and after the change. Only
+    the rows for the years, companies and departments those documents
+    contribute to are recomputed, from the placement data itself. Failures
+    are logged and counted in the rollup status rather than raised, so
+    storing placement data doesn't fail; rebuild_placement_rollups()
+    repairs them.
+    
+    Args:
+        db: Database connection
+        docs: Placement data documents (None entries are ignored)
+    """
+    years, companies, departments = set(), set(), set()
+    for doc in docs:
+        doc_years, doc_companies, doc_departments = get_rollup_keys(doc)
+        years |= doc_years
+        companies |= doc_companies
+        departments |= doc_departments
+    
+    try:
+        if years:
+            refresh_year_rollups(db, years, companies)
+        if companies:
+            refresh_company_rollups(db, companies)
+        if departments:
+            refresh_department_rollups(db, departments)
+    except Exception as e:
+        logger.error(f"Failed to refresh placement rollups: {str(e)}", exc_info=True)
+        record_refresh_failure(db, e)
+
+def record_refresh_failure(db, error):
+    """
+    Count a failed rollup refresh, so stale rollups can be detected
+    
+    Args:
+        db: Database connection
+        error: Exception raised by the refresh
+    """
+    try:
+        db[ROLLUP_STATUS].update_one(
+            {'_id': 'placement'},
+            {
+                '$inc': {'failed_refreshes': 1},
+                '$set': {'last_error': str(error), 'last_failure': datetime.utcnow()}
+            },
+            upsert=True
+        )
+    except Exception as e:
+        logger.error(f"Failed to record placement rollup failure: {str(e)}")
+
+def get_rollup_status(db):
+    """
+    Get the number of failed refreshes since the last rebuild
+    
+    Args:
+        db: Database connection
+    
+    Returns:
+        Status dictionary with failed_refreshes, last_error and last_failure
+    """
+    return db[ROLLUP_STATUS].find_one({'_id': 'placement'}, {'_id': 0}) or {'failed_refreshes': 0}
+
+def rebuild_placement_rollups(db):
+    """
+    Recompute every placement rollup from scratch
+    
+    Args:
+        db: Database connection
+    """
+    refresh_year_rollups(db)
+    refresh_company_rollups(db)
+    refresh_department_rollups(db)
+    
+    # The rollups are consistent again
+    db[ROLLUP_STATUS].delete_one({'_id': 'placement'})
@@ -0,0 +1,67 @@
+"""
+Named field sets (projections) for reading documents per use case
+
+List views and pollers use these so they don't transfer page bodies,
+prompts or AI responses they never look at.
+"""
+
+PROJECTIONS = {
+    'colleges': {
+        # Fields shown in listings
+        'summary': {
+            'name': 1, 'website': 1, 'type': 1, 'state': 1,
+            'status': 1, 'location': 1, 'last_crawled': 1
+        },
+        # Fields written by college exports
+        'export': {
+            'name': 1, 'website': 1, 'type': 1, 'state': 1, 'status': 1,
+            'location': 1, 'contact_info': 1, 'established_year': 1,
+            'affiliations': 1, 'accreditations': 1, 'last_crawled': 1,
+            'created_at': 1, 'updated_at': 1
+        }
+    },
+    'raw_content': {
+        # Everything except the page body
+        'summary': {'content': 0},
+        # Just enough to queue content for AI processing
+        'queue': {
+            'college_id': 1, 'url': 1, 'content_type': 1,
+            'extraction_date': 1, 'processing_attempts': 1
+        }
+    },
+    'crawl_jobs': {
+        # Fields needed to report crawl progress
+        'progress': {
+            'college_id': 1, 'status': 1, 'progress_percentage': 1,
+            'pages_crawled': 1, 'current_url': 1, 'crawling_stats': 1, 'throttle': 1,
+            'connections': 1
+        }
+    },
+    'ai_processing_jobs': {
+        # Everything except the prompt and raw model output
+        'summary': {'prompt_used': 0, 'ai_response': 0},
+        # Just enough for a worker to pick up the job
+        'dispatch': {
+            'college_id': 1, 'raw_content_id': 1, 'content_type': 1, 'status': 1
+        }
+    }
+}
+
+def get_projection(collection_name, fields=None):
+    """
+    Get a named projection for a collection
+
+    Args:
+        collection_name: Name of the collection
+        fields: Name of the field set, or None for full documents
+
+    Returns:
+        Projection dictionary, or None for full documents
+    """
+    if fields is None:
+        return None
+
+    try:
+        return PROJECTIONS[collection_name][fields]
+    except KeyError:
+        raise ValueError(f"Unknown field set '{fields}' for collection {collection_name}")
@@ -1,9 +1,11 @@
 """
 Raw content model for storing extracted HTML content from college websites
 """
+import hashlib
 from datetime import datetime
 from bson import ObjectId
 from pymongo import ASCENDING, TEXT, DESCENDING
+from models.projections import get_projection
 
 def create_indexes(db):
     """Create indexes for the raw_content collection"""
@@ -17,6 +19,20 @@ def get_raw_content_collection(db):
     """Get the raw_content collection"""
     return db.raw_content
 
+def compute_content_hash(content):
+    """
+    Compute the hash used to detect changed content
+    
+    Args:
+        content: Page content (string or bytes)
+        
+    Returns:
+        Hex digest string
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content or b'').hexdigest()
+
 def store_raw_content(db, college_id, url, content_type, content, content_format='html'):
     """
     Store raw content extracted from a college website
@@ -27,7 +43,7 @@ def store_raw_content(db, college_id, url, content_type, content, content_format
         url: URL where content was extracted from
         content_type: Type of content (admission/placement/internship)
         content: The extracted content
-        content_format: Format of the content (html/text/pdf)
+        content_format: Format of the content (html/text/pdf/docx/pptx)
         
     Returns:
         Inserted document ID
@@ -44,6 +60,7 @@ def store_raw_content(db, college_id, url, content_type, content, content_format
         "content_type": content_type,
         "content": content,
         "content_format": content_format,
+        "content_hash": compute_content_hash(content),
         "extraction_date": datetime.utcnow(),
         "processed": False,
         "processing_attempts": 0,
@@ -90,13 +107,14 @@ def update_raw_content_processing_status(db, content_id, processed=True, error=N
     
     return result.modified_count > 0
 
-def get_raw_content_by_id(db, content_id):
+def get_raw_content_by_id(db, content_id, fields=None):
     """
     Get raw content by ID
     
     Args:
         db: Database connection
         content_id: ID of the content document
+        fields: Named field set from models.projections (optional, full document by default)
         
     Returns:
         Content document or None
@@ -107,7 +125,7 @@ def get_raw_content_by_id(db, content_id):
     if isinstance(content_id, str):
         content_id = ObjectId(content_id)
     
-    return collection.find_one({'_id': content_id})
+    return collection.find_one({'_id': content_id}, get_projection('raw_content', fields))
 
 def get_raw_content_by_url(db, url):
     """
@@ -123,7 +141,7 @@ def get_raw_content_by_url(db, url):
     collection = get_raw_content_collection(db)
     return collection.find_one({'url': url})
 
-def get_unprocessed_content(db, limit=10, max_attempts=3, content_type=None):
+def get_unprocessed_content(db, limit=10, max_attempts=3, content_type=None, fields='queue'):
     """
     Get unprocessed raw content for AI processing
     
@@ -132,6 +150,7 @@ def get_unprocessed_content(db, limit=10, max_attempts=3, content_type=None):
         limit: Maximum number of documents to return
         max_attempts: Maximum number of processing attempts
         content_type: Filter by content type (optional)
+        fields: Named field set from models.projections (None for full documents)
         
     Returns:
         List of unprocessed content documents
@@ -148,11 +167,14 @@ def get_unprocessed_content(db, limit=10, max_attempts=3, content_type=None):
         query['content_type'] = content_type
     
     # Sort by extraction date (oldest first)
-    cursor = collection.find(query).sort([('extraction_date', ASCENDING)]).limit(limit)
+    cursor = collection.find(query, get_projection('raw_content', fields)).sort(
+        [('extraction_date', ASCENDING)]
+    ).limit(limit)
     
     return list(cursor)
 
-def get_raw_content_for_college(db, college_id, content_type=None, processed=None, skip=0, limit=20):
+def get_raw_content_for_college(db, college_id, content_type=None, processed=None, skip=0, limit=20,
+                                fields=None):
     """
     Get raw content for a specific college
     
@@ -163,6 +185,7 @@ def get_raw_content_for_college(db, college_id, content_type=None, processed=Non
         processed: Filter by processed status (optional)
         skip: Number of records to skip
         limit: Maximum number of records to return
+        fields: Named field set from models.projections (optional, full documents by default)
         
     Returns:
         List of content documents
@@ -183,7 +206,9 @@ def get_raw_content_for_college(db, college_id, content_type=None, processed=Non
         query['processed'] = processed
     
     # Sort by extraction date (newest first)
-    cursor = collection.find(query).sort([('extraction_date', DESCENDING)]).skip(skip).limit(limit)
+    cursor = collection.find(query, get_projection('raw_content', fields)).sort(
+        [('extraction_date', DESCENDING)]
+    ).skip(skip).limit(limit)
     
     return list(cursor)
 
@@ -269,27 +294,30 @@ def get_raw_content_stats(db):
     """
     collection = get_raw_content_collection(db)
     
-    # Total content
-    total_content = collection.count_documents({})
-    
-    # Content by type
-    admission_content = collection.count_documents({'content_type': 'admission'})
-    placement_content = collection.count_documents({'content_type': 'placement'})
-    internship_content = collection.count_documents({'content_type': 'internship'})
-    
-    # Processed vs unprocessed
-    processed_content = collection.count_documents({'processed': True})
-    unprocessed_content = collection.count_documents({'processed': False})
-    
-    # Processing errors
-    with_errors = collection.count_documents({'processing_error': {'$ne': None}})
+    # Count everything in a single pass, without reading the content field
+    pipeline = [
+        {'$project': {'content_type': 1, 'processed': 1, 'processing_error': 1}},
+        {'$group': {
+            '_id': None,
+            'total_content': {'$sum': 1},
+            'admission_content': {'$sum': {'$cond': [{'$eq': ['$content_type', 'admission']}, 1, 0]}},
+            'placement_content': {'$sum': {'$cond': [{'$eq': ['$content_type', 'placement']}, 1, 0]}},
+            'internship_content': {'$sum': {'$cond': [{'$eq': ['$content_type', 'internship']}, 1, 0]}},
+            'processed_content': {'$sum': {'$cond': [{'$eq': ['$processed', True]}, 1, 0]}},
+            'unprocessed_content': {'$sum': {'$cond': [{'$eq': ['$processed', False]}, 1, 0]}},
+            'with_errors': {'$sum': {'$cond': [{'$ne': [{'$ifNull': ['$processing_error', None]}, None]}, 1, 0]}}
+        }}
+    ]
+    
+    result = list(collection.aggregate(pipeline))
+    counts = result[0] if result else {}
     
     return {
-        'total_content': total_content,
-        'admission_content': admission_content,
-        'placement_content': placement_content,
-        'internship_content': internship_content,
-        'processed_content': processed_content,
-        'unprocessed_content': unprocessed_content,
-        'with_errors': with_errors
+        'total_content': counts.get('total_content', 0),
+        'admission_content': counts.get('admission_content', 0),
+        'placement_content': counts.get('placement_content', 0),
+        'internship_content': counts.get('internship_content', 0),
+        'processed_content': counts.get('processed_content', 0),
+        'unprocessed_content': counts.get('unprocessed_content', 0),
+        'with_errors': counts.get('with_errors', 0)
     }
\ No newline at end of file
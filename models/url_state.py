@@ -0,0 +1,214 @@
+"""
+URL state model tracking how often each crawled page changes
+
+Each page of a college gets one compact record with its recent content
+hashes and an adaptive revisit interval: the interval is halved when a
+fetch finds the page changed and doubled when it is unchanged, so crawls
+spend their page budget on volatile pages.
+"""
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING
+from config import get_config
+
+# Number of recent content hashes kept per URL
+HASH_HISTORY_SIZE = 8
+
+# Characters of each content hash kept in the history
+HASH_PREFIX_LENGTH = 12
+
+# Revisit interval multiplier per content type (volatile types are revisited sooner)
+CONTENT_TYPE_REVISIT_FACTORS = {
+    'placement': 0.5,
+    'internship': 0.75,
+    'admission': 0.75,
+    'general': 2.0
+}
+
+def create_indexes(db):
+    """Create indexes for the url_states collection"""
+    db.url_states.create_index([('college_id', ASCENDING), ('url', ASCENDING)], unique=True)
+    db.url_states.create_index([('college_id', ASCENDING), ('next_visit', ASCENDING)])
+
+def get_url_states_collection(db):
+    """Get the url_states collection"""
+    return db.url_states
+
+def get_url_states(db, college_id):
+    """
+    Get the state of every known URL of a college
+    
+    Args:
+        db: Database connection
+        college_id: ID of the college
+    
+    Returns:
+        Dictionary mapping URL to URL state document
+    """
+    collection = get_url_states_collection(db)
+    
+    # Ensure college_id is ObjectId
+    if isinstance(college_id, str):
+        college_id = ObjectId(college_id)
+    
+    return {state['url']: state for state in collection.find({'college_id': college_id})}
+
+def is_due(state, now=None):
+    """
+    Check whether a known URL should be fetched again
+    
+    Args:
+        state: URL state document
+        now: Current time (defaults to now)
+    
+    Returns:
+        True if the URL's next visit time has passed
+    """
+    next_visit = state.get('next_visit')
+    return next_visit is None or next_visit <= (now or datetime.utcnow())
+
+def has_changed(state, content_hash):
+    """
+    Check whether fetched content differs from the last fetch of a URL
+    
+    Args:
+        state: URL state document (None for a new URL)
+        content_hash: Hash of the fetched content
+    
+    Returns:
+        True if the content is new or changed
+    """
+    history = (state or {}).get('hash_history')
+    return not history or history[0] != content_hash[:HASH_PREFIX_LENGTH]
+
+def get_change_rate(state):
+    """
+    Estimate how often a URL changes, in changes per day
+    
+    Uses the Poisson estimate (changes + 0.5) / observed days, where the
+    half change keeps pages with no observed change from ranking as static
+    too early.
+    
+    Args:
+        state: URL state document
+    
+    Returns:
+        Estimated changes per day
+    """
+    first_seen = state.get('first_seen')
+    last_fetched = state.get('last_fetched')
+    if not first_seen or not last_fetched:
+        return 0.0
+    
+    observed_days = max((last_fetched - first_seen).total_seconds() / 86400, 1.0)
+    return (state.get('change_count', 0) + 0.5) / observed_days
+
+def get_revisit_interval(state, changed, content_type):
+    """
+    Get the interval until the next fetch of a URL
+    
+    Args:
+        state: Previous URL state document (None for a new URL)
+        changed: Whether the latest fetch found new content
+        content_type: Type of content (admission/placement/internship/general)
+    
+    Returns:
+        Interval in days
+    """
+    config = get_config()
+    factor = CONTENT_TYPE_REVISIT_FACTORS.get(content_type, 1.0)
+    
+    if not state or not state.get('revisit_days'):
+        interval = config.REVISIT_MIN_DAYS * factor
+    elif changed:
+        interval = state['revisit_days'] / 2
+    else:
+        interval = state['revisit_days'] * 2
+    
+    return min(max(interval, config.REVISIT_MIN_DAYS * factor), config.REVISIT_MAX_DAYS * factor)
+
+def record_fetch(db, college_id, url, content_type, content_hash, depth, state=None):
+    """
+    Record a fetch of a URL and schedule its next visit
+    
+    Args:
+        db: Database connection
+        college_id: ID of the college
+        url: URL that was fetched
+        content_type: Type of content (admission/placement/internship/general)
+        content_hash: Hash of the fetched content
+        depth: Crawl depth the URL was found at
+        state: Previous URL state document (None for a new URL)
+    
+    Returns:
+        True if the content changed since the previous fetch (or is new)
+    """
+    collection = get_url_states_collection(db)
+    
+    # Ensure college_id is ObjectId
+    if isinstance(college_id, str):
+        college_id = ObjectId(college_id)
+    
+    now = datetime.utcnow()
+    short_hash = content_hash[:HASH_PREFIX_LENGTH]
+    history = (state or {}).get('hash_history', [])
+    changed = has_changed(state, content_hash)
+    
+    revisit_days = get_revisit_interval(state, changed, content_type)
+    
+    update_data = {
+        'content_type': content_type,
+        'depth': min(depth, (state or {}).get('depth', depth)),
+        'hash_history': ([short_hash] + history)[:HASH_HISTORY_SIZE] if changed else history,
+        'last_fetched': now,
+        'revisit_days': revisit_days,
+        'next_visit': now + timedelta(days=revisit_days)
+    }
+    if changed:
+        update_data['last_changed'] = now
+    
+    collection.update_one(
+        {'college_id': college_id, 'url': url},
+        {
+            '$set': update_data,
+            '$inc': {'fetch_count': 1, 'change_count': 1 if changed and state else 0},
+            '$setOnInsert': {'first_seen': now}
+        },
+        upsert=True
+    )
+    
+    return changed
+
+def get_due_urls(states, now=None):
+    """
+    Get the known URLs due for a visit, most volatile first
+    
+    Args:
+        states: Dictionary mapping URL to URL state document
+        now: Current time (defaults to now)
+    
+    Returns:
+        List of URL state documents
+    """
+    now = now or datetime.utcnow()
+    due = [state for state in states.values() if is_due(state, now)]
+    return sorted(due, key=get_change_rate, reverse=True)
+
+def delete_url_states_for_college(db, college_id):
+    """
+    Delete the URL states of a college
+    
+    Args:
+        db: Database connection
+        college_id: ID of the college
+    
+    Returns:
+        Number of documents deleted
+    """
+    collection = get_url_states_collection(db)
+    
+    # Ensure college_id is ObjectId
+    if isinstance(college_id, str):
+        college_id = ObjectId(college_id)
+    
+    return collection.delete_many({'college_id': college_id}).deleted_count
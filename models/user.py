@@ -2,9 +2,18 @@
 User model for authentication and authorization
 """
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from bson import ObjectId
 from pymongo import ASCENDING, TEXT
 import bcrypt
+from config import get_config
+
+# Caps how many bcrypt hashes run at once, bounding the CPU spent hashing.
+# Callers still wait for their hash: this limits concurrency, it doesn't
+# take the work off the request path.
+password_executor = ThreadPoolExecutor(
+    max_workers=get_config().PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash'
+)
 
 def create_indexes(db):
     """Create indexes for the users collection"""
@@ -15,6 +24,64 @@ def get_users_collection(db):
     """Get the users collection"""
     return db.users
 
+def hash_password(password):
+    """
+    Hash a password with the configured bcrypt work factor
+    
+    Blocks until the hash is done, which includes waiting for a free
+    password_executor worker.
+    
+    Args:
+        password: Plain-text password
+        
+    Returns:
+        bcrypt hash as bytes
+    """
+    salt = bcrypt.gensalt(rounds=get_config().BCRYPT_ROUNDS)
+    return password_executor.submit(bcrypt.hashpw, password.encode('utf-8'), salt).result()
+
+def check_password(password, stored_hash):
+    """
+    Check a password against a stored bcrypt hash
+    
+    Blocks like hash_password.
+    
+    Args:
+        password: Plain-text password
+        stored_hash: Stored hash (bytes or string)
+        
+    Returns:
+        True if the password matches, False otherwise
+    """
+    if not password or not stored_hash:
+        return False
+    
+    # Check if stored hash is bytes or string and convert if needed
+    if isinstance(stored_hash, str):
+        stored_hash = stored_hash.encode('utf-8')
+    
+    return password_executor.submit(bcrypt.checkpw, password.encode('utf-8'), stored_hash).result()
+
+def needs_rehash(stored_hash):
+    """
+    Check whether a stored hash uses a different work factor than configured
+    
+    Args:
+        stored_hash: Stored bcrypt hash (bytes or string), e.g. $2b$12$...
+        
+    Returns:
+        True if the password should be hashed again
+    """
+    if isinstance(stored_hash, bytes):
+        stored_hash = stored_hash.decode('utf-8')
+    
+    try:
+        rounds = int(stored_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return True
+    
+    return rounds != get_config().BCRYPT_ROUNDS
+
 def create_user(db, username, email, password, role='user', name=None, active=True):
     """
     Create a new user
@@ -38,7 +105,7 @@ def create_user(db, username, email, password, role='user', name=None, active=Tr
         return None
     
     # Hash the password
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    password_hash = hash_password(password)
     
     user_doc = {
         "username": username,
@@ -123,7 +190,7 @@ def update_user(db, user_id, update_data):
     # If password is in update data, hash it
     if 'password' in update_data:
         password = update_data.pop('password')
-        update_data['password_hash'] = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        update_data['password_hash'] = hash_password(password)
     
     # Set updated timestamp
     update_data['updated_at'] = datetime.utcnow()
@@ -151,18 +218,15 @@ def verify_password(db, user_id, password):
     if not user:
         return False
     
-    stored_hash = user.get('password_hash')
-    
-    # Check if stored hash is bytes or string and convert if needed
-    if isinstance(stored_hash, str):
-        stored_hash = stored_hash.encode('utf-8')
-    
-    return bcrypt.checkpw(password.encode('utf-8'), stored_hash)
+    return check_password(password, user.get('password_hash'))
 
 def authenticate_user(db, username_or_email, password):
     """
     Authenticate a user with username/email and password
     
+    The bcrypt check runs on the password executor, and hashes made with
+    a different work factor than BCRYPT_ROUNDS are replaced on success.
+    
     Args:
         db: Database connection
         username_or_email: Username or email
@@ -187,15 +251,17 @@ def authenticate_user(db, username_or_email, password):
     # Verify password
     stored_hash = user.get('password_hash')
     
-    # Check if stored hash is bytes or string and convert if needed
-    if isinstance(stored_hash, str):
-        stored_hash = stored_hash.encode('utf-8')
-    
-    if bcrypt.checkpw(password.encode('utf-8'), stored_hash):
+    if check_password(password, stored_hash):
         # Update last login time
+        update_data = {'last_login': datetime.utcnow()}
+        
+        # Upgrade the hash to the configured work factor while the password is known
+        if needs_rehash(stored_hash):
+            update_data['password_hash'] = hash_password(password)
+        
         collection.update_one(
             {'_id': user['_id']},
-            {'$set': {'last_login': datetime.utcnow()}}
+            {'$set': update_data}
         )
         return user
     
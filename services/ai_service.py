@@ -196,7 +196,7 @@ def process_content(job_id):
     db = get_db()
     
     # Get the AI processing job
-    job = get_ai_processing_job_by_id(db, job_id)
+    job = get_ai_processing_job_by_id(db, job_id, fields='dispatch')
     if not job:
         return False, f"AI processing job {job_id} not found"
     
@@ -226,7 +226,9 @@ def process_content(job_id):
         source_url = raw_content['url']
         
         # Get prompt for the content type
-        prompt = get_prompt_for_content_type(content_type, college_id, source_url, html_content)
+        prompt = get_prompt_for_content_type(
+            content_type, college_id, source_url, html_content, raw_content.get('content_format', 'html')
+        )
         
         # Generate response
         ai_response = model_manager.generate_response(
@@ -271,7 +273,7 @@ def process_content(job_id):
         logger.error(f"Error processing content: {str(e)}", exc_info=True)
         return False, f"Error processing content: {str(e)}"
 
-def get_prompt_for_content_type(content_type, college_id, source_url, html_content):
+def get_prompt_for_content_type(content_type, college_id, source_url, html_content, content_format='html'):
     """
     Get prompt template for a specific content type
     
@@ -279,7 +281,8 @@ def get_prompt_for_content_type(content_type, college_id, source_url, html_conte
         content_type: Type of content (admission/placement/internship)
         college_id: ID of the college
         source_url: URL where content was extracted from
-        html_content: Raw HTML content
+        html_content: Raw HTML content (or text extracted from a document)
+        content_format: Format of the content (html/text/pdf/docx/pptx)
         
     Returns:
         Prompt for the AI model
@@ -290,8 +293,8 @@ def get_prompt_for_content_type(content_type, college_id, source_url, html_conte
     college = db.colleges.find_one({'_id': college_id})
     college_name = college['name'] if college else "the college"
     
-    # Clean HTML content
-    clean_text = clean_html_content(html_content)
+    # Clean HTML content (text extracted from documents is already clean)
+    clean_text = clean_html_content(html_content) if content_format == 'html' else html_content
     
     # Maximum content length to avoid exceeding token limits
     max_content_length = 8000
@@ -0,0 +1,459 @@
+"""
+Analytics service for exporting structured placement and admission data
+as partitioned Parquet tables
+"""
+import os
+import json
+import shutil
+import logging
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config import get_config
+from models import get_db
+from models.college import get_colleges_by_ids
+from models.projections import get_projection
+from models.normalization import KIND_SUFFIXES
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Exported tables: partition column, the columns that identify the rows
+# produced by one source document, and the columns stored in each file
+PLACEMENT_COLUMNS = ['college_id', 'college_name', 'college_type', 'state', 'academic_year', 'last_updated']
+ADMISSION_COLUMNS = ['college_id', 'college_name', 'college_type', 'state', 'last_updated']
+
+ANALYTICS_TABLES = {
+    'placement_overall': {
+        'partition': 'academic_year',
+        'key': ['college_id', 'academic_year'],
+        'columns': PLACEMENT_COLUMNS + [
+            'eligible_students_num', 'students_placed_num', 'placement_percentage_pct',
+            'highest_package_lpa', 'average_package_lpa', 'lowest_package_lpa'
+        ]
+    },
+    'placement_departments': {
+        'partition': 'academic_year',
+        'key': ['college_id', 'academic_year'],
+        'columns': PLACEMENT_COLUMNS + [
+            'department', 'students_placed_num', 'placement_percentage_pct', 'avg_package_lpa'
+        ]
+    },
+    'placement_companies': {
+        'partition': 'academic_year',
+        'key': ['college_id', 'academic_year'],
+        'columns': PLACEMENT_COLUMNS + [
+            'company', 'company_id', 'students_hired_num', 'package_offered_lpa'
+        ]
+    },
+    'admission_courses': {
+        'partition': 'state',
+        'key': ['college_id'],
+        'columns': ADMISSION_COLUMNS + [
+            'course', 'duration', 'eligibility', 'seats_num',
+            'tuition_inr', 'development_inr', 'other_inr'
+        ]
+    }
+}
+
+# File recording when the last export started
+EXPORT_STATE_FILE = 'export_state.json'
+
+# Partition value used for rows without one
+UNKNOWN_PARTITION = 'unknown'
+
+# Data file of each partition, and the file new rows are staged in while
+# an export runs
+PARTITION_FILE = 'part-0.parquet'
+STAGED_FILE = '.part-0.parquet.new'
+
+def get_table_schema(table):
+    """
+    Get the fixed Parquet schema of a table
+    
+    Numeric columns are doubles and last_updated a timestamp, whatever the
+    values of a batch are, so every file of a table shares one schema even
+    when a column is entirely null. The partition column lives in the
+    directory name and isn't stored.
+    
+    Args:
+        table: Table name
+    
+    Returns:
+        pyarrow.Schema
+    """
+    spec = ANALYTICS_TABLES[table]
+    fields = []
+    for column in spec['columns']:
+        if column == spec['partition']:
+            continue
+        if column == 'last_updated':
+            fields.append(pa.field(column, pa.timestamp('us')))
+        elif column.endswith(tuple(KIND_SUFFIXES.values())):
+            fields.append(pa.field(column, pa.float64()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+def to_text(value):
+    """
+    Convert an extracted value to text for a string column
+    
+    Args:
+        value: Extracted value
+    
+    Returns:
+        String value or None
+    """
+    if value is None or value == '':
+        return None
+    return str(value)
+
+def to_partition(value):
+    """
+    Convert a value to a partition value usable as a directory name
+    
+    Args:
+        value: Partition column value
+    
+    Returns:
+        Partition value
+    """
+    text = to_text(value)
+    if text is None:
+        return UNKNOWN_PARTITION
+    return text.replace('/', '-').replace('\\', '-')
+
+def college_columns(college):
+    """
+    Get the college columns shared by all tables
+    
+    Args:
+        college: College summary document or None
+    
+    Returns:
+        Dictionary of college columns
+    """
+    college = college or {}
+    return {
+        'college_name': college.get('name'),
+        'college_type': college.get('type'),
+        'state': to_partition(college.get('state'))
+    }
+
+def flatten_placement(doc, college):
+    """
+    Flatten a placement_data document into table rows
+    
+    Args:
+        doc: Placement data document
+        college: College summary document
+    
+    Returns:
+        Dictionary mapping table name to list of rows
+    """
+    base = {
+        'college_id': str(doc['college_id']),
+        **college_columns(college),
+        'academic_year': to_partition(doc.get('academic_year')),
+        'last_updated': doc.get('last_updated')
+    }
+    
+    overall = doc.get('overall_statistics') or {}
+    overall_row = dict(base)
+    for field in ['eligible_students_num', 'students_placed_num', 'placement_percentage_pct',
+                  'highest_package_lpa', 'average_package_lpa', 'lowest_package_lpa']:
+        overall_row[field] = overall.get(field)
+    
+    department_rows = []
+    for dept in doc.get('department_statistics') or []:
+        stats = dept.get('statistics') or {}
+        department_rows.append({
+            **base,
+            'department': to_text(dept.get('department')),
+            'students_placed_num': stats.get('students_placed_num'),
+            'placement_percentage_pct': stats.get('placement_percentage_pct'),
+            'avg_package_lpa': stats.get('avg_package_lpa')
+        })
+    
+    company_rows = []
+    for company in doc.get('recruiting_companies') or []:
+        company_rows.append({
+            **base,
+            'company': to_text(company.get('company_name') or company.get('name')),
+            'company_id': to_text(company.get('company_id')),
+            'students_hired_num': company.get('students_hired_num'),
+            'package_offered_lpa': company.get('package_offered_lpa')
+        })
+    
+    return {
+        'placement_overall': [overall_row],
+        'placement_departments': department_rows,
+        'placement_companies': company_rows
+    }
+
+def flatten_admission(doc, college):
+    """
+    Flatten an admission_data document into table rows
+    
+    Args:
+        doc: Admission data document
+        college: College summary document
+    
+    Returns:
+        Dictionary mapping table name to list of rows
+    """
+    base = {
+        'college_id': str(doc['college_id']),
+        **college_columns(college),
+        'last_updated': doc.get('last_updated')
+    }
+    
+    course_rows = []
+    for course in doc.get('courses') or []:
+        fees = course.get('fee_structure') or {}
+        course_rows.append({
+            **base,
+            'course': to_text(course.get('name')),
+            'duration': to_text(course.get('duration')),
+            'eligibility': to_text(course.get('eligibility')),
+            'seats_num': course.get('seats_num'),
+            'tuition_inr': fees.get('tuition_inr'),
+            'development_inr': fees.get('development_inr'),
+            'other_inr': fees.get('other_inr')
+        })
+    
+    return {'admission_courses': course_rows}
+
+class TableWriter:
+    """
+    Streams the rows of one export into staged Parquet files, one per partition
+    
+    Rows are written as each batch of documents is flattened, so an export
+    never holds more than one batch in memory. Call commit() once every
+    batch is written to merge the staged files into the table.
+    """
+    def __init__(self, output_dir, table):
+        self.output_dir = output_dir
+        self.table = table
+        self.schema = get_table_schema(table)
+        self.writers = {}
+        self.rows = 0
+    
+    def get_partition_dir(self, value):
+        partition = ANALYTICS_TABLES[self.table]['partition']
+        return os.path.join(self.output_dir, self.table, f"{partition}={value}")
+    
+    def write(self, rows):
+        """
+        Write a batch of rows to the staged files of their partitions
+        
+        Args:
+            rows: List of row dictionaries
+        """
+        partition = ANALYTICS_TABLES[self.table]['partition']
+        
+        partitions = {}
+        for row in rows:
+            partitions.setdefault(row[partition], []).append(row)
+        
+        for value, partition_rows in partitions.items():
+            writer = self.writers.get(value)
+            if writer is None:
+                partition_dir = self.get_partition_dir(value)
+                os.makedirs(partition_dir, exist_ok=True)
+                writer = pq.ParquetWriter(os.path.join(partition_dir, STAGED_FILE), self.schema)
+                self.writers[value] = writer
+            
+            writer.write_table(pa.Table.from_pylist(partition_rows, schema=self.schema))
+            self.rows += len(partition_rows)
+    
+    def commit(self):
+        """
+        Merge the staged files into the table
+        
+        Existing rows with the same key as a new row are replaced, so
+        re-exporting a document never duplicates it. Only partitions that
+        received rows are rewritten.
+        
+        Returns:
+            Number of rows written
+        """
+        self.close()
+        
+        for value in self.writers:
+            merge_partition(self.get_partition_dir(value), self.schema,
+                            [column for column in ANALYTICS_TABLES[self.table]['key']
+                             if column != ANALYTICS_TABLES[self.table]['partition']])
+        
+        return self.rows
+    
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+    
+    def abort(self):
+        """
+        Close and delete the staged files, leaving the table unchanged
+        """
+        self.close()
+        for value in self.writers:
+            staged_path = os.path.join(self.get_partition_dir(value), STAGED_FILE)
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+
+def merge_partition(partition_dir, schema, key_columns):
+    """
+    Replace a partition's data file with its existing rows plus the staged rows
+    
+    Both files are read batch by batch. The merged file is written under a
+    hidden name and swapped in, so readers never see a partial file.
+    
+    Args:
+        partition_dir: Partition directory
+        schema: Table schema
+        key_columns: Columns identifying the rows of one source document
+    """
+    file_path = os.path.join(partition_dir, PARTITION_FILE)
+    staged_path = os.path.join(partition_dir, STAGED_FILE)
+    
+    if not os.path.exists(file_path):
+        os.replace(staged_path, file_path)
+        return
+    
+    batch_size = get_config().ANALYTICS_BATCH_SIZE
+    staged_keys = pq.read_table(staged_path, columns=key_columns).to_pylist()
+    replaced = {tuple(row[column] for column in key_columns) for row in staged_keys}
+    
+    temp_path = os.path.join(partition_dir, '.part-0.parquet.tmp')
+    with pq.ParquetWriter(temp_path, schema) as writer:
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=batch_size):
+            keys = zip(*(batch.column(column).to_pylist() for column in key_columns))
+            keep = pa.array([key not in replaced for key in keys], type=pa.bool_())
+            writer.write_table(pa.Table.from_batches([batch]).filter(keep).cast(schema))
+        
+        for batch in pq.ParquetFile(staged_path).iter_batches(batch_size=batch_size):
+            writer.write_table(pa.Table.from_batches([batch]))
+    
+    os.replace(temp_path, file_path)
+    os.remove(staged_path)
+
+def export_collection(db, collection_name, flatten, writers, since=None):
+    """
+    Flatten every document of a collection changed since a timestamp into the table writers
+    
+    Documents are read and written in batches of ANALYTICS_BATCH_SIZE.
+    
+    Args:
+        db: Database connection
+        collection_name: Source collection
+        flatten: Function turning (document, college) into table rows
+        writers: Dictionary mapping table name to TableWriter
+        since: Only include documents updated since this datetime (optional)
+    """
+    config = get_config()
+    query = {'last_updated': {'$gte': since}} if since else {}
+    batch = []
+    
+    def flush(docs):
+        # Resolve the colleges of a batch with one query
+        colleges = get_colleges_by_ids(db, [doc['college_id'] for doc in docs],
+                                       get_projection('colleges', 'summary'))
+        rows = {}
+        for doc in docs:
+            for table, table_rows in flatten(doc, colleges.get(doc['college_id'])).items():
+                rows.setdefault(table, []).extend(table_rows)
+        
+        for table, table_rows in rows.items():
+            if table_rows:
+                writers[table].write(table_rows)
+    
+    cursor = db[collection_name].find(query, {'source_urls': 0, 'placement_charts': 0},
+                                      batch_size=config.ANALYTICS_BATCH_SIZE)
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= config.ANALYTICS_BATCH_SIZE:
+            flush(batch)
+            batch = []
+    
+    if batch:
+        flush(batch)
+
+def read_export_state(output_dir):
+    """
+    Get the start time of the last export to a directory
+    
+    Args:
+        output_dir: Root directory of the export
+    
+    Returns:
+        Datetime the last export started, or None
+    """
+    state_path = os.path.join(output_dir, EXPORT_STATE_FILE)
+    if not os.path.isfile(state_path):
+        return None
+    
+    with open(state_path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    
+    return datetime.fromisoformat(state['started_at'])
+
+def export_analytics(output_dir, incremental=True):
+    """
+    Export placement and admission data as partitioned Parquet tables
+    
+    Tables are written to <output_dir>/<table>/<partition>=<value>/part-0.parquet:
+    placement tables are partitioned by academic year and admission tables by
+    state. Incremental exports only flatten documents whose last_updated is
+    after the previous export started. Deleted documents, and rows left in an
+    old partition after a college changes state, are only removed by a full
+    export.
+    
+    Args:
+        output_dir: Root directory of the export
+        incremental: Only export documents changed since the last export
+    
+    Returns:
+        Tuple of (success status, message)
+    """
+    try:
+        started_at = datetime.utcnow()
+        since = read_export_state(output_dir) if incremental else None
+        
+        if since is None:
+            # Full exports rebuild every table from scratch
+            for table in ANALYTICS_TABLES:
+                shutil.rmtree(os.path.join(output_dir, table), ignore_errors=True)
+        
+        os.makedirs(output_dir, exist_ok=True)
+        db = get_db()
+        
+        writers = {table: TableWriter(output_dir, table) for table in ANALYTICS_TABLES}
+        try:
+            export_collection(db, 'placement_data', flatten_placement, writers, since)
+            export_collection(db, 'admission_data', flatten_admission, writers, since)
+        except Exception:
+            for writer in writers.values():
+                writer.abort()
+            raise
+        
+        counts = {}
+        for table, writer in writers.items():
+            if writer.rows:
+                counts[table] = writer.commit()
+                logger.info(f"Exported {counts[table]} rows to {table}")
+        
+        # Record the export only after every table has been written
+        with open(os.path.join(output_dir, EXPORT_STATE_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'started_at': started_at.isoformat(), 'tables': counts}, f, indent=2)
+        
+        kind = 'incremental' if since else 'full'
+        return True, f"Successfully completed {kind} analytics export of {sum(counts.values())} rows to {output_dir}"
+    
+    except Exception as e:
+        logger.error(f"Error exporting analytics data: {str(e)}", exc_info=True)
+        return False, f"Error exporting analytics data: {str(e)}"
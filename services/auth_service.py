@@ -1,7 +1,11 @@
 """
 Authentication and authorization service for user management
 """
+import time
+import threading
+from collections import deque
 from flask_login import UserMixin
+from config import get_config
 from models import get_db
 from models.user import (
     get_user_by_email, authenticate_user, create_user, 
@@ -10,6 +14,13 @@ from models.user import (
 )
 from werkzeug.security import check_password_hash
 
+# Cached User objects for the session loader, as {user_id: (user, expires_at)}
+user_cache = {}
+
+# Recent login attempt times per client address, as {address: deque of timestamps}
+login_attempts = {}
+login_attempts_lock = threading.Lock()
+
 class User(UserMixin):
     """User class for Flask-Login compatibility"""
     
@@ -62,17 +73,78 @@ class User(UserMixin):
         
         return self.role in permission_map.get(permission, ['admin'])
 
+def cache_user(user):
+    """
+    Cache a User for the session loader for USER_CACHE_TTL seconds
+    
+    Args:
+        user: User object
+    """
+    user_cache[user.id] = (user, time.time() + get_config().USER_CACHE_TTL)
+
+def invalidate_user(user_id):
+    """
+    Drop a user from the session cache so the next request reloads it
+    
+    Args:
+        user_id: User's ID
+    """
+    user_cache.pop(str(user_id), None)
+
 def init_auth(login_manager):
     """Initialize authentication with Flask-Login"""
     
     @login_manager.user_loader
     def load_user(user_id):
+        # Most requests (including status polls) are served from the cache
+        cached = user_cache.get(user_id)
+        if cached and time.time() < cached[1]:
+            return cached[0]
+        
         db = get_db()
         user_doc = get_user_by_id(db, user_id)
         if user_doc:
-            return User(user_doc)
+            user = User(user_doc)
+            cache_user(user)
+            return user
+        
+        invalidate_user(user_id)
         return None
 
+def is_login_rate_limited(remote_addr):
+    """
+    Record a login attempt from an address and check it against the rate limit
+    
+    Allows LOGIN_RATE_LIMIT attempts per address every LOGIN_RATE_WINDOW
+    seconds, so a burst of attempts can't tie up the password hashing workers.
+    
+    Args:
+        remote_addr: Client IP address
+        
+    Returns:
+        True if the attempt should be rejected, False otherwise
+    """
+    config = get_config()
+    now = time.time()
+    cutoff = now - config.LOGIN_RATE_WINDOW
+    
+    with login_attempts_lock:
+        attempts = login_attempts.setdefault(remote_addr, deque())
+        while attempts and attempts[0] < cutoff:
+            attempts.popleft()
+        
+        if len(attempts) >= config.LOGIN_RATE_LIMIT:
+            return True
+        
+        attempts.append(now)
+        
+        # Forget addresses with no recent attempts
+        if len(login_attempts) > 10000:
+            for address in [address for address, times in login_attempts.items() if times[-1] < cutoff]:
+                del login_attempts[address]
+    
+    return False
+
 def login(email_or_username, password):
     """
     Authenticate a user with email/username and password
@@ -88,7 +160,9 @@ def login(email_or_username, password):
     user_doc = authenticate_user(db, email_or_username, password)
     
     if user_doc:
-        return User(user_doc)
+        user = User(user_doc)
+        cache_user(user)
+        return user
     return None
 
 def register_user(username, email, password, name=None, role='user'):
@@ -155,7 +229,9 @@ def change_password(user_id, current_password, new_password):
         return False
     
     # Update password
-    return update_user(db, user_id, {'password': new_password})
+    success = update_user(db, user_id, {'password': new_password})
+    invalidate_user(user_id)
+    return success
 
 def update_profile(user_id, update_data):
     """
@@ -176,7 +252,9 @@ def update_profile(user_id, update_data):
     if 'active' in update_data:
         del update_data['active']
     
-    return update_user(db, user_id, update_data)
+    success = update_user(db, user_id, update_data)
+    invalidate_user(user_id)
+    return success
 
 def get_all_users(page=1, per_page=20):
     """
@@ -215,7 +293,9 @@ def change_user_role(admin_user, user_id, new_role):
         return False
     
     db = get_db()
-    return update_user(db, user_id, {'role': new_role})
+    success = update_user(db, user_id, {'role': new_role})
+    invalidate_user(user_id)
+    return success
 
 def toggle_user_status(admin_user, user_id, active):
     """
@@ -234,7 +314,9 @@ def toggle_user_status(admin_user, user_id, active):
         return False
     
     db = get_db()
-    return update_user(db, user_id, {'active': active})
+    success = update_user(db, user_id, {'active': active})
+    invalidate_user(user_id)
+    return success
 
 def create_admin_if_none_exists():
     """
@@ -1,10 +1,12 @@
 """
 Web crawler service for extracting data from college websites
 """
-import time
 import re
+import time
+import random
 import requests
 import logging
+from collections import deque
 from datetime import datetime
 from urllib.parse import urlparse, urljoin
 from bs4 import BeautifulSoup
@@ -14,7 +16,18 @@ from models.crawl_job import (
     create_crawl_job, update_crawl_job_status, 
     update_crawl_job_progress, get_crawl_job_by_id
 )
-from models.raw_content import store_raw_content
+from models.raw_content import store_raw_content, compute_content_hash
+from models.url_state import get_url_states, get_due_urls, is_due, has_changed, record_fetch
+from services.realtime_service import emit_crawl_progress, emit_crawl_status
+from services.politeness_service import (
+    THROTTLE_STATUS_CODES, wait_for_host, get_host_delay, record_response, parse_retry_after
+)
+from services.robots_service import can_fetch, get_crawl_delay, get_sitemap_urls
+from services.http_service import (
+    create_session, reset_connection_stats, get_connection_stats, get_content_length,
+    read_text, read_bytes
+)
+from services.document_service import get_document_format, is_document, submit_extraction, wait_for_extraction
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +36,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Content types parsed as HTML pages
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# URL terms of the pages seeded first from a sitemap
+SITEMAP_PRIORITY_TERMS = ['placement', 'recruit', 'career', 'admission', 'fee', 'course', 'intern']
+
 class CollegeCrawler:
     """
     Web crawler for extracting data from college websites
@@ -52,18 +71,35 @@ class CollegeCrawler:
         
         # Initialize crawling data structures
         self.visited_urls = set()
-        self.queue = []
+        self.skipped_urls = set()
+        self.queue = deque()
         self.crawled_pages = 0
         
+        # Linked documents, fetched after the pages
+        self.document_queue = deque()
+        self.crawled_documents = 0
+        
+        # Last modification dates from the site's sitemaps, as {url: lastmod}
+        self.sitemap_lastmod = {}
+        
+        # Throttling statistics per host for this job
+        self.throttle = {}
+        
+        # Change history of the pages found by earlier crawls
+        self.url_states = get_url_states(self.db, college_id)
+        
         # Category counts
         self.admission_pages = 0
         self.placement_pages = 0
         self.internship_pages = 0
         self.other_pages = 0
         
-        # Initialize session
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Pages seen in an earlier crawl, and how many of them changed since
+        self.compared_pages = 0
+        self.changed_pages = 0
+        
+        # Initialize session (connections are pooled with every other crawl job)
+        self.session = create_session({
             'User-Agent': 'Mozilla/5.0 (compatible; CollegeDataCrawler/1.0; +http://collegedatacrawler.example.com)',
             'Accept': 'text/html,application/xhtml+xml,application/xml',
             'Accept-Language': 'en-US,en;q=0.9'
@@ -77,69 +113,194 @@ class CollegeCrawler:
             Success status and message
         """
         try:
+            # Count only the connections this job opens
+            reset_connection_stats()
+            
             # Update job status to running
             update_crawl_job_status(self.db, self.job_id, 'running')
+            emit_crawl_status(self.job_id, self.college_id, 'running')
             
-            # Add the main URL to the queue
+            # Add the main URL to the queue, then the known pages due for a
+            # visit, most volatile first, so they get the page budget
             self.queue.append((self.website, 0))  # (url, depth)
+            for state in get_due_urls(self.url_states):
+                self.queue_url(state['url'], state.get('depth', 1))
+            
+            # Then pages found through the sitemaps
+            self.seed_from_sitemaps()
             
             # Crawl until queue is empty or maximum pages reached
             while self.queue and self.crawled_pages < self.config.MAX_PAGES_PER_COLLEGE:
                 # Get next URL to process
-                url, depth = self.queue.pop(0)
+                url, depth = self.queue.popleft()
                 
                 # Skip if already visited
-                if url in self.visited_urls:
+                if url in self.visited_urls or url in self.skipped_urls:
+                    continue
+                
+                if not self.should_fetch(url):
+                    self.skipped_urls.add(url)
                     continue
                 
                 # Mark as visited
                 self.visited_urls.add(url)
                 
                 # Update job progress
-                update_crawl_job_progress(
-                    self.db,
-                    self.job_id,
-                    pages_crawled=self.crawled_pages,
-                    progress_percentage=int((self.crawled_pages / self.config.MAX_PAGES_PER_COLLEGE) * 100),
-                    current_url=url,
-                    admission_pages=self.admission_pages,
-                    placement_pages=self.placement_pages,
-                    internship_pages=self.internship_pages,
-                    other_pages=len(self.visited_urls) - (self.admission_pages + self.placement_pages + self.internship_pages)
+                self.report_progress(
+                    int((self.crawled_pages / self.config.MAX_PAGES_PER_COLLEGE) * 100),
+                    current_url=url
                 )
                 
-                # Process the URL
+                # Process the URL (requests are spaced per host by the politeness limits)
                 self.process_url(url, depth)
-                
-                # Add delay between requests
-                time.sleep(self.config.CRAWL_DELAY)
             
-            # Update college's last crawl time
-            update_college_crawl_status(self.db, self.college_id)
+            # Then the documents found on the pages
+            if self.config.DOCUMENTS_ENABLED:
+                self.crawl_documents()
+            
+            # Update college's last crawl time and change history
+            change_ratio = self.changed_pages / self.compared_pages if self.compared_pages else None
+            update_college_crawl_status(self.db, self.college_id, change_ratio=change_ratio)
             
             # Update job status to completed
             update_crawl_job_status(self.db, self.job_id, 'completed')
             
             # Final update of job progress
-            update_crawl_job_progress(
-                self.db,
-                self.job_id,
-                pages_crawled=self.crawled_pages,
-                progress_percentage=100,
-                admission_pages=self.admission_pages,
-                placement_pages=self.placement_pages,
-                internship_pages=self.internship_pages,
-                other_pages=len(self.visited_urls) - (self.admission_pages + self.placement_pages + self.internship_pages)
-            )
+            self.report_progress(100, status='completed')
             
-            return True, f"Crawl completed: {self.crawled_pages} pages processed"
+            message = f"Crawl completed: {self.crawled_pages} pages and {self.crawled_documents} documents processed"
+            emit_crawl_status(self.job_id, self.college_id, 'completed', message)
+            
+            return True, message
             
         except Exception as e:
             # Update job status to failed
             update_crawl_job_status(self.db, self.job_id, 'failed', str(e))
+            emit_crawl_status(self.job_id, self.college_id, 'failed', str(e))
             logger.error(f"Crawl failed: {str(e)}", exc_info=True)
             return False, f"Crawl failed: {str(e)}"
     
+    def seed_from_sitemaps(self):
+        """
+        Queue the site's sitemap pages that are new or modified since their last fetch
+        
+        Pages whose URL suggests admission, placement or internship data come
+        first, then the most recently modified.
+        """
+        try:
+            self.sitemap_lastmod = get_sitemap_urls(self.session, self.website)
+        except Exception as e:
+            logger.warning(f"Failed to read sitemaps for {self.website}: {str(e)}")
+            return
+        
+        seeds = []
+        for url, lastmod in self.sitemap_lastmod.items():
+            if urlparse(url).netloc != self.domain:
+                continue
+            
+            state = self.url_states.get(url)
+            if state is None or self.is_modified(state, lastmod):
+                relevant = any(term in url.lower() for term in SITEMAP_PRIORITY_TERMS)
+                seeds.append((not relevant, -(lastmod.timestamp() if lastmod else 0), url))
+        
+        for _, _, url in sorted(seeds):
+            self.queue_url(url, 1)
+    
+    def queue_url(self, url, depth):
+        """
+        Queue a URL, sending documents to the document queue
+        
+        Args:
+            url: URL to queue
+            depth: Crawl depth of the URL
+        """
+        if get_document_format(url):
+            self.document_queue.append((url, depth))
+        else:
+            self.queue.append((url, depth))
+    
+    def is_modified(self, state, lastmod):
+        """
+        Check whether a sitemap lastmod is newer than a page's last fetch
+        
+        Args:
+            state: URL state document
+            lastmod: Sitemap lastmod datetime or None
+            
+        Returns:
+            True if modified, False if unmodified, None if unknown
+        """
+        if not lastmod or not state.get('last_fetched'):
+            return None
+        return lastmod > state['last_fetched']
+    
+    def should_fetch(self, url):
+        """
+        Decide whether to fetch a queued URL
+        
+        robots.txt-disallowed URLs are never fetched. Known pages are fetched
+        when their sitemap lastmod shows a change, or when they are due and
+        the sitemap doesn't show them unchanged. The homepage is always
+        fetched to discover new pages.
+        
+        Args:
+            url: URL to check
+            
+        Returns:
+            True if the URL should be fetched
+        """
+        if not can_fetch(self.session, url):
+            logger.info(f"Skipping {url}: disallowed by robots.txt")
+            return False
+        
+        state = self.url_states.get(url)
+        if not state or url == self.website:
+            return True
+        
+        modified = self.is_modified(state, self.sitemap_lastmod.get(url))
+        if modified is not None:
+            return modified
+        return is_due(state)
+    
+    def report_progress(self, progress_percentage, current_url=None, status='running'):
+        """
+        Store crawl progress and push it to live subscribers
+        
+        Args:
+            progress_percentage: Overall progress percentage
+            current_url: URL currently being processed
+            status: Job status to report alongside the progress
+        """
+        other_pages = len(self.visited_urls) - (self.admission_pages + self.placement_pages + self.internship_pages)
+        
+        update_crawl_job_progress(
+            self.db,
+            self.job_id,
+            pages_crawled=self.crawled_pages,
+            progress_percentage=progress_percentage,
+            current_url=current_url,
+            admission_pages=self.admission_pages,
+            placement_pages=self.placement_pages,
+            internship_pages=self.internship_pages,
+            other_pages=other_pages,
+            throttle=self.get_throttle_state(),
+            connections=get_connection_stats()
+        )
+        
+        # Push the in-memory counters so subscribers don't need to re-read the job
+        emit_crawl_progress(self.job_id, self.college_id, {
+            'status': status,
+            'progress_percentage': progress_percentage,
+            'pages_crawled': self.crawled_pages,
+            'current_url': current_url,
+            'admission_pages': self.admission_pages,
+            'placement_pages': self.placement_pages,
+            'internship_pages': self.internship_pages,
+            'other_pages': other_pages,
+            'throttle': self.get_throttle_state(),
+            'connections': get_connection_stats()
+        })
+    
     def process_url(self, url, depth):
         """
         Process a single URL
@@ -157,19 +318,19 @@ class CollegeCrawler:
             # Increment crawled pages counter
             self.crawled_pages += 1
             
-            # Determine the type of content
-            content_type = self.categorize_content(url, html_content)
+            # Compare with the page's previous fetch
+            state = self.url_states.get(url)
+            content_hash = compute_content_hash(html_content)
+            changed = has_changed(state, content_hash)
             
-            # Store the content in the database
-            store_raw_content(self.db, self.college_id, url, content_type, html_content)
+            # Unchanged pages keep their category and aren't stored again
+            if changed:
+                content_type = self.categorize_content(url, html_content)
+                store_raw_content(self.db, self.college_id, url, content_type, html_content)
+            else:
+                content_type = state.get('content_type') or self.categorize_content(url, html_content)
             
-            # Update category counts
-            if content_type == 'admission':
-                self.admission_pages += 1
-            elif content_type == 'placement':
-                self.placement_pages += 1
-            elif content_type == 'internship':
-                self.internship_pages += 1
+            self.record_page(url, depth, state, content_type, content_hash, changed)
             
             # If we're not at max depth, extract and queue links
             if depth < self.config.MAX_CRAWL_DEPTH:
@@ -178,16 +339,249 @@ class CollegeCrawler:
                 # Add links to queue
                 for link in links:
                     if link not in self.visited_urls:
-                        self.queue.append((link, depth + 1))
+                        self.queue_url(link, depth + 1)
             
         except Exception as e:
             logger.error(f"Error processing URL {url}: {str(e)}")
             # Don't re-raise the exception to allow the crawler to continue
     
+    def record_page(self, url, depth, state, content_type, content_hash, changed):
+        """
+        Record a fetched page or document and update the crawl's counts
+        
+        Args:
+            url: URL that was fetched
+            depth: Crawl depth of the URL
+            state: URL state from earlier crawls (None for new URLs)
+            content_type: Content category
+            content_hash: Hash of the fetched content
+            changed: Whether the content changed since the last fetch
+        """
+        # Record the fetch and schedule the next visit
+        record_fetch(self.db, self.college_id, url, content_type, content_hash, depth, state)
+        if state:
+            self.compared_pages += 1
+            if changed:
+                self.changed_pages += 1
+        
+        # Update category counts
+        if content_type == 'admission':
+            self.admission_pages += 1
+        elif content_type == 'placement':
+            self.placement_pages += 1
+        elif content_type == 'internship':
+            self.internship_pages += 1
+    
+    def crawl_documents(self):
+        """
+        Fetch the queued documents and extract their text
+        
+        Documents have lower priority than pages: they are fetched once the
+        pages are done, up to DOCUMENT_MAX_PER_COLLEGE. Each download is
+        handed to the extraction process pool, so parsing runs while the next
+        download waits for its slot; unchanged documents aren't parsed again.
+        Each extraction gets DOCUMENT_EXTRACT_TIMEOUT seconds from submission.
+        """
+        pending = []
+        
+        while self.document_queue and len(pending) + self.crawled_documents < self.config.DOCUMENT_MAX_PER_COLLEGE:
+            url, depth = self.document_queue.popleft()
+            
+            if url in self.visited_urls or url in self.skipped_urls:
+                continue
+            
+            if not self.should_fetch(url):
+                self.skipped_urls.add(url)
+                continue
+            
+            self.visited_urls.add(url)
+            self.report_progress(
+                int((self.crawled_pages / self.config.MAX_PAGES_PER_COLLEGE) * 100),
+                current_url=url
+            )
+            
+            data = self.fetch_document(url)
+            if data is None:
+                continue
+            
+            state = self.url_states.get(url)
+            content_hash = compute_content_hash(data)
+            
+            if not has_changed(state, content_hash):
+                self.crawled_documents += 1
+                self.record_page(url, depth, state, state.get('content_type') or 'general', content_hash, False)
+                continue
+            
+            # Waits while every extraction process is busy
+            try:
+                future = submit_extraction(data, get_document_format(url))
+            except Exception as e:
+                logger.warning(f"Failed to queue {url} for extraction: {str(e)}")
+                continue
+            deadline = time.monotonic() + self.config.DOCUMENT_EXTRACT_TIMEOUT
+            pending.append((url, depth, state, content_hash, future, deadline))
+        
+        for url, depth, state, content_hash, future, deadline in pending:
+            try:
+                text = wait_for_extraction(future, max(0, deadline - time.monotonic()))
+            except Exception as e:
+                logger.warning(f"Failed to extract text from {url}: {str(e)}")
+                continue
+            
+            self.crawled_documents += 1
+            
+            # Scanned documents have no text layer
+            if not text:
+                logger.info(f"No text found in {url}")
+                self.record_page(url, depth, state, 'general', content_hash, True)
+                continue
+            
+            content_type = self.categorize_content(url, text)
+            store_raw_content(self.db, self.college_id, url, content_type, text, content_format=get_document_format(url))
+            self.record_page(url, depth, state, content_type, content_hash, True)
+    
+    def fetch_document(self, url):
+        """
+        Download a linked document
+        
+        Args:
+            url: URL of the document
+            
+        Returns:
+            Document bytes, or None if the download failed, was too large or
+            isn't the expected format
+        """
+        try:
+            response = self.request_url(url)
+            if response is None:
+                return None
+            
+            try:
+                if response.status_code != 200:
+                    logger.warning(f"Failed to fetch {url}: HTTP {response.status_code}")
+                    return None
+                
+                content_length = get_content_length(response)
+                if content_length is not None and content_length > self.config.DOCUMENT_MAX_BYTES:
+                    logger.info(f"Skipping {url}: {content_length} bytes exceeds the document size limit")
+                    return None
+                
+                data = read_bytes(response, self.config.DOCUMENT_MAX_BYTES, self.config.FETCH_CHUNK_SIZE)
+            finally:
+                response.close()
+            
+            if data is None:
+                logger.warning(f"Aborted download of {url}: exceeds {self.config.DOCUMENT_MAX_BYTES} bytes")
+                return None
+            
+            # Error and login pages are often served under document URLs
+            if not is_document(data, get_document_format(url)):
+                logger.info(f"Skipping {url}: not a {get_document_format(url)} file")
+                return None
+            
+            return data
+            
+        except requests.RequestException as e:
+            logger.warning(f"Request error for {url}: {str(e)}")
+            return None
+    
+    def request_url(self, url):
+        """
+        Send a GET request, retrying transient failures
+        
+        Each attempt waits for the host's adaptive request interval (never
+        shorter than its robots.txt Crawl-delay) and feeds the outcome back
+        to the throttle. Overload responses (429, 5xx), timeouts and
+        connection errors are retried after a jittered exponential backoff,
+        or after the host's Retry-After.
+        
+        The body is streamed: only the headers have been read when the
+        response is returned, and the caller must close it.
+        
+        Args:
+            url: URL to fetch
+            
+        Returns:
+            Response, or None if every attempt failed
+        """
+        crawl_delay = get_crawl_delay(self.session, url)
+        
+        for attempt in range(self.config.FETCH_RETRIES + 1):
+            wait_for_host(url, get_host_delay(url, crawl_delay))
+            started = time.monotonic()
+            
+            try:
+                response = self.session.get(
+                    url, 
+                    timeout=self.config.REQUEST_TIMEOUT,
+                    allow_redirects=True,
+                    stream=True
+                )
+            except (requests.Timeout, requests.ConnectionError) as e:
+                delay = record_response(url)
+                self.record_throttle(url, None, None, delay, attempt)
+                logger.warning(f"Request error for {url} (attempt {attempt + 1}): {str(e)}")
+            else:
+                latency = time.monotonic() - started
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = record_response(url, response.status_code, latency, retry_after)
+                self.record_throttle(url, response.status_code, latency, delay, attempt)
+                
+                if response.status_code not in THROTTLE_STATUS_CODES:
+                    return response
+                response.close()
+                logger.warning(f"Host overloaded fetching {url} (attempt {attempt + 1}): HTTP {response.status_code}")
+            
+            if attempt < self.config.FETCH_RETRIES:
+                # Full jitter, so retries from different jobs don't line up
+                time.sleep(random.uniform(0, self.config.FETCH_RETRY_BACKOFF * 2 ** attempt))
+        
+        return None
+    
+    def record_throttle(self, url, status_code, latency, delay, attempt):
+        """
+        Update this job's throttling statistics for a URL's host
+        
+        Args:
+            url: URL that was requested
+            status_code: HTTP status code (None if the request failed)
+            latency: Seconds until the response arrived (None if it failed)
+            delay: The host's request interval after this response
+            attempt: Attempt number (0 for the first try)
+        """
+        stats = self.throttle.setdefault(urlparse(url).netloc, {
+            'requests': 0, 'errors': 0, 'throttled': 0, 'retries': 0,
+            'avg_latency': None, 'delay': delay
+        })
+        
+        stats['requests'] += 1
+        stats['delay'] = round(delay, 3)
+        if attempt:
+            stats['retries'] += 1
+        if status_code is None or status_code >= 500:
+            stats['errors'] += 1
+        elif status_code == 429:
+            stats['throttled'] += 1
+        if latency is not None:
+            previous = stats['avg_latency']
+            stats['avg_latency'] = round(latency if previous is None else 0.8 * previous + 0.2 * latency, 3)
+    
+    def get_throttle_state(self):
+        """
+        Get this job's throttling statistics
+        
+        Returns:
+            List of per-host dictionaries (host names can't be used as field names)
+        """
+        return [{'host': host, **stats} for host, stats in self.throttle.items()]
+    
     def fetch_url(self, url):
         """
         Fetch content from a URL
         
+        The status and headers are checked before any of the body is read,
+        and the download is aborted once it passes FETCH_MAX_BYTES.
+        
         Args:
             url: URL to fetch
             
@@ -195,24 +589,37 @@ class CollegeCrawler:
             Tuple of (content, success)
         """
         try:
-            response = self.session.get(
-                url, 
-                timeout=self.config.REQUEST_TIMEOUT,
-                allow_redirects=True
-            )
-            
-            # Check if request was successful
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch {url}: HTTP {response.status_code}")
-                return None, False
-            
-            # Check content type
-            content_type = response.headers.get('Content-Type', '')
-            if 'text/html' not in content_type.lower():
-                logger.info(f"Skipping non-HTML content at {url}: {content_type}")
+            response = self.request_url(url)
+            if response is None:
                 return None, False
             
-            return response.text, True
+            try:
+                # Check if request was successful
+                if response.status_code != 200:
+                    logger.warning(f"Failed to fetch {url}: HTTP {response.status_code}")
+                    return None, False
+                
+                # Check content type
+                content_type = response.headers.get('Content-Type', '')
+                if not any(html_type in content_type.lower() for html_type in HTML_CONTENT_TYPES):
+                    logger.info(f"Skipping non-HTML content at {url}: {content_type}")
+                    return None, False
+                
+                # Check the declared size, then the actual size while reading
+                content_length = get_content_length(response)
+                if content_length is not None and content_length > self.config.FETCH_MAX_BYTES:
+                    logger.info(f"Skipping {url}: {content_length} bytes exceeds the size limit")
+                    return None, False
+                
+                html_content = read_text(response, self.config.FETCH_MAX_BYTES, self.config.FETCH_CHUNK_SIZE)
+                if html_content is None:
+                    logger.warning(f"Aborted download of {url}: exceeds {self.config.FETCH_MAX_BYTES} bytes")
+                    return None, False
+                
+                return html_content, True
+            finally:
+                # Returns the connection to the pool, or drops it if the body wasn't read
+                response.close()
             
         except requests.RequestException as e:
             logger.warning(f"Request error for {url}: {str(e)}")
@@ -251,8 +658,9 @@ class CollegeCrawler:
                 # Remove fragments
                 clean_url = absolute_url.split('#')[0]
                 
-                # Skip common file types we don't want to process
-                if not clean_url.endswith(('.pdf', '.doc', '.docx', '.ppt', '.pptx', '.jpg', '.jpeg', '.png', '.gif')):
+                # Skip common file types we don't want to process (PDF, DOCX
+                # and PPTX links are kept for the document queue)
+                if not clean_url.endswith(('.doc', '.ppt', '.jpg', '.jpeg', '.png', '.gif')):
                     links.append(clean_url)
         
         return links
@@ -360,34 +768,30 @@ def start_college_crawl(college_id, triggered_by=None):
     
     return job_id, "Crawl job created and queued"
 
-def get_crawl_status(job_id):
+def get_crawl_status(job_id, fields=None):
     """
     Get the status of a crawl job
     
     Args:
         job_id: ID of the crawl job
+        fields: Named field set from models.projections (optional, full document by default)
         
     Returns:
         Crawl job status information
     """
     db = get_db()
-    return get_crawl_job_by_id(db, job_id)
+    return get_crawl_job_by_id(db, job_id, fields)
 
-def get_crawl_progress(job_id):
+def build_crawl_progress(job):
     """
-    Get the progress of a crawl job
+    Build the progress dictionary from an already loaded crawl job
     
     Args:
-        job_id: ID of the crawl job
+        job: Crawl job document
         
     Returns:
         Dictionary with progress information
     """
-    job = get_crawl_status(job_id)
-    
-    if not job:
-        return None
-    
     return {
         'status': job.get('status'),
         'progress_percentage': job.get('progress_percentage', 0),
@@ -397,4 +801,6 @@ def get_crawl_progress(job_id):
         'placement_pages': job.get('crawling_stats', {}).get('placement_pages', 0),
         'internship_pages': job.get('crawling_stats', {}).get('internship_pages', 0),
         'other_pages': job.get('crawling_stats', {}).get('other_pages', 0),
-    }
\ No newline at end of file
+        'throttle': job.get('throttle', []),
+        'connections': job.get('connections', {}),
+    }
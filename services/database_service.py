@@ -3,19 +3,35 @@ Database service for managing college data and imports/exports
 """
 import json
 import csv
+import io
 import os
+import gzip
+import time
 import logging
+import threading
+import ijson
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from bson import ObjectId
+from bson import json_util
+from pymongo import ReplaceOne, UpdateOne
+from config import get_config
 from models import get_db
 from models.college import (
-    bulk_import_colleges, get_colleges, count_colleges,
+    bulk_import_colleges, backfill_website_keys, create_website_key_index,
+    get_colleges, iter_colleges, count_colleges,
     get_summary_stats as get_college_summary_stats,
     get_states_list
 )
+from models.pagination import split_page, get_nested_value
+from models.projections import get_projection
 from models.raw_content import get_raw_content_stats
-from models.admission_data import get_admission_data_stats
-from models.placement_data import get_placement_stats_by_year
+from models.admission_data import get_admission_data_stats, normalize_admission_data
+from models.placement_data import get_placement_stats_by_year, normalize_placement_data
+from models.placement_rollup import rebuild_placement_rollups
+from models.internship_data import normalize_internship_data
+from models.company import assign_company_ids
+from models.merge import prepare_items
 from models.crawl_job import get_crawl_job_stats
 from models.ai_processing_job import get_ai_processing_stats
 
@@ -26,7 +42,68 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def get_colleges_paginated(page=1, per_page=20, filters=None, sort_by='name', sort_order=1):
+# Cached dashboard statistics shared by all request threads
+stats_cache = {
+    'value': None,
+    'expires_at': 0
+}
+
+# Ensures only one thread recomputes the statistics at a time
+stats_refresh_lock = threading.Lock()
+
+# Cached college counts keyed by filters, as {key: (count, expires_at)},
+# oldest first; filter values come from requests, so the size is capped
+college_count_cache = OrderedDict()
+college_count_cache_lock = threading.Lock()
+
+# Most filter combinations kept in the college count cache
+COLLEGE_COUNT_CACHE_SIZE = 256
+
+# Collections included in backups, with the fields that record when a
+# document last changed (used to select documents for incremental backups)
+BACKUP_COLLECTIONS = {
+    'colleges': ['created_at', 'updated_at', 'last_crawled'],
+    'raw_content': ['extraction_date', 'last_processing_attempt'],
+    'admission_data': ['last_updated'],
+    'placement_data': ['last_updated'],
+    'internship_data': ['last_updated'],
+    'companies': ['created_at', 'updated_at'],
+    'url_states': ['first_seen', 'last_fetched'],
+    'crawl_jobs': ['timestamps.created', 'timestamps.started', 'timestamps.completed'],
+    'ai_processing_jobs': ['timestamps.created', 'timestamps.started', 'timestamps.completed'],
+    'users': ['created_at', 'updated_at', 'last_login']
+}
+
+# Name of the file describing a backup
+BACKUP_MANIFEST = 'manifest.json'
+
+# Columns written by CSV college exports (dotted names are nested fields)
+COLLEGE_EXPORT_FIELDS = [
+    '_id', 'name', 'website', 'type', 'state', 'status',
+    'location.city', 'location.address', 'contact_info.phone', 'contact_info.email',
+    'established_year', 'affiliations', 'accreditations',
+    'last_crawled', 'created_at', 'updated_at'
+]
+
+# Size in characters of the chunks yielded by streaming exports
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Structured data collections with their normalizer and the fields it rewrites
+NORMALIZED_COLLECTIONS = {
+    'placement_data': (normalize_placement_data,
+                       ['overall_statistics', 'department_statistics', 'recruiting_companies']),
+    'internship_data': (normalize_internship_data,
+                        ['overall_statistics', 'department_statistics', 'internship_companies']),
+    'admission_data': (normalize_admission_data, ['courses', 'hostel_facilities'])
+}
+
+# Collections with embedded company entries, as (company list field, college list field on companies)
+COMPANY_COLLECTIONS = {
+    'placement_data': ('recruiting_companies', 'colleges'),
+    'internship_data': ('internship_companies', 'internship_colleges')
+}
+
+def get_colleges_paginated(page=1, per_page=20, filters=None, sort_by='name', sort_order=1, cursor=None):
     """
     Get paginated list of colleges with optional filtering and sorting
     
@@ -36,6 +113,7 @@ def get_colleges_paginated(page=1, per_page=20, filters=None, sort_by='name', so
         filters: Dictionary of filter conditions
         sort_by: Field to sort by
         sort_order: Sort order (1 for ascending, -1 for descending)
+        cursor: Opaque cursor from a previous page's next_cursor (optional)
         
     Returns:
         Dictionary with colleges list and pagination info
@@ -43,11 +121,12 @@ def get_colleges_paginated(page=1, per_page=20, filters=None, sort_by='name', so
     db = get_db()
     skip = (page - 1) * per_page
     
-    # Get colleges
-    colleges = get_colleges(db, filters, skip, per_page, sort_by, sort_order)
+    # Get colleges, fetching one extra to know whether there is a next page
+    colleges = get_colleges(db, filters, skip, per_page + 1, sort_by, sort_order, cursor)
+    colleges, next_cursor = split_page(colleges, sort_by, per_page)
     
-    # Count total matching colleges
-    total = count_colleges(db, filters)
+    # Count total matching colleges (cached, approximate for large results)
+    total = count_colleges_cached(db, filters)
     
     # Calculate pagination info
     total_pages = (total + per_page - 1) // per_page  # Ceiling division
@@ -60,82 +139,224 @@ def get_colleges_paginated(page=1, per_page=20, filters=None, sort_by='name', so
             'total': total,
             'total_pages': total_pages,
             'has_prev': page > 1,
-            'has_next': page < total_pages
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor
         }
     }
 
-def import_colleges_from_file(file_path, college_type=None):
+def count_colleges_cached(db, filters=None):
+    """
+    Count colleges matching the filters, caching the result for STATS_CACHE_TTL
+    
+    At most COLLEGE_COUNT_CACHE_SIZE filter combinations are cached; expired
+    entries are dropped first, then the oldest.
+    
+    Args:
+        db: Database connection
+        filters: Dictionary of filter conditions
+        
+    Returns:
+        Count of matching colleges
+    """
+    key = tuple(sorted((k, str(v)) for k, v in (filters or {}).items() if v))
+    now = time.time()
+    
+    cached = college_count_cache.get(key)
+    if cached and now < cached[1]:
+        return cached[0]
+    
+    total = count_colleges(db, filters)
+    
+    with college_count_cache_lock:
+        if len(college_count_cache) >= COLLEGE_COUNT_CACHE_SIZE:
+            for expired in [k for k, (_, expires_at) in college_count_cache.items() if expires_at <= now]:
+                del college_count_cache[expired]
+        
+        # Still full: drop the oldest entries
+        while len(college_count_cache) >= COLLEGE_COUNT_CACHE_SIZE:
+            college_count_cache.popitem(last=False)
+        
+        college_count_cache.pop(key, None)
+        college_count_cache[key] = (total, now + get_config().STATS_CACHE_TTL)
+    
+    return total
+
+def iter_import_rows(file_path):
+    """
+    Stream college rows from a JSON or CSV file
+    
+    JSON files must contain a list of colleges and are parsed incrementally,
+    so only one college is held in memory at a time.
+    
+    Args:
+        file_path: Path to the file
+        
+    Yields:
+        College dictionaries
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+    
+    if file_ext == '.json':
+        with open(file_path, 'rb') as f:
+            for item in ijson.items(f, 'item', use_float=True):
+                yield item
+    elif file_ext in ['.csv', '.txt']:
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            # Try to detect the dialect
+            dialect = csv.Sniffer().sniff(f.read(1024))
+            f.seek(0)
+            
+            for row in csv.DictReader(f, dialect=dialect):
+                yield row
+    else:
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+def import_colleges_from_file(file_path, college_type=None, progress_callback=None):
     """
     Import colleges from a JSON or CSV file
     
+    Rows are streamed from the file and written in unordered batches of
+    IMPORT_BATCH_SIZE upserts keyed by normalized website, so memory use is
+    flat and re-importing a file updates colleges instead of duplicating them.
+    
     Args:
         file_path: Path to the file
         college_type: Default college type if not specified in file
+        progress_callback: Called as progress_callback(rows, inserted, updated)
+            after each batch (optional)
         
     Returns:
         Tuple of (success status, message, count of imported colleges)
     """
     db = get_db()
+    config = get_config()
     
-    try:
-        file_ext = os.path.splitext(file_path)[1].lower()
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext not in ['.json', '.csv', '.txt']:
+        return False, f"Unsupported file format: {file_ext}", 0
+    
+    rows = 0
+    inserted = 0
+    updated = 0
+    
+    def flush(batch):
+        nonlocal inserted, updated
+        batch_inserted, batch_updated = bulk_import_colleges(db, batch)
+        inserted += batch_inserted
+        updated += batch_updated
         
-        if file_ext == '.json':
-            # Import from JSON
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        logger.info(f"Imported {rows} rows from {file_path} ({inserted} new, {updated} updated)")
+        if progress_callback:
+            progress_callback(rows, inserted, updated)
+    
+    try:
+        batch = []
+        for item in iter_import_rows(file_path):
+            # Check required fields
+            if not isinstance(item, dict) or not item.get('name') or not item.get('website'):
+                continue
             
-            # Validate structure
-            if not isinstance(data, list):
-                return False, "JSON file must contain a list of colleges", 0
+            # Set default type if not specified
+            if not item.get('type') and college_type:
+                item['type'] = college_type
             
-            # Process data
-            colleges_data = []
-            for item in data:
-                if not isinstance(item, dict) or 'name' not in item or 'website' not in item:
-                    continue
-                
-                # Set default type if not specified
-                if 'type' not in item and college_type:
-                    item['type'] = college_type
-                
-                colleges_data.append(item)
+            batch.append(item)
+            rows += 1
             
-        elif file_ext in ['.csv', '.txt']:
-            # Import from CSV
-            colleges_data = []
-            with open(file_path, 'r', encoding='utf-8') as f:
-                # Try to detect the dialect
-                dialect = csv.Sniffer().sniff(f.read(1024))
-                f.seek(0)
-                
-                # Read CSV
-                reader = csv.DictReader(f, dialect=dialect)
-                
-                for row in reader:
-                    # Check required fields
-                    if 'name' not in row or 'website' not in row:
-                        continue
-                    
-                    # Set default type if not specified
-                    if ('type' not in row or not row['type']) and college_type:
-                        row['type'] = college_type
-                    
-                    colleges_data.append(row)
-        else:
-            return False, f"Unsupported file format: {file_ext}", 0
+            if len(batch) >= config.IMPORT_BATCH_SIZE:
+                flush(batch)
+                batch = []
+        
+        if batch:
+            flush(batch)
         
-        if not colleges_data:
+        if not rows:
             return False, "No valid college data found in file", 0
         
-        # Import colleges to database
-        count = bulk_import_colleges(db, colleges_data)
+        invalidate_database_statistics()
         
-        return True, f"Successfully imported {count} colleges", count
+        count = inserted + updated
+        return True, f"Successfully imported {count} colleges ({inserted} new, {updated} updated)", count
         
+    except ijson.JSONError as e:
+        logger.error(f"Invalid JSON in {file_path}: {str(e)}")
+        return False, f"JSON file must contain a list of colleges: {str(e)}", inserted + updated
     except Exception as e:
         logger.error(f"Error importing colleges: {str(e)}", exc_info=True)
-        return False, f"Error importing colleges: {str(e)}", 0
+        return False, f"Error importing colleges: {str(e)}", inserted + updated
+
+def format_export_value(value):
+    """
+    Format a document value for a CSV cell
+    
+    Args:
+        value: Field value
+        
+    Returns:
+        String value
+    """
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return '; '.join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def generate_college_export(export_format, college_ids=None):
+    """
+    Stream colleges as CSV or JSON text chunks
+    
+    Rows are written as the cursor yields them, so memory use does not grow
+    with the number of colleges. CSV columns come from COLLEGE_EXPORT_FIELDS.
+    
+    Args:
+        export_format: 'csv' or 'json'
+        college_ids: List of college IDs to export (None for all)
+        
+    Yields:
+        Chunks of export text
+    """
+    db = get_db()
+    
+    filters = {'ids': college_ids} if college_ids else None
+    colleges = iter_colleges(db, filters, get_projection('colleges', 'export'))
+    
+    buffer = io.StringIO()
+    
+    if export_format == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(COLLEGE_EXPORT_FIELDS)
+        
+        for college in colleges:
+            writer.writerow([format_export_value(get_nested_value(college, field))
+                             for field in COLLEGE_EXPORT_FIELDS])
+            
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    else:
+        buffer.write('[')
+        first = True
+        
+        for college in colleges:
+            if not first:
+                buffer.write(',')
+            first = False
+            
+            college['_id'] = str(college['_id'])
+            buffer.write('\n  ')
+            buffer.write(json.dumps(college, default=format_export_value, ensure_ascii=False))
+            
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        buffer.write('\n]\n')
+    
+    yield buffer.getvalue()
 
 def export_colleges_to_file(file_path, college_ids=None):
     """
@@ -151,57 +372,78 @@ def export_colleges_to_file(file_path, college_ids=None):
     db = get_db()
     
     try:
-        # Get colleges
-        filters = None
-        if college_ids:
-            # Convert string IDs to ObjectId
-            object_ids = [ObjectId(id) if isinstance(id, str) else id for id in college_ids]
-            filters = {'_id': {'$in': object_ids}}
-        
-        colleges = get_colleges(db, filters, 0, 0)  # No pagination
-        
-        if not colleges:
-            return False, "No colleges found to export", 0
-        
-        # Process colleges for export (convert ObjectId to string)
-        export_data = []
-        for college in colleges:
-            college_dict = dict(college)
-            college_dict['_id'] = str(college_dict['_id'])
-            export_data.append(college_dict)
-        
         # Determine export format from file extension
         file_ext = os.path.splitext(file_path)[1].lower()
         
         if file_ext == '.json':
-            # Export to JSON
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            export_format = 'json'
         elif file_ext in ['.csv', '.txt']:
-            # Export to CSV
-            # Determine fields to export
-            fields = set()
-            for college in export_data:
-                fields.update(college.keys())
-            
-            fields = sorted(list(fields))
-            
-            with open(file_path, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fields)
-                writer.writeheader()
-                writer.writerows(export_data)
+            export_format = 'csv'
         else:
             return False, f"Unsupported file format: {file_ext}", 0
         
-        return True, f"Successfully exported {len(export_data)} colleges to {file_path}", len(export_data)
+        count = count_colleges(db, {'ids': college_ids} if college_ids else None)
+        
+        if not count:
+            return False, "No colleges found to export", 0
+        
+        with open(file_path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in generate_college_export(export_format, college_ids):
+                f.write(chunk)
+        
+        return True, f"Successfully exported {count} colleges to {file_path}", count
         
     except Exception as e:
         logger.error(f"Error exporting colleges: {str(e)}", exc_info=True)
         return False, f"Error exporting colleges: {str(e)}", 0
 
-def get_database_statistics():
+def get_database_statistics(force_refresh=False):
     """
-    Get statistics about the database
+    Get statistics about the database, served from a TTL cache
+    
+    Only one thread recomputes expired statistics; concurrent callers keep
+    getting the previous value until the refresh finishes.
+    
+    Args:
+        force_refresh: Recompute the statistics even if the cache is fresh
+        
+    Returns:
+        Dictionary with database statistics
+    """
+    cached = stats_cache['value']
+    if cached is not None and not force_refresh and time.time() < stats_cache['expires_at']:
+        return cached
+    
+    # Serve stale statistics while another thread is refreshing them
+    if not stats_refresh_lock.acquire(blocking=cached is None):
+        return cached
+    
+    try:
+        # Another thread may have refreshed the cache while we waited
+        if stats_cache['value'] is not cached and not force_refresh:
+            return stats_cache['value']
+        
+        stats = compute_database_statistics()
+        
+        stats_cache['value'] = stats
+        stats_cache['expires_at'] = time.time() + get_config().STATS_CACHE_TTL
+        
+        return stats
+    finally:
+        stats_refresh_lock.release()
+
+def invalidate_database_statistics():
+    """
+    Invalidate cached database statistics and college counts so the next
+    call recomputes them
+    """
+    stats_cache['expires_at'] = 0
+    with college_count_cache_lock:
+        college_count_cache.clear()
+
+def compute_database_statistics():
+    """
+    Compute statistics about the database
     
     Returns:
         Dictionary with database statistics
@@ -242,64 +484,375 @@ def get_college_filter_options():
         'types': types
     }
 
-def backup_database(backup_dir):
+def build_incremental_query(collection_name, since):
+    """
+    Build the filter selecting documents changed since a timestamp
+    
+    Args:
+        collection_name: Name of the collection
+        since: Datetime of the previous backup, or None for everything
+        
+    Returns:
+        Query dictionary
+    """
+    if since is None:
+        return {}
+    
+    return {'$or': [{field: {'$gte': since}} for field in BACKUP_COLLECTIONS[collection_name]]}
+
+def backup_collection(db, collection_name, file_path, since=None, batch_size=1000):
+    """
+    Stream one collection to a gzip'd JSON Lines file
+    
+    Args:
+        db: Database connection
+        collection_name: Name of the collection
+        file_path: Path to the output file
+        since: Only back up documents changed since this datetime (optional)
+        batch_size: Number of documents fetched per round trip
+        
+    Returns:
+        Number of documents written
+    """
+    query = build_incremental_query(collection_name, since)
+    count = 0
+    
+    with gzip.open(file_path, 'wt', encoding='utf-8') as f:
+        for doc in db[collection_name].find(query, batch_size=batch_size):
+            f.write(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS))
+            f.write('\n')
+            count += 1
+    
+    logger.info(f"Backed up {count} documents from {collection_name} to {file_path}")
+    return count
+
+def get_last_backup_time(backup_dir):
+    """
+    Get the start time of the most recent backup in a directory
+    
+    Args:
+        backup_dir: Directory containing backups
+        
+    Returns:
+        Datetime the latest backup started, or None if there are no backups
+    """
+    if not os.path.isdir(backup_dir):
+        return None
+    
+    latest = None
+    for name in os.listdir(backup_dir):
+        manifest_path = os.path.join(backup_dir, name, BACKUP_MANIFEST)
+        if not os.path.isfile(manifest_path):
+            continue
+        
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            started_at = json_util.loads(f.read()).get('started_at')
+        
+        if started_at and (latest is None or started_at > latest):
+            latest = started_at
+    
+    return latest
+
+def backup_database(backup_dir, since=None):
     """
     Create a backup of the database
     
+    Each collection is streamed in batches to its own gzip'd JSON Lines file
+    (extended JSON, so ObjectIds and dates round-trip), with collections
+    backed up in parallel. A manifest records what the backup contains.
+    
+    Incremental backups only contain documents created or updated since the
+    given time; they can't capture deletions. Documents deleted after the
+    full backup reappear when it and its incremental backups are restored,
+    so take a new full backup after deleting data.
+    
     Args:
         backup_dir: Directory to store the backup
+        since: Only back up documents changed since this datetime (optional)
         
     Returns:
         Tuple of (success status, message)
     """
     try:
-        # Ensure backup directory exists
-        os.makedirs(backup_dir, exist_ok=True)
+        config = get_config()
+        started_at = datetime.utcnow()
         
-        # Generate timestamp for backup files
+        # Each backup gets its own directory
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = os.path.join(backup_dir, f"backup_{timestamp}")
+        os.makedirs(backup_path, exist_ok=True)
         
         # Get database
         db = get_db()
         
-        # Get collections to backup
-        collections = [
-            'colleges', 'raw_content', 'admission_data', 'placement_data', 
-            'internship_data', 'crawl_jobs', 'ai_processing_jobs', 'users'
-        ]
+        with ThreadPoolExecutor(max_workers=config.BACKUP_WORKERS) as executor:
+            futures = {
+                collection_name: executor.submit(
+                    backup_collection, db, collection_name,
+                    os.path.join(backup_path, f"{collection_name}.jsonl.gz"),
+                    since, config.BACKUP_BATCH_SIZE
+                )
+                for collection_name in BACKUP_COLLECTIONS
+            }
+            counts = {collection_name: future.result() for collection_name, future in futures.items()}
+        
+        # Write the manifest last so partial backups are never picked up
+        manifest = {
+            'database': db.name,
+            'started_at': started_at,
+            'completed_at': datetime.utcnow(),
+            'since': since,
+            'collections': counts
+        }
+        with open(os.path.join(backup_path, BACKUP_MANIFEST), 'w', encoding='utf-8') as f:
+            f.write(json_util.dumps(manifest, indent=2))
+        
+        kind = 'incremental' if since else 'full'
+        return True, f"Successfully created {kind} backup of {sum(counts.values())} documents in {backup_path}"
+        
+    except Exception as e:
+        logger.error(f"Error backing up database: {str(e)}", exc_info=True)
+        return False, f"Error backing up database: {str(e)}"
+
+def restore_collection(db, collection_name, file_path, batch_size=1000):
+    """
+    Stream a gzip'd JSON Lines file back into a collection
+    
+    Documents are upserted by _id, so incremental backups can be restored
+    on top of the full backup they were taken after. Documents deleted since
+    the full backup are not removed.
+    
+    Args:
+        db: Database connection
+        collection_name: Name of the collection
+        file_path: Path to the backup file
+        batch_size: Number of documents written per bulk operation
+        
+    Returns:
+        Number of documents restored
+    """
+    collection = db[collection_name]
+    count = 0
+    operations = []
+    
+    with gzip.open(file_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            
+            doc = json_util.loads(line)
+            operations.append(ReplaceOne({'_id': doc['_id']}, doc, upsert=True))
+            
+            if len(operations) >= batch_size:
+                collection.bulk_write(operations, ordered=False)
+                count += len(operations)
+                operations = []
+    
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+        count += len(operations)
+    
+    logger.info(f"Restored {count} documents to {collection_name} from {file_path}")
+    return count
+
+def restore_database(backup_path, drop=False):
+    """
+    Restore the database from a backup created by backup_database()
+    
+    Args:
+        backup_path: Directory of the backup to restore
+        drop: Remove existing documents before restoring (full backups only)
+        
+    Returns:
+        Tuple of (success status, message)
+    """
+    try:
+        config = get_config()
+        
+        manifest_path = os.path.join(backup_path, BACKUP_MANIFEST)
+        if not os.path.isfile(manifest_path):
+            return False, f"No backup manifest found in {backup_path}"
+        
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json_util.loads(f.read())
+        
+        if drop and manifest.get('since'):
+            return False, "Cannot drop existing data when restoring an incremental backup"
+        
+        db = get_db()
+        collection_names = [name for name in manifest['collections'] if name in BACKUP_COLLECTIONS]
+        
+        if drop:
+            # Clear documents but keep the indexes
+            for collection_name in collection_names:
+                db[collection_name].delete_many({})
+        
+        with ThreadPoolExecutor(max_workers=config.BACKUP_WORKERS) as executor:
+            futures = {
+                collection_name: executor.submit(
+                    restore_collection, db, collection_name,
+                    os.path.join(backup_path, f"{collection_name}.jsonl.gz"),
+                    config.BACKUP_BATCH_SIZE
+                )
+                for collection_name in collection_names
+            }
+            counts = {collection_name: future.result() for collection_name, future in futures.items()}
         
-        for collection_name in collections:
-            # Get collection data
+        invalidate_database_statistics()
+        
+        return True, f"Successfully restored {sum(counts.values())} documents from {backup_path}"
+        
+    except Exception as e:
+        logger.error(f"Error restoring database: {str(e)}", exc_info=True)
+        return False, f"Error restoring database: {str(e)}"
+
+def migrate_website_keys(batch_size=1000):
+    """
+    Set website_key on colleges created before it was stored, then create its unique index
+    
+    Run once on databases created before website keys existed, so imports
+    match those colleges instead of duplicating them.
+    
+    Args:
+        batch_size: Number of colleges updated per bulk operation
+        
+    Returns:
+        Tuple of (success status, message)
+    """
+    db = get_db()
+    
+    try:
+        updated, duplicates = backfill_website_keys(db, batch_size)
+        if not create_website_key_index(db):
+            return False, f"Set website keys on {updated} colleges but could not create the unique website_key index"
+        
+        message = f"Set website keys on {updated} colleges"
+        if duplicates:
+            message += f"; {duplicates} colleges share a website with another college and were left without a key"
+        return True, message
+    
+    except Exception as e:
+        logger.error(f"Error migrating website keys: {str(e)}")
+        return False, f"Error migrating website keys: {str(e)}"
+
+def normalize_structured_data(batch_size=500):
+    """
+    Recompute the canonical numeric fields of all stored structured data
+    
+    Used to backfill documents stored before numeric normalization existed,
+    or after the parsing rules change.
+    
+    Args:
+        batch_size: Number of documents updated per bulk operation
+        
+    Returns:
+        Tuple of (success status, message)
+    """
+    db = get_db()
+    
+    try:
+        total = 0
+        for collection_name, (normalize, fields) in NORMALIZED_COLLECTIONS.items():
             collection = db[collection_name]
-            data = list(collection.find())
+            projection = {field: 1 for field in fields}
+            operations = []
             
-            # Convert ObjectId to string for JSON serialization
-            for item in data:
-                item['_id'] = str(item['_id'])
+            for doc in collection.find({}, projection, batch_size=batch_size):
+                normalize(doc)
+                update_data = {field: doc[field] for field in fields if field in doc}
+                update_data['last_updated'] = datetime.utcnow()
+                operations.append(UpdateOne({'_id': doc['_id']}, {'$set': update_data}))
                 
-                # Also convert other ObjectId fields
-                for key, value in item.items():
-                    if isinstance(value, ObjectId):
-                        item[key] = str(value)
-                    
-                    # Check for ObjectId in nested dictionaries
-                    elif isinstance(value, dict):
-                        for k, v in value.items():
-                            if isinstance(v, ObjectId):
-                                value[k] = str(v)
+                if len(operations) >= batch_size:
+                    collection.bulk_write(operations, ordered=False)
+                    total += len(operations)
+                    operations = []
             
-            # Write to backup file
-            file_path = os.path.join(backup_dir, f"{collection_name}_{timestamp}.json")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            if operations:
+                collection.bulk_write(operations, ordered=False)
+                total += len(operations)
             
-            logger.info(f"Backed up {len(data)} documents from {collection_name} to {file_path}")
+            logger.info(f"Normalized numeric fields in {collection_name}")
         
-        return True, f"Successfully backed up database to {backup_dir}"
+        # Rollups average the numeric fields that were just rewritten
+        rebuild_placement_rollups(db)
+        invalidate_database_statistics()
+        
+        return True, f"Successfully normalized {total} documents"
         
     except Exception as e:
-        logger.error(f"Error backing up database: {str(e)}", exc_info=True)
-        return False, f"Error backing up database: {str(e)}"
+        logger.error(f"Error normalizing structured data: {str(e)}", exc_info=True)
+        return False, f"Error normalizing structured data: {str(e)}"
+
+def canonicalize_company_data(batch_size=500):
+    """
+    Resolve the company names of all stored structured data to canonical companies
+    
+    Sets company_id and company_name on every company entry, merges entries
+    that turn out to be the same company, rebuilds the college lists of the
+    companies collection and rebuilds the placement rollups. Used to
+    backfill documents stored before canonicalization, or after aliases change.
+    
+    Args:
+        batch_size: Number of documents updated per bulk operation
+        
+    Returns:
+        Tuple of (success status, message)
+    """
+    db = get_db()
+    
+    try:
+        total = 0
+        college_lists = {field: {} for _, field in COMPANY_COLLECTIONS.values()}
+        
+        for collection_name, (companies_field, colleges_field) in COMPANY_COLLECTIONS.items():
+            collection = db[collection_name]
+            operations = []
+            
+            for doc in collection.find({}, {'college_id': 1, companies_field: 1}, batch_size=batch_size):
+                companies = assign_company_ids(db, prepare_items(doc.get(companies_field), 'name'))
+                
+                # Merge entries of the same company, keeping values from every spelling
+                merged = {}
+                for company in companies:
+                    merged.setdefault(company['company_id'], {}).update(company)
+                    college_lists[colleges_field].setdefault(company['company_id'], set()).add(doc['college_id'])
+                
+                operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {
+                    companies_field: list(merged.values()),
+                    'last_updated': datetime.utcnow()
+                }}))
+                
+                if len(operations) >= batch_size:
+                    collection.bulk_write(operations, ordered=False)
+                    total += len(operations)
+                    operations = []
+            
+            if operations:
+                collection.bulk_write(operations, ordered=False)
+                total += len(operations)
+            
+            logger.info(f"Canonicalized company names in {collection_name}")
+        
+        # Replace the college lists with the ones just collected
+        db.companies.update_many({}, {'$set': {field: [] for field in college_lists}})
+        operations = [
+            UpdateOne({'_id': company_id}, {'$set': {field: list(college_ids)}})
+            for field, colleges in college_lists.items()
+            for company_id, college_ids in colleges.items()
+        ]
+        for start in range(0, len(operations), batch_size):
+            db.companies.bulk_write(operations[start:start + batch_size], ordered=False)
+        
+        # Company rollups are keyed by company ID
+        rebuild_placement_rollups(db)
+        invalidate_database_statistics()
+        
+        return True, f"Successfully canonicalized companies in {total} documents"
+        
+    except Exception as e:
+        logger.error(f"Error canonicalizing company data: {str(e)}", exc_info=True)
+        return False, f"Error canonicalizing company data: {str(e)}"
 
 def get_database_collection_stats():
     """
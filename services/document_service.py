@@ -0,0 +1,327 @@
+"""
+Text and table extraction from documents linked on college websites
+
+Placement reports and fee structures are often published only as PDF,
+DOCX or PPTX files. Their text and tables are extracted in a process
+pool, so CPU-heavy parsing never holds up the crawler threads. Legacy
+binary .doc and .ppt files have no pure-Python parser and are skipped.
+"""
+import logging
+import threading
+import multiprocessing
+from io import BytesIO
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from config import get_config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Supported file extensions and the content_format stored for them
+DOCUMENT_FORMATS = {
+    '.pdf': 'pdf',
+    '.docx': 'docx',
+    '.pptx': 'pptx'
+}
+
+# Leading bytes of each format (DOCX and PPTX are ZIP archives), used to
+# reject error pages served under a document URL
+DOCUMENT_SIGNATURES = {
+    'pdf': b'%PDF',
+    'docx': b'PK\x03\x04',
+    'pptx': b'PK\x03\x04'
+}
+
+# Extraction processes, created on first use
+document_executor = None
+document_executor_lock = threading.Lock()
+
+# Limits documents queued or being parsed to one per extraction process, so
+# downloaded files wait in the crawler threads rather than pile up in the pool
+extraction_slots = None
+
+def get_document_format(url):
+    """
+    Get the document format of a URL from its extension
+    
+    Args:
+        url: URL to check
+    
+    Returns:
+        'pdf', 'docx' or 'pptx', or None if the URL isn't a supported document
+    """
+    path = urlparse(url).path.lower()
+    for extension, document_format in DOCUMENT_FORMATS.items():
+        if path.endswith(extension):
+            return document_format
+    return None
+
+def is_document(data, document_format):
+    """
+    Check that downloaded bytes look like the expected document format
+    
+    Args:
+        data: Downloaded bytes
+        document_format: Expected format
+    
+    Returns:
+        True if the file signature matches
+    """
+    return data.startswith(DOCUMENT_SIGNATURES[document_format])
+
+def format_table(rows):
+    """
+    Render an extracted table as pipe-separated lines
+    
+    Args:
+        rows: List of rows, each a list of cell values (None for empty cells)
+    
+    Returns:
+        Table text
+    """
+    lines = []
+    for row in rows:
+        cells = [' '.join(str(cell).split()) if cell is not None else '' for cell in row]
+        if any(cells):
+            lines.append(' | '.join(cells))
+    return '\n'.join(lines)
+
+def extract_pdf(data, max_pages):
+    """Extract the text and tables of a PDF, page by page"""
+    import pdfplumber
+    
+    sections = []
+    with pdfplumber.open(BytesIO(data)) as pdf:
+        for number, page in enumerate(pdf.pages[:max_pages], start=1):
+            text = page.extract_text() or ''
+            tables = [format_table(table) for table in page.extract_tables()]
+            
+            section = [f"[Page {number}]", text]
+            for index, table in enumerate(tables, start=1):
+                if table:
+                    section.append(f"[Table {number}.{index}]\n{table}")
+            sections.append('\n'.join(section))
+            
+            # Release the page's parsed objects
+            page.flush_cache()
+    
+    return '\n\n'.join(sections)
+
+def extract_docx(data, max_pages):
+    """Extract the paragraphs and tables of a DOCX document (which has no fixed pages)"""
+    import docx
+    
+    document = docx.Document(BytesIO(data))
+    sections = ['\n'.join(paragraph.text for paragraph in document.paragraphs if paragraph.text.strip())]
+    
+    for index, table in enumerate(document.tables, start=1):
+        rows = [[cell.text for cell in row.cells] for row in table.rows]
+        sections.append(f"[Table {index}]\n{format_table(rows)}")
+    
+    return '\n\n'.join(sections)
+
+def extract_pptx(data, max_pages):
+    """Extract the text and tables of a PPTX presentation, slide by slide"""
+    from pptx import Presentation
+    
+    presentation = Presentation(BytesIO(data))
+    sections = []
+    
+    for number, slide in enumerate(list(presentation.slides)[:max_pages], start=1):
+        section = [f"[Slide {number}]"]
+        for shape in slide.shapes:
+            if shape.has_text_frame and shape.text_frame.text.strip():
+                section.append(shape.text_frame.text)
+            elif shape.has_table:
+                rows = [[cell.text for cell in row.cells] for row in shape.table.rows]
+                section.append(format_table(rows))
+        sections.append('\n'.join(section))
+    
+    return '\n\n'.join(sections)
+
+# Extractor for each document format
+DOCUMENT_EXTRACTORS = {
+    'pdf': extract_pdf,
+    'docx': extract_docx,
+    'pptx': extract_pptx
+}
+
+def extract_document(data, document_format, max_pages):
+    """
+    Extract the text of a document, with tables as pipe-separated rows
+    
+    Runs in an extraction process.
+    
+    Args:
+        data: Document bytes
+        document_format: 'pdf', 'docx' or 'pptx'
+        max_pages: Most pages or slides extracted
+    
+    Returns:
+        Extracted text
+    """
+    return DOCUMENT_EXTRACTORS[document_format](data, max_pages).strip()
+
+def get_document_executor():
+    """
+    Get the extraction process pool, creating it on first use
+    
+    Worker processes are forked where possible, so they don't re-run the
+    application's startup code.
+    
+    Returns:
+        ProcessPoolExecutor
+    """
+    global document_executor, extraction_slots
+    
+    if document_executor is None:
+        with document_executor_lock:
+            if extraction_slots is None:
+                extraction_slots = threading.BoundedSemaphore(get_config().DOCUMENT_WORKERS)
+            if document_executor is None:
+                context = None
+                if 'fork' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('fork')
+                document_executor = ProcessPoolExecutor(
+                    max_workers=get_config().DOCUMENT_WORKERS, mp_context=context
+                )
+    
+    return document_executor
+
+def init_document_pool():
+    """
+    Start the extraction processes before the crawler threads start
+    """
+    try:
+        get_document_executor().submit(int).result()
+        logger.info("Document extraction pool started")
+    except Exception as e:
+        logger.error(f"Failed to start document extraction pool: {str(e)}")
+
+def submit_extraction(data, document_format):
+    """
+    Queue a document for extraction in the process pool
+    
+    Blocks while every extraction process already has a document. If no
+    process frees up within DOCUMENT_EXTRACT_TIMEOUT seconds, every running
+    parser has overrun its timeout, so the pool is recycled to free the
+    slots rather than waiting on parsers that may never finish.
+    
+    Args:
+        data: Document bytes
+        document_format: 'pdf', 'docx' or 'pptx'
+    
+    Returns:
+        Future resolving to the extracted text (pass it to wait_for_extraction)
+    
+    Raises:
+        TimeoutError: If no slot frees up even after recycling the pool
+    """
+    config = get_config()
+    max_pages = config.DOCUMENT_MAX_PAGES
+    executor = get_document_executor()
+    
+    if not extraction_slots.acquire(timeout=config.DOCUMENT_EXTRACT_TIMEOUT):
+        logger.warning("No document extraction slot freed in time, restarting the extraction pool")
+        recycle_document_pool(executor)
+        executor = get_document_executor()
+        if not extraction_slots.acquire(timeout=config.DOCUMENT_EXTRACT_TIMEOUT):
+            raise FutureTimeoutError("No document extraction slot available")
+    
+    try:
+        try:
+            future = executor.submit(extract_document, data, document_format, max_pages)
+        except BrokenProcessPool:
+            # A parser crashed or was killed; start a fresh pool
+            logger.warning("Document extraction pool broken, restarting it")
+            recycle_document_pool(executor)
+            executor = get_document_executor()
+            future = executor.submit(extract_document, data, document_format, max_pages)
+    except Exception:
+        extraction_slots.release()
+        raise
+    
+    # Remember the pool, so a timeout recycles the pool that is stuck
+    future.document_executor = executor
+    future.add_done_callback(lambda _: extraction_slots.release())
+    return future
+
+def wait_for_extraction(future, timeout):
+    """
+    Wait for a document's extracted text
+    
+    A parser that runs past the timeout can't be interrupted, so its pool is
+    recycled: the workers are terminated and the next submission starts a
+    new pool. Other documents in the old pool fail with BrokenProcessPool.
+    
+    Args:
+        future: Future returned by submit_extraction
+        timeout: Seconds to wait
+    
+    Returns:
+        Extracted text
+    
+    Raises:
+        TimeoutError: If extraction didn't finish in time
+    """
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning("Document extraction timed out, restarting the extraction pool")
+        recycle_document_pool(future.document_executor)
+        raise
+
+def recycle_document_pool(executor):
+    """
+    Stop a broken or stuck extraction pool so the next submission creates a new one
+    
+    Args:
+        executor: The pool to stop (ignored as current pool if already replaced)
+    """
+    global document_executor
+    
+    with document_executor_lock:
+        if document_executor is executor:
+            document_executor = None
+    
+    # shutdown() doesn't stop running tasks; terminate the workers first
+    for process in get_pool_processes(executor):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def get_pool_processes(executor):
+    """
+    Get the worker processes of a process pool
+    
+    ProcessPoolExecutor has no public way to reach its workers, so this
+    reads its private process table, guarded so a Python version without
+    it only loses the ability to kill stuck parsers.
+    
+    Args:
+        executor: ProcessPoolExecutor
+    
+    Returns:
+        List of multiprocessing.Process
+    """
+    if not hasattr(executor, '_processes'):
+        logger.warning("Can't reach the extraction processes; stuck parsers keep running")
+        return []
+    
+    # None once the pool has been shut down
+    return list((executor._processes or {}).values())
+
+def shutdown_document_pool():
+    """
+    Stop the extraction processes
+    """
+    global document_executor
+    
+    with document_executor_lock:
+        if document_executor is not None:
+            document_executor.shutdown(wait=False, cancel_futures=True)
+            document_executor = None
@@ -0,0 +1,393 @@
+"""
+Shared HTTP connection pools for all crawl jobs
+
+Crawl sessions mount one process-wide adapter, so keep-alive connections
+(and the TCP and TLS handshakes that opened them) are reused across jobs,
+and across colleges hosted on the same server or CDN. Each host keeps at
+most HTTP_MAX_CONNECTIONS_PER_HOST connections; further requests wait for
+a free one. Pooled connections look up host names through a cache that
+keeps results for DNS_CACHE_TTL seconds; the rest of the process resolves
+names as usual.
+
+Streamed response bodies are read in chunks up to a size cap and decoded
+incrementally, so oversized or mislabeled responses are dropped early.
+"""
+import re
+import time
+import codecs
+import socket
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from config import get_config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Cached address lookups, as {getaddrinfo arguments: (addresses, expires_at)}
+dns_cache = {}
+dns_cache_lock = threading.Lock()
+
+# Lookups kept before expired ones are dropped
+DNS_CACHE_MAX_ENTRIES = 10000
+
+# Process-wide adapter holding the connection pools, created on first use
+shared_adapter = None
+shared_adapter_lock = threading.Lock()
+
+# Connections opened by the current thread's crawl job
+connection_stats = threading.local()
+
+# Bytes of a body searched for a <meta> charset before decoding starts
+CHARSET_SNIFF_BYTES = 1024
+
+# Byte order marks and the encodings they imply
+ENCODING_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+]
+
+# Declared charsets in a Content-Type header and in an HTML <meta> tag
+CHARSET_PATTERN = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+def cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    """
+    socket.getaddrinfo with results cached for DNS_CACHE_TTL seconds
+    
+    Failed lookups aren't cached, and nothing is cached if DNS_CACHE_TTL is 0.
+    """
+    ttl = get_config().DNS_CACHE_TTL
+    if ttl <= 0:
+        return socket.getaddrinfo(host, port, family, type, proto, flags)
+    
+    key = (host, port, family, type, proto, flags)
+    now = time.time()
+    
+    cached = dns_cache.get(key)
+    if cached and now < cached[1]:
+        return cached[0]
+    
+    addresses = socket.getaddrinfo(host, port, family, type, proto, flags)
+    
+    with dns_cache_lock:
+        if len(dns_cache) >= DNS_CACHE_MAX_ENTRIES:
+            for expired in [k for k, (_, expires_at) in dns_cache.items() if expires_at <= now]:
+                del dns_cache[expired]
+        dns_cache[key] = (addresses, now + ttl)
+    
+    return addresses
+
+def create_connection(address, timeout, source_address=None, socket_options=None):
+    """
+    Open a TCP connection, resolving the host through the DNS cache
+    
+    Same as urllib3's create_connection: every address of the host is tried
+    in turn until one connects.
+    
+    Args:
+        address: (host, port) tuple
+        timeout: Connect timeout in seconds (None to block)
+        source_address: (host, port) to bind to (optional)
+        socket_options: List of setsockopt() argument tuples (optional)
+    
+    Returns:
+        Connected socket
+    """
+    host, port = address
+    host = host.strip('[]')
+    if timeout is not None and not isinstance(timeout, (int, float)):
+        timeout = socket.getdefaulttimeout()
+    
+    error = None
+    for family, socktype, proto, _, sockaddr in cached_getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM):
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            for option in socket_options or []:
+                sock.setsockopt(*option)
+            sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            error = e
+            if sock is not None:
+                sock.close()
+    
+    raise error or OSError("getaddrinfo returns an empty list")
+
+def resolve_host(host):
+    """
+    Resolve a host name to an IPv4 address through the DNS cache
+    
+    Args:
+        host: Host name
+    
+    Returns:
+        IP address
+    
+    Raises:
+        socket.gaierror: If the host can't be resolved
+    """
+    return cached_getaddrinfo(host, None, socket.AF_INET, socket.SOCK_STREAM)[0][4][0]
+
+def record_connection(seconds):
+    """
+    Count a new connection and its setup time against the current thread's job
+    
+    Args:
+        seconds: Time spent on DNS lookup, TCP connect and TLS handshake
+    """
+    connection_stats.opened = getattr(connection_stats, 'opened', 0) + 1
+    connection_stats.setup_time = getattr(connection_stats, 'setup_time', 0.0) + seconds
+
+def reset_connection_stats():
+    """
+    Start counting connections for a new crawl job on the current thread
+    """
+    connection_stats.opened = 0
+    connection_stats.setup_time = 0.0
+
+def get_connection_stats():
+    """
+    Get the connections opened by the current thread's crawl job
+    
+    Returns:
+        Dictionary with 'opened', 'setup_time' and 'avg_setup_time' (seconds)
+    """
+    opened = getattr(connection_stats, 'opened', 0)
+    setup_time = getattr(connection_stats, 'setup_time', 0.0)
+    
+    return {
+        'opened': opened,
+        'setup_time': round(setup_time, 3),
+        'avg_setup_time': round(setup_time / opened, 3) if opened else None
+    }
+
+class CachedResolverMixin:
+    """Opens connections through the DNS cache and records their setup time"""
+    def _new_conn(self):
+        # Mirrors HTTPConnection._new_conn, which resolves through socket.getaddrinfo
+        try:
+            return create_connection((self._dns_host, self.port), self.timeout,
+                                     self.source_address, self.socket_options)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+    
+    def connect(self):
+        started = time.monotonic()
+        super().connect()
+        record_connection(time.monotonic() - started)
+
+class TimedHTTPConnection(CachedResolverMixin, HTTPConnection):
+    """HTTP connection that records its setup time"""
+
+class TimedHTTPSConnection(CachedResolverMixin, HTTPSConnection):
+    """HTTPS connection that records its setup time, including the TLS handshake"""
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """
+    Adapter whose connection pools are shared by every crawl session
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+    
+    def close(self):
+        # Other sessions still use the pools; see close_http_pools
+        pass
+
+def get_shared_adapter():
+    """
+    Get the process-wide adapter, creating it on first use
+    
+    Returns:
+        SharedHTTPAdapter
+    """
+    global shared_adapter
+    
+    if shared_adapter is None:
+        with shared_adapter_lock:
+            if shared_adapter is None:
+                config = get_config()
+                shared_adapter = SharedHTTPAdapter(
+                    pool_connections=config.HTTP_POOL_HOSTS,
+                    pool_maxsize=config.HTTP_MAX_CONNECTIONS_PER_HOST,
+                    pool_block=True
+                )
+    
+    return shared_adapter
+
+def create_session(headers=None):
+    """
+    Create a requests session that uses the shared connection pools
+    
+    Cookies and headers stay per session; connections are shared.
+    
+    Args:
+        headers: Default request headers (optional)
+    
+    Returns:
+        requests.Session
+    """
+    session = requests.Session()
+    adapter = get_shared_adapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    if headers:
+        session.headers.update(headers)
+    
+    return session
+
+def close_http_pools():
+    """
+    Close every pooled connection
+    """
+    if shared_adapter is not None:
+        shared_adapter.poolmanager.clear()
+
+def get_content_length(response):
+    """
+    Get the declared body size of a response
+    
+    Args:
+        response: requests response
+    
+    Returns:
+        Content-Length in bytes, or None if missing or invalid
+    """
+    try:
+        return int(response.headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return None
+
+def detect_encoding(content_type, head):
+    """
+    Detect the character encoding of a body
+    
+    Checks, in order, a byte order mark, the Content-Type charset and a
+    <meta> charset in the first bytes of the body. Latin-1 and ASCII are
+    read as Windows-1252, as browsers do.
+    
+    Args:
+        content_type: Content-Type header value
+        head: First bytes of the body
+    
+    Returns:
+        Python codec name (UTF-8 if nothing is declared)
+    """
+    for bom, encoding in ENCODING_BOMS:
+        if head.startswith(bom):
+            return encoding
+    
+    match = CHARSET_PATTERN.search(content_type or '')
+    name = match.group(1) if match else None
+    if not name:
+        match = META_CHARSET_PATTERN.search(head[:CHARSET_SNIFF_BYTES])
+        name = match.group(1).decode('ascii', 'ignore') if match else None
+    
+    if name:
+        try:
+            encoding = codecs.lookup(name).name
+        except LookupError:
+            encoding = None
+        
+        if encoding in ('iso8859-1', 'ascii'):
+            return 'cp1252'
+        if encoding:
+            return encoding
+    
+    return 'utf-8'
+
+def read_text(response, max_bytes, chunk_size=65536):
+    """
+    Read and decode a streamed response body, giving up past a size limit
+    
+    The encoding is detected from the first CHARSET_SNIFF_BYTES bytes, then
+    the rest is decoded chunk by chunk as it arrives. The limit applies to
+    the decompressed body.
+    
+    Args:
+        response: requests response fetched with stream=True
+        max_bytes: Largest body accepted
+        chunk_size: Bytes read at a time
+    
+    Returns:
+        Body text, or None if the body is larger than max_bytes
+    """
+    content_type = response.headers.get('Content-Type', '')
+    decoder = None
+    head = b''
+    parts = []
+    received = 0
+    
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        received += len(chunk)
+        if received > max_bytes:
+            return None
+        
+        if decoder is None:
+            head += chunk
+            if len(head) < CHARSET_SNIFF_BYTES:
+                continue
+            decoder = codecs.getincrementaldecoder(detect_encoding(content_type, head))(errors='replace')
+            chunk = head
+        
+        parts.append(decoder.decode(chunk))
+    
+    # Bodies shorter than the sniffed prefix
+    if decoder is None:
+        decoder = codecs.getincrementaldecoder(detect_encoding(content_type, head))(errors='replace')
+        parts.append(decoder.decode(head))
+    
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+def read_bytes(response, max_bytes, chunk_size=65536):
+    """
+    Read a streamed response body, giving up past a size limit
+    
+    Args:
+        response: requests response fetched with stream=True
+        max_bytes: Largest body accepted
+        chunk_size: Bytes read at a time
+    
+    Returns:
+        Body bytes, or None if the body is larger than max_bytes
+    """
+    body = bytearray()
+    
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        body += chunk
+        if len(body) > max_bytes:
+            return None
+    
+    return bytes(body)
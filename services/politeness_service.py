@@ -0,0 +1,290 @@
+"""
+Per-host politeness limits shared by all crawl workers
+
+Every request to a host takes a token from that host's bucket, which
+refills at one token per CRAWL_DELAY seconds. Hosts are keyed by IP
+address by default, so colleges on the same hosting provider or shared
+university server share one limit. Buckets live in this process, or in
+Redis when POLITENESS_REDIS_URL is set so separate worker processes
+share them too.
+
+The interval for each host adapts to its responses (AIMD): fast
+successful responses shorten it step by step, while 429s, 5xx errors and
+timeouts double it, and a Retry-After header pauses the host entirely.
+"""
+import time
+import socket
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+import threading
+from urllib.parse import urlparse
+from config import get_config
+from services.http_service import resolve_host
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# In-process buckets, as {host key: (tokens, updated_at)}; tokens go
+# negative when requests are waiting for the bucket to refill
+host_buckets = {}
+host_buckets_lock = threading.Lock()
+
+# Adaptive request interval per host, as {host key: seconds}
+host_delays = {}
+
+# Times until which hosts asked not to be contacted, as {host key: timestamp}
+host_blocked_until = {}
+host_state_lock = threading.Lock()
+
+# Response status codes that mean the host is overloaded
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Redis client and registered reserve script, created on first use
+redis_client = None
+redis_reserve_script = None
+
+# Atomically refills and takes a token from a bucket, returning the seconds
+# the caller must wait for it. ARGV: refill interval, burst size.
+RESERVE_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(data[1]) or burst
+local updated_at = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + (now - updated_at) / interval) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) * interval * 1000) + 60000)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens * interval)
+"""
+
+def get_host_key(url):
+    """
+    Get the key identifying the server a URL is fetched from
+    
+    Args:
+        url: URL to fetch
+    
+    Returns:
+        IP address of the host (or the host name if it can't be resolved,
+        or if POLITENESS_BY_IP is off)
+    """
+    host = (urlparse(url).hostname or '').lower()
+    if not get_config().POLITENESS_BY_IP:
+        return host
+    
+    try:
+        return resolve_host(host)
+    except (socket.error, UnicodeError):
+        return host
+
+def get_redis_client():
+    """
+    Get the Redis client used for shared buckets
+    
+    Returns:
+        Redis client, or None if shared buckets aren't configured
+    """
+    global redis_client, redis_reserve_script
+    
+    config = get_config()
+    if not config.POLITENESS_REDIS_URL:
+        return None
+    
+    if redis_client is None:
+        import redis
+        redis_client = redis.Redis.from_url(config.POLITENESS_REDIS_URL)
+        redis_reserve_script = redis_client.register_script(RESERVE_SCRIPT)
+    
+    return redis_client
+
+def reserve_local(key, interval, burst):
+    """
+    Take a token from an in-process bucket
+    
+    Args:
+        key: Host key
+        interval: Seconds for the bucket to refill one token
+        burst: Bucket size
+    
+    Returns:
+        Seconds to wait before the request may be sent
+    """
+    now = time.time()
+    
+    with host_buckets_lock:
+        tokens, updated_at = host_buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) / interval) - 1
+        host_buckets[key] = (tokens, now)
+    
+    return 0.0 if tokens >= 0 else -tokens * interval
+
+def reserve_slot(url, interval=None):
+    """
+    Reserve the next request slot for a URL's host
+    
+    Args:
+        url: URL to fetch
+        interval: Minimum seconds between requests to the host (defaults to CRAWL_DELAY)
+    
+    Returns:
+        Seconds to wait before sending the request
+    """
+    config = get_config()
+    key = get_host_key(url)
+    interval = max(interval or config.CRAWL_DELAY, 0.001)
+    burst = config.POLITENESS_BURST
+    
+    client = get_redis_client()
+    if client is not None:
+        try:
+            return float(redis_reserve_script(keys=[f"politeness:{key}"], args=[interval, burst], client=client))
+        except Exception as e:
+            logger.warning(f"Shared politeness bucket unavailable, using local bucket: {str(e)}")
+    
+    return reserve_local(key, interval, burst)
+
+def get_host_delay(url, floor=None):
+    """
+    Get the current adaptive interval between requests to a URL's host
+    
+    Args:
+        url: URL to fetch
+        floor: Minimum interval, e.g. the host's robots.txt Crawl-delay (optional)
+    
+    Returns:
+        Interval in seconds (CRAWL_DELAY until the host's responses adjust it)
+    """
+    delay = host_delays.get(get_host_key(url), get_config().CRAWL_DELAY)
+    return max(delay, floor or 0)
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header
+    
+    Args:
+        value: Header value, in seconds or as an HTTP date
+    
+    Returns:
+        Seconds to wait, or None if missing or invalid
+    """
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def block_host(key, seconds):
+    """
+    Stop all requests to a host for a while
+    
+    Args:
+        key: Host key
+        seconds: Seconds to wait before the next request
+    """
+    with host_state_lock:
+        host_blocked_until[key] = max(host_blocked_until.get(key, 0), time.time() + seconds)
+    
+    client = get_redis_client()
+    if client is not None:
+        try:
+            client.set(f"politeness-block:{key}", 1, px=int(seconds * 1000))
+        except Exception as e:
+            logger.warning(f"Failed to share host block: {str(e)}")
+
+def get_block_wait(key):
+    """
+    Get how long a host is still blocked for
+    
+    Args:
+        key: Host key
+    
+    Returns:
+        Seconds until the host may be contacted again
+    """
+    wait = host_blocked_until.get(key, 0) - time.time()
+    
+    client = get_redis_client()
+    if client is not None:
+        try:
+            wait = max(wait, client.pttl(f"politeness-block:{key}") / 1000)
+        except Exception as e:
+            logger.warning(f"Failed to read shared host block: {str(e)}")
+    
+    return max(0.0, wait)
+
+def record_response(url, status_code=None, latency=None, retry_after=None):
+    """
+    Adapt a host's request interval to the outcome of a request
+    
+    Successful responses faster than THROTTLE_TARGET_LATENCY shorten the
+    interval by THROTTLE_STEP, down to THROTTLE_MIN_DELAY; slower ones leave
+    it unchanged. Overload responses (429, 5xx) and failed requests double
+    it, up to THROTTLE_MAX_DELAY. A Retry-After pauses the host.
+    
+    Args:
+        url: URL that was requested
+        status_code: HTTP status code (None if the request failed)
+        latency: Seconds until the response arrived (optional)
+        retry_after: Seconds the host asked to wait (optional)
+    
+    Returns:
+        The host's new interval in seconds
+    """
+    config = get_config()
+    key = get_host_key(url)
+    
+    with host_state_lock:
+        delay = host_delays.get(key, config.CRAWL_DELAY)
+        
+        if status_code is None or status_code in THROTTLE_STATUS_CODES:
+            delay = min(max(delay, config.THROTTLE_STEP) * 2, config.THROTTLE_MAX_DELAY)
+        elif latency is not None and latency < config.THROTTLE_TARGET_LATENCY:
+            delay = max(delay - config.THROTTLE_STEP, config.THROTTLE_MIN_DELAY)
+        
+        host_delays[key] = delay
+    
+    if retry_after:
+        block_host(key, min(retry_after, config.THROTTLE_MAX_RETRY_AFTER))
+    
+    return delay
+
+def wait_for_host(url, interval=None):
+    """
+    Block until a request to a URL's host is allowed
+    
+    Args:
+        url: URL to fetch
+        interval: Minimum seconds between requests to the host (defaults to CRAWL_DELAY)
+    
+    Returns:
+        Seconds waited
+    """
+    # Honour a Retry-After before taking a slot
+    blocked = get_block_wait(get_host_key(url))
+    if blocked > 0:
+        time.sleep(blocked)
+    
+    wait = reserve_slot(url, interval)
+    if wait > 0:
+        time.sleep(wait)
+    return blocked + wait
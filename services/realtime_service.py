@@ -0,0 +1,226 @@
+"""
+Realtime service for pushing crawl progress, AI job updates and queue status
+to connected browsers over Socket.IO
+"""
+import logging
+from flask import request
+from flask_login import current_user
+from flask_socketio import SocketIO, join_room, leave_room
+from config import get_config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Room names
+DASHBOARD_ROOM = 'dashboard'
+
+# Global Socket.IO instance, bound to the Flask app in init_realtime()
+socketio = SocketIO()
+
+# Session IDs subscribed to the dashboard room
+dashboard_subscribers = set()
+
+# Whether the queue status broadcaster has been started
+broadcaster_started = False
+
+def get_crawl_job_room(job_id):
+    """Get the room name for a crawl job"""
+    return f"crawl_job:{job_id}"
+
+def get_college_room(college_id):
+    """Get the room name for a college"""
+    return f"college:{college_id}"
+
+def init_realtime(app):
+    """
+    Initialize Socket.IO for the Flask app
+
+    Args:
+        app: Flask application
+
+    Returns:
+        SocketIO instance
+    """
+    config = get_config()
+    message_queue = app.config.get('SOCKETIO_MESSAGE_QUEUE', config.SOCKETIO_MESSAGE_QUEUE)
+
+    socketio.init_app(app, message_queue=message_queue, manage_session=False)
+    register_handlers()
+
+    return socketio
+
+def register_handlers():
+    """Register Socket.IO event handlers"""
+
+    @socketio.on('connect')
+    def handle_connect():
+        # Only authenticated users receive updates
+        if not current_user.is_authenticated:
+            return False
+        return True
+
+    @socketio.on('disconnect')
+    def handle_disconnect():
+        dashboard_subscribers.discard(request.sid)
+
+    @socketio.on('subscribe_dashboard')
+    def handle_subscribe_dashboard(data=None):
+        join_room(DASHBOARD_ROOM)
+        dashboard_subscribers.add(request.sid)
+        start_status_broadcaster()
+
+        # Send the current status right away instead of waiting for the next tick
+        status = build_queue_status()
+        if status:
+            socketio.emit('queue_status', status, to=request.sid)
+
+    @socketio.on('unsubscribe_dashboard')
+    def handle_unsubscribe_dashboard(data=None):
+        leave_room(DASHBOARD_ROOM)
+        dashboard_subscribers.discard(request.sid)
+
+    @socketio.on('subscribe_crawl_job')
+    def handle_subscribe_crawl_job(data):
+        job_id = (data or {}).get('job_id')
+        if job_id:
+            join_room(get_crawl_job_room(job_id))
+
+    @socketio.on('subscribe_college')
+    def handle_subscribe_college(data):
+        college_id = (data or {}).get('college_id')
+        if college_id:
+            join_room(get_college_room(college_id))
+
+def emit_event(event, payload, room):
+    """
+    Emit an event to a room, ignoring failures so workers never break on push errors
+
+    Args:
+        event: Event name
+        payload: JSON-serializable payload
+        room: Room to emit to
+    """
+    if socketio.server is None:
+        return
+
+    try:
+        socketio.emit(event, payload, to=room)
+    except Exception as e:
+        logger.debug(f"Failed to emit {event} to {room}: {str(e)}")
+
+def emit_crawl_progress(job_id, college_id, progress):
+    """
+    Push crawl progress to subscribers of the job and its college
+
+    Args:
+        job_id: ID of the crawl job
+        college_id: ID of the college
+        progress: Dictionary in the build_crawl_progress() format
+    """
+    payload = dict(progress)
+    payload['job_id'] = str(job_id)
+    payload['college_id'] = str(college_id)
+
+    emit_event('crawl_progress', payload, get_crawl_job_room(job_id))
+    emit_event('crawl_progress', payload, get_college_room(college_id))
+
+def emit_crawl_status(job_id, college_id, status, message=None):
+    """
+    Push a crawl job status change to job, college and dashboard subscribers
+
+    Args:
+        job_id: ID of the crawl job
+        college_id: ID of the college
+        status: New status (running/completed/failed)
+        message: Optional status message
+    """
+    payload = {
+        'job_id': str(job_id),
+        'college_id': str(college_id),
+        'status': status,
+        'message': message
+    }
+
+    emit_event('crawl_status', payload, get_crawl_job_room(job_id))
+    emit_event('crawl_status', payload, get_college_room(college_id))
+    emit_event('crawl_status', payload, DASHBOARD_ROOM)
+
+def emit_ai_job_update(job_id, status, message=None):
+    """
+    Push an AI job status change to dashboard subscribers
+
+    Args:
+        job_id: ID of the AI processing job
+        status: New status (running/completed/failed)
+        message: Optional status message
+    """
+    emit_event('ai_job_update', {
+        'job_id': str(job_id),
+        'status': status,
+        'message': message
+    }, DASHBOARD_ROOM)
+
+def build_queue_status():
+    """
+    Build the queue status payload shared by all dashboard subscribers
+
+    Returns:
+        Dictionary with crawler and AI queue status, or None on error
+    """
+    from models import get_db
+    from models.crawl_job import count_crawl_jobs
+    from models.ai_processing_job import count_ai_processing_jobs
+    from workers import crawler_worker, ai_worker
+
+    try:
+        db = get_db()
+        return {
+            'crawler': crawler_worker.get_queue_status(),
+            'ai': ai_worker.get_queue_status(),
+            'jobs': {
+                'crawl': {
+                    'queued_jobs': count_crawl_jobs(db, 'queued'),
+                    'running_jobs': count_crawl_jobs(db, 'running')
+                },
+                'ai_processing': {
+                    'queued_jobs': count_ai_processing_jobs(db, 'queued'),
+                    'running_jobs': count_ai_processing_jobs(db, 'running')
+                }
+            }
+        }
+    except Exception as e:
+        logger.error(f"Error building queue status: {str(e)}")
+        return None
+
+def status_broadcaster_loop():
+    """
+    Background task that computes the queue status once per interval and fans
+    it out to every dashboard subscriber
+    """
+    config = get_config()
+
+    while True:
+        socketio.sleep(config.SOCKETIO_STATUS_INTERVAL)
+
+        # Skip the database work entirely when nobody is listening
+        if not dashboard_subscribers:
+            continue
+
+        status = build_queue_status()
+        if status:
+            emit_event('queue_status', status, DASHBOARD_ROOM)
+
+def start_status_broadcaster():
+    """Start the queue status broadcaster if it isn't running yet"""
+    global broadcaster_started
+
+    if broadcaster_started:
+        return
+
+    broadcaster_started = True
+    socketio.start_background_task(status_broadcaster_loop)
+    logger.info("Started queue status broadcaster")
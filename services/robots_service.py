@@ -0,0 +1,289 @@
+"""
+robots.txt and sitemap support for the crawler
+
+robots.txt is fetched once per host and cached for ROBOTS_CACHE_TTL
+seconds. Sitemaps listed in it (or /sitemap.xml) are streamed, including
+sitemap indexes and gzipped sitemaps, to seed the crawl frontier with
+page URLs and their lastmod dates. Like pages, robots.txt files and
+sitemaps are read up to FETCH_MAX_BYTES (after decompression).
+"""
+import gzip
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from datetime import timezone
+from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
+import requests
+from dateutil import parser as date_parser
+from config import get_config
+from services.politeness_service import wait_for_host, get_host_delay
+from services.http_service import read_text
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Product token matched against robots.txt user-agent lines
+ROBOTS_USER_AGENT = 'CollegeDataCrawler'
+
+# Parsed robots.txt per host, as {scheme://host: (robots, expires_at)}
+robots_cache = {}
+robots_cache_lock = threading.Lock()
+
+# Seconds before a failed robots.txt fetch is retried
+ROBOTS_ERROR_TTL = 600
+
+def get_robots(session, url):
+    """
+    Get the parsed robots.txt for a URL's host
+    
+    Missing robots.txt (4xx) allows everything; 401/403 disallow
+    everything, as do server errors until the fetch is retried.
+    
+    Args:
+        session: requests session used for fetching
+        url: Any URL on the host
+    
+    Returns:
+        Dictionary with 'parser' (RobotFileParser), 'crawl_delay' (seconds
+        or None) and 'sitemaps' (list of URLs)
+    """
+    parsed = urlparse(url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    now = time.time()
+    
+    cached = robots_cache.get(origin)
+    if cached and now < cached[1]:
+        return cached[0]
+    
+    config = get_config()
+    robots_url = origin + '/robots.txt'
+    parser = RobotFileParser(robots_url)
+    ttl = config.ROBOTS_CACHE_TTL
+    
+    try:
+        wait_for_host(robots_url, get_host_delay(robots_url))
+        response = session.get(robots_url, timeout=config.REQUEST_TIMEOUT, stream=True)
+        
+        try:
+            if response.status_code == 200:
+                text = read_text(response, config.FETCH_MAX_BYTES)
+                if text is None:
+                    logger.warning(f"Ignoring {robots_url}: larger than {config.FETCH_MAX_BYTES} bytes")
+                    parser.allow_all = True
+                    ttl = ROBOTS_ERROR_TTL
+                else:
+                    parser.parse(text.splitlines())
+            elif response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 500:
+                parser.disallow_all = True
+                ttl = ROBOTS_ERROR_TTL
+            else:
+                parser.allow_all = True
+        finally:
+            response.close()
+    except requests.RequestException as e:
+        logger.warning(f"Failed to fetch {robots_url}: {str(e)}")
+        parser.allow_all = True
+        ttl = ROBOTS_ERROR_TTL
+    
+    robots = {
+        'parser': parser,
+        'crawl_delay': parser.crawl_delay(ROBOTS_USER_AGENT),
+        'sitemaps': parser.site_maps() or []
+    }
+    
+    with robots_cache_lock:
+        robots_cache[origin] = (robots, now + ttl)
+    
+    return robots
+
+def can_fetch(session, url):
+    """
+    Check whether robots.txt allows fetching a URL
+    
+    Args:
+        session: requests session used for fetching
+        url: URL to check
+    
+    Returns:
+        True if the URL may be fetched
+    """
+    return get_robots(session, url)['parser'].can_fetch(ROBOTS_USER_AGENT, url)
+
+def get_crawl_delay(session, url):
+    """
+    Get the robots.txt Crawl-delay of a URL's host
+    
+    Args:
+        session: requests session used for fetching
+        url: Any URL on the host
+    
+    Returns:
+        Minimum seconds between requests (0 if robots.txt sets none)
+    """
+    return float(get_robots(session, url)['crawl_delay'] or 0)
+
+class LimitedReader:
+    """
+    File-like wrapper that returns at most max_bytes, then fails if the stream goes on
+    
+    Wraps the decompressed stream, so a small gzip bomb can't expand into
+    an unbounded parse; entries before the limit are still used.
+    """
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.received = 0
+    
+    def read(self, size=-1):
+        remaining = self.max_bytes - self.received
+        if remaining <= 0:
+            # Only an error if the stream actually goes on
+            if self.stream.read(1):
+                raise OSError(f"larger than {self.max_bytes} bytes")
+            return b''
+        
+        data = self.stream.read(remaining if size is None or size < 0 else min(size, remaining))
+        self.received += len(data)
+        return data
+
+def is_same_site(url, website):
+    """
+    Check whether a URL is on a website's own host, with or without "www."
+    
+    Args:
+        url: URL to check
+        website: Home page URL of the site
+    
+    Returns:
+        True if both URLs have the same host
+    """
+    def host(value):
+        hostname = (urlparse(value).hostname or '').lower()
+        return hostname[4:] if hostname.startswith('www.') else hostname
+    
+    return host(url) == host(website)
+
+def parse_lastmod(text):
+    """
+    Parse a sitemap lastmod value
+    
+    Args:
+        text: W3C datetime string
+    
+    Returns:
+        Naive UTC datetime, or None if it can't be parsed
+    """
+    if not text:
+        return None
+    
+    try:
+        value = date_parser.isoparse(text.strip())
+    except (ValueError, OverflowError):
+        return None
+    
+    # Stored timestamps are naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def iter_sitemap_entries(session, sitemap_url):
+    """
+    Stream the entries of one sitemap or sitemap index
+    
+    Args:
+        session: requests session used for fetching
+        sitemap_url: URL of the sitemap (may be gzipped)
+    
+    Returns:
+        Generator of (kind, loc, lastmod) tuples, where kind is 'url' for
+        pages and 'sitemap' for nested sitemaps
+    """
+    config = get_config()
+    
+    wait_for_host(sitemap_url, get_host_delay(sitemap_url, get_crawl_delay(session, sitemap_url)))
+    response = session.get(sitemap_url, timeout=config.REQUEST_TIMEOUT, stream=True)
+    
+    try:
+        if response.status_code != 200:
+            logger.info(f"No sitemap at {sitemap_url}: HTTP {response.status_code}")
+            return
+        
+        # Content-Encoding is undone by urllib3; .gz files are gzip themselves
+        response.raw.decode_content = True
+        stream = response.raw
+        content_type = response.headers.get('Content-Type', '').lower()
+        if sitemap_url.lower().endswith('.gz') or 'gzip' in content_type:
+            stream = gzip.GzipFile(fileobj=stream)
+        stream = LimitedReader(stream, config.FETCH_MAX_BYTES)
+        
+        loc = lastmod = None
+        for event, element in ET.iterparse(stream, events=('end',)):
+            # Strip the sitemap namespace
+            tag = element.tag.rsplit('}', 1)[-1]
+            
+            if tag == 'loc':
+                loc = (element.text or '').strip()
+            elif tag == 'lastmod':
+                lastmod = parse_lastmod(element.text)
+            elif tag in ('url', 'sitemap'):
+                if loc:
+                    yield ('url' if tag == 'url' else 'sitemap'), loc, lastmod
+                loc = lastmod = None
+                element.clear()
+    
+    except (ET.ParseError, OSError, EOFError) as e:
+        logger.warning(f"Failed to parse sitemap {sitemap_url}: {str(e)}")
+    finally:
+        response.close()
+
+def get_sitemap_urls(session, website):
+    """
+    Get the page URLs listed in a site's sitemaps
+    
+    Follows sitemap indexes up to SITEMAP_MAX_FILES sitemaps and stops after
+    SITEMAP_MAX_URLS pages. Nested sitemaps are only followed on the site's
+    own host.
+    
+    Args:
+        session: requests session used for fetching
+        website: Home page URL of the site
+    
+    Returns:
+        Dictionary mapping page URL to lastmod datetime (or None)
+    """
+    config = get_config()
+    
+    sitemaps = list(get_robots(session, website)['sitemaps']) or [urljoin(website, '/sitemap.xml')]
+    seen = set()
+    urls = {}
+    
+    while sitemaps and len(seen) < config.SITEMAP_MAX_FILES and len(urls) < config.SITEMAP_MAX_URLS:
+        sitemap_url = sitemaps.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        
+        try:
+            for kind, loc, lastmod in iter_sitemap_entries(session, sitemap_url):
+                if kind == 'sitemap':
+                    if is_same_site(loc, website):
+                        sitemaps.append(loc)
+                    else:
+                        logger.info(f"Skipping sitemap {loc} on another host")
+                    continue
+                
+                urls[loc] = lastmod
+                if len(urls) >= config.SITEMAP_MAX_URLS:
+                    break
+        except requests.RequestException as e:
+            logger.warning(f"Failed to fetch sitemap {sitemap_url}: {str(e)}")
+    
+    return urls
@@ -0,0 +1,147 @@
+"""
+Scheduler service that queues re-crawls of colleges whose data is stale
+"""
+import random
+import logging
+import threading
+from datetime import datetime, timedelta
+import schedule
+from config import get_config
+from models import get_db
+from models.college import get_colleges_due_for_crawl
+from models.crawl_job import get_active_crawl_college_ids, count_crawl_jobs, count_crawl_jobs_created_since
+from services.crawler_service import start_college_crawl
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Scheduler running the re-crawl cycle
+scheduler = schedule.Scheduler()
+
+# Thread running the scheduler
+scheduler_thread = None
+
+# Stop event for the scheduler thread
+stop_event = threading.Event()
+
+def get_recrawl_budget(db, config):
+    """
+    Get how many re-crawls may be started now
+    
+    Scheduled crawls are capped per hour, and none are started while the
+    crawl queue already holds RECRAWL_MAX_QUEUED jobs, so the workers stay
+    busy without a backlog building up.
+    
+    Args:
+        db: Database connection
+        config: Configuration object
+    
+    Returns:
+        Number of crawls to start
+    """
+    started_last_hour = count_crawl_jobs_created_since(
+        db, datetime.utcnow() - timedelta(hours=1), triggered_by='system'
+    )
+    queued = count_crawl_jobs(db, 'queued')
+    
+    return max(0, min(config.RECRAWL_MAX_PER_HOUR - started_last_hour, config.RECRAWL_MAX_QUEUED - queued))
+
+def run_recrawl_cycle():
+    """
+    Queue crawls for the colleges most in need of a re-crawl
+    
+    Returns:
+        Number of crawl jobs created
+    """
+    config = get_config()
+    
+    try:
+        db = get_db()
+        
+        budget = get_recrawl_budget(db, config)
+        if budget == 0:
+            logger.debug("Re-crawl budget exhausted, skipping cycle")
+            return 0
+        
+        colleges = get_colleges_due_for_crawl(
+            db, config.RECRAWL_SLA_DAYS, get_active_crawl_college_ids(db), budget
+        )
+        
+        created = 0
+        for college in colleges:
+            # Spread the crawls out instead of queueing them in one burst
+            if created and stop_event.wait(random.uniform(0, config.RECRAWL_JITTER_SECONDS)):
+                break
+            
+            job_id, message = start_college_crawl(college['_id'], 'system')
+            if job_id:
+                created += 1
+                logger.info(f"Scheduled re-crawl job {job_id} for college {college['name']}")
+        
+        return created
+    
+    except Exception as e:
+        logger.error(f"Error scheduling re-crawls: {str(e)}", exc_info=True)
+        return 0
+
+def scheduler_function():
+    """
+    Scheduler thread function running pending scheduled tasks
+    """
+    logger.info("Re-crawl scheduler started")
+    
+    while not stop_event.is_set():
+        try:
+            scheduler.run_pending()
+        except Exception as e:
+            logger.error(f"Re-crawl scheduler encountered error: {str(e)}", exc_info=True)
+        stop_event.wait(1)
+
+def start_scheduler():
+    """
+    Start the re-crawl scheduler thread
+    """
+    global scheduler_thread
+    
+    config = get_config()
+    
+    if scheduler_thread and scheduler_thread.is_alive():
+        return
+    
+    stop_event.clear()
+    scheduler.clear()
+    
+    # Vary each interval by up to a minute so several app processes don't run in step
+    interval = config.RECRAWL_INTERVAL_MINUTES * 60
+    scheduler.every(interval).to(interval + 60).seconds.do(run_recrawl_cycle)
+    
+    scheduler_thread = threading.Thread(target=scheduler_function, daemon=True)
+    scheduler_thread.start()
+    
+    logger.info(f"Scheduling re-crawls every {config.RECRAWL_INTERVAL_MINUTES} minutes")
+
+def stop_scheduler():
+    """
+    Stop the re-crawl scheduler thread
+    """
+    global scheduler_thread
+    
+    stop_event.set()
+    if scheduler_thread:
+        scheduler_thread.join(timeout=10)
+    scheduler_thread = None
+    scheduler.clear()
+
+def init_scheduler():
+    """
+    Start the re-crawl scheduler if it is enabled
+    """
+    try:
+        if get_config().RECRAWL_ENABLED:
+            start_scheduler()
+    except Exception as e:
+        logger.error(f"Failed to initialize re-crawl scheduler: {str(e)}")
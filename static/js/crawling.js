@@ -50,9 +50,24 @@ $(document).ready(function() {
         }
     }
     
-    // Start polling if on job details page with a running job
+    // Start live updates if on job details page with a running job
     if ($('#jobStatusCard').length && $('#jobStatusCard').data('status') === 'running') {
-        pollJobStatus();
+        const subscribed = Realtime.subscribe('subscribe_crawl_job', {job_id: $('#jobStatusCard').data('job-id')}, {
+            crawl_progress: function(progress) {
+                updateJobStatus({progress: progress});
+            },
+            crawl_status: function(data) {
+                if (data.status !== 'running') {
+                    // Reload page if job completed or failed
+                    window.location.reload();
+                }
+            }
+        });
+        
+        // Fall back to polling when push updates are unavailable
+        if (!subscribed) {
+            pollJobStatus();
+        }
     }
     
     // Initialize crawl job filter
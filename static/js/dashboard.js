@@ -19,8 +19,15 @@ $(document).ready(function() {
 function setupLiveUpdates() {
     // Only if we're on the dashboard page and there are active jobs
     if ($('#crawlStatusCard, #aiStatusCard').length && $('.progress-bar').length) {
-        // Poll every 5 seconds
-        setInterval(updateStatuses, 5000);
+        // Prefer server push; queue status is computed once server-side for all tabs
+        const subscribed = Realtime.subscribe('subscribe_dashboard', null, {
+            queue_status: updateDashboardStats
+        });
+        
+        if (!subscribed) {
+            // Fall back to polling every 5 seconds
+            setInterval(updateStatuses, 5000);
+        }
     }
 }
 
@@ -0,0 +1,53 @@
+// static/js/realtime.js
+
+// Shared Socket.IO connection for live updates pushed by the server.
+// Pages fall back to polling when the Socket.IO client is not available.
+const Realtime = (function() {
+    let socket = null;
+    const subscriptions = [];
+
+    function isAvailable() {
+        return typeof io !== 'undefined';
+    }
+
+    function connect() {
+        if (socket || !isAvailable()) {
+            return socket;
+        }
+
+        socket = io();
+
+        // Rooms are dropped on reconnect, so re-send every subscription
+        socket.on('connect', function() {
+            subscriptions.forEach(function(sub) {
+                socket.emit(sub.event, sub.data);
+            });
+        });
+
+        return socket;
+    }
+
+    // Subscribe to a server-side room and bind event handlers.
+    // Returns false if the caller should fall back to polling.
+    function subscribe(subscribeEvent, data, handlers) {
+        if (!connect()) {
+            return false;
+        }
+
+        Object.keys(handlers).forEach(function(eventName) {
+            socket.on(eventName, handlers[eventName]);
+        });
+
+        subscriptions.push({event: subscribeEvent, data: data || {}});
+        if (socket.connected) {
+            socket.emit(subscribeEvent, data || {});
+        }
+
+        return true;
+    }
+
+    return {
+        isAvailable: isAvailable,
+        subscribe: subscribe
+    };
+})();
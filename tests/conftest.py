@@ -0,0 +1,37 @@
+"""
+Shared pytest setup: makes the application packages importable and
+backs get_db() with an in-memory database
+"""
+import os
+import sys
+import functools
+import pytest
+import mongomock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+
+def ignore_sort(method):
+    """Drop the 'sort' argument newer PyMongo passes to bulk operations, which mongomock doesn't take"""
+    @functools.wraps(method)
+    def wrapper(*args, sort=None, **kwargs):
+        return method(*args, **kwargs)
+    return wrapper
+
+mongomock.collection.BulkOperationBuilder.add_replace = ignore_sort(mongomock.collection.BulkOperationBuilder.add_replace)
+mongomock.collection.BulkOperationBuilder.add_update = ignore_sort(mongomock.collection.BulkOperationBuilder.add_update)
+
+# get_db() reuses the connection stored for the thread, so services
+# imported by the tests use the in-memory database
+mongo_client = mongomock.MongoClient()
+models._thread_local.mongo_client = mongo_client
+models._thread_local.db = mongo_client.college_data_crawler_test
+
+@pytest.fixture
+def db():
+    """Empty in-memory database, also returned by get_db()"""
+    database = models._thread_local.db
+    for name in database.list_collection_names():
+        database.drop_collection(name)
+    return database
@@ -0,0 +1,80 @@
+"""
+Tests for the partitioned Parquet analytics export
+"""
+import os
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from bson import ObjectId
+from config import get_config
+from services.analytics_service import export_analytics, get_table_schema
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    # One document per batch, so every export spans several flushes
+    monkeypatch.setattr(get_config(), 'ANALYTICS_BATCH_SIZE', 1)
+
+def add_college(db, name, state):
+    return db.colleges.insert_one({'name': name, 'type': 'Engineering', 'state': state}).inserted_id
+
+def add_placement(db, college_id, year, percentage, last_updated=None, companies=()):
+    db.placement_data.insert_one({
+        'college_id': college_id,
+        'academic_year': year,
+        'last_updated': last_updated,
+        'overall_statistics': {'placement_percentage_pct': percentage},
+        'recruiting_companies': [{'company_name': name} for name in companies]
+    })
+
+def read_partition(output_dir, table, partition):
+    return pq.read_table(os.path.join(output_dir, table, partition, 'part-0.parquet'))
+
+def test_export_writes_fixed_schema_when_columns_are_null(db, tmp_path):
+    college = add_college(db, 'Alpha', 'Kerala')
+    add_placement(db, college, '2023-24', None)
+    add_placement(db, college, '2022-23', 80, companies=['TCS'])
+    
+    success, message = export_analytics(str(tmp_path), incremental=False)
+    
+    assert success, message
+    overall = read_partition(tmp_path, 'placement_overall', 'academic_year=2023-24')
+    assert overall.schema.equals(get_table_schema('placement_overall'))
+    assert overall.schema.field('last_updated').type == pa.timestamp('us')
+    assert overall.column('placement_percentage_pct').to_pylist() == [None]
+    
+    companies = read_partition(tmp_path, 'placement_companies', 'academic_year=2022-23')
+    assert companies.column('company').to_pylist() == ['TCS']
+    assert not os.path.exists(tmp_path / 'placement_companies' / 'academic_year=2023-24')
+
+def test_incremental_export_replaces_rows_of_changed_documents(db, tmp_path):
+    first = add_college(db, 'Alpha', 'Kerala')
+    second = add_college(db, 'Beta', 'Kerala')
+    add_placement(db, first, '2023-24', 70, datetime(2024, 1, 1))
+    add_placement(db, second, '2023-24', 60, datetime(2024, 1, 1))
+    assert export_analytics(str(tmp_path), incremental=False)[0]
+    
+    db.placement_data.update_one(
+        {'college_id': first},
+        {'$set': {'overall_statistics.placement_percentage_pct': 90, 'last_updated': datetime.utcnow()}}
+    )
+    success, message = export_analytics(str(tmp_path))
+    
+    assert success, message
+    assert 'incremental' in message
+    rows = read_partition(tmp_path, 'placement_overall', 'academic_year=2023-24').to_pylist()
+    assert sorted((row['college_id'], row['placement_percentage_pct']) for row in rows) == sorted([
+        (str(first), 90.0), (str(second), 60.0)
+    ])
+    assert os.listdir(tmp_path / 'placement_overall' / 'academic_year=2023-24') == ['part-0.parquet']
+
+def test_failed_export_leaves_no_staged_files(db, tmp_path):
+    add_placement(db, ObjectId(), '2023-24', 70)
+    add_placement(db, ObjectId(), '2023-24', 'not a number')
+    
+    success, _ = export_analytics(str(tmp_path), incremental=False)
+    
+    assert not success
+    partition_dir = tmp_path / 'placement_overall' / 'academic_year=2023-24'
+    assert os.listdir(partition_dir) == []
+    assert not os.path.exists(tmp_path / 'export_state.json')
@@ -0,0 +1,85 @@
+"""
+Tests for website-keyed college imports and the website_key migration
+"""
+from pymongo.errors import DuplicateKeyError
+import pytest
+from models.college import (
+    create_website_key_index, backfill_website_keys, bulk_import_colleges,
+    get_college_by_website_key, update_college
+)
+
+def test_website_key_index_is_unique_for_keyed_colleges(db):
+    db.colleges.create_index('website_key')
+    
+    assert create_website_key_index(db)
+    
+    index = db.colleges.index_information()['website_key_1']
+    assert index['unique']
+    db.colleges.insert_many([{'name': 'Old A'}, {'name': 'Old B'}])
+    db.colleges.insert_one({'name': 'Alpha', 'website_key': 'alpha.edu'})
+    with pytest.raises(DuplicateKeyError):
+        db.colleges.insert_one({'name': 'Alpha again', 'website_key': 'alpha.edu'})
+
+def test_backfill_sets_keys_in_batches_and_skips_duplicates(db):
+    create_website_key_index(db)
+    db.colleges.insert_many([
+        {'name': 'Alpha', 'website': 'https://www.alpha.edu/'},
+        {'name': 'Alpha copy', 'website': 'alpha.edu'},
+        {'name': 'Beta', 'website': 'http://beta.edu'},
+        {'name': 'Gamma', 'website': 'gamma.edu'},
+        {'name': 'No website', 'website': ''}
+    ])
+    
+    updated, duplicates = backfill_website_keys(db, batch_size=2)
+    
+    assert (updated, duplicates) == (3, 1)
+    keys = sorted(college['website_key'] for college in db.colleges.find({'website_key': {'$type': 'string'}}))
+    assert keys == ['alpha.edu', 'beta.edu', 'gamma.edu']
+
+def test_import_updates_colleges_matched_by_website(db):
+    create_website_key_index(db)
+    
+    assert bulk_import_colleges(db, [{'name': 'Alpha', 'website': 'alpha.edu', 'state': 'Goa'}]) == (1, 0)
+    assert bulk_import_colleges(db, [
+        {'name': 'Alpha Institute', 'website': 'https://www.alpha.edu'},
+        {'name': 'Beta', 'website': 'beta.edu'}
+    ]) == (1, 1)
+    
+    alpha = db.colleges.find_one({'website_key': 'alpha.edu'})
+    assert alpha['name'] == 'Alpha Institute'
+    assert alpha['state'] == 'Goa'
+    assert db.colleges.count_documents({}) == 2
+
+def test_import_without_name_keeps_stored_name(db):
+    create_website_key_index(db)
+    bulk_import_colleges(db, [{'name': 'Alpha', 'website': 'alpha.edu'}])
+    
+    assert bulk_import_colleges(db, [
+        {'website': 'alpha.edu', 'state': 'Goa'},
+        {'website': 'beta.edu'}
+    ]) == (1, 1)
+    
+    assert db.colleges.find_one({'website_key': 'alpha.edu'})['name'] == 'Alpha'
+    assert db.colleges.find_one({'website_key': 'beta.edu'})['name'] == ''
+
+def test_get_college_by_website_key_matches_normalized_website(db):
+    create_website_key_index(db)
+    bulk_import_colleges(db, [{'name': 'Alpha', 'website': 'https://www.alpha.edu/'}])
+    
+    assert get_college_by_website_key(db, 'http://Alpha.edu')['name'] == 'Alpha'
+    assert get_college_by_website_key(db, 'beta.edu') is None
+    assert get_college_by_website_key(db, '') is None
+
+def test_update_to_taken_website_raises_duplicate_key(db):
+    create_website_key_index(db)
+    bulk_import_colleges(db, [
+        {'name': 'Alpha', 'website': 'alpha.edu'},
+        {'name': 'Beta', 'website': 'beta.edu'}
+    ])
+    beta = get_college_by_website_key(db, 'beta.edu')
+    
+    # The edit and add routes turn this into a form error
+    with pytest.raises(DuplicateKeyError):
+        update_college(db, beta['_id'], {'website': 'https://alpha.edu'})
+    
+    assert update_college(db, beta['_id'], {'website': 'https://www.beta.edu'})
@@ -0,0 +1,92 @@
+"""
+Tests for company name canonicalization
+"""
+import threading
+import pytest
+from models import company as company_model
+from models.company import (
+    normalize_company_name, resolve_companies, assign_company_ids, get_company_by_name,
+    index_company_alias, find_similar_company_id
+)
+
+@pytest.fixture(autouse=True)
+def empty_index(monkeypatch):
+    monkeypatch.setattr(company_model, 'company_index', {'aliases': {}, 'blocks': {}, 'expires_at': 0})
+
+@pytest.mark.parametrize('name, expected', [
+    ('Tata Consultancy Services Ltd.', 'tata consultancy services'),
+    ('L&T', 'l and t'),
+    ('Infosys Private Limited', 'infosys'),
+    ('The Company', 'the company'),
+    ('', None),
+    (None, None),
+])
+def test_normalize_company_name(name, expected):
+    assert normalize_company_name(name) == expected
+
+def test_aliases_resolve_to_one_company(db):
+    resolved = resolve_companies(db, ['TCS', 'Tata Consultancy Services Ltd.', 'tata consultancy'])
+    
+    assert len({company_id for company_id, _ in resolved.values()}) == 1
+    assert {name for _, name in resolved.values()} == {'Tata Consultancy Services'}
+    assert db.companies.count_documents({}) == 1
+
+def test_fuzzy_match_reuses_company_and_stores_alias(db):
+    (infosys_id, _), = resolve_companies(db, ['Infosys Technologies Solutions']).values()
+    
+    resolved = resolve_companies(db, ['Infosys Technologies Solution'])
+    
+    assert resolved['Infosys Technologies Solution'][0] == infosys_id
+    assert 'infosys technologies solution' in db.companies.find_one({'_id': infosys_id})['aliases']
+
+def test_different_companies_stay_apart(db):
+    resolved = resolve_companies(db, ['Wipro', 'Accenture', 'Amazon'])
+    
+    assert len({company_id for company_id, _ in resolved.values()}) == 3
+
+def test_assign_company_ids_drops_unnamed_entries(db):
+    companies = [{'name': 'HCL Tech'}, {'name': ''}, {'package': '5 LPA'}]
+    
+    assign_company_ids(db, companies)
+    
+    assert [company['company_name'] for company in companies] == ['HCL Technologies']
+
+def test_get_company_by_name_does_not_create(db):
+    assert get_company_by_name(db, 'Goldman Sachs') is None
+    
+    resolve_companies(db, ['Goldman Sachs India Pvt Ltd'])
+    
+    assert get_company_by_name(db, 'goldman sachs')['name'] == 'Goldman Sachs'
+    assert db.companies.count_documents({}) == 1
+
+def test_fuzzy_match_only_compares_same_block():
+    company_model.company_index['expires_at'] = float('inf')
+    index_company_alias('infosys technologies', 1)
+    index_company_alias('zinfosys technologies', 2)
+    
+    assert find_similar_company_id(None, 'infosys technologie') == 1
+    assert company_model.company_index['blocks']['inf'] == ['infosys technologies']
+
+def test_index_writes_during_matching():
+    company_model.company_index['expires_at'] = float('inf')
+    for number in range(200):
+        index_company_alias(f'acme {number}', number)
+    
+    errors = []
+    
+    def match():
+        try:
+            for _ in range(200):
+                find_similar_company_id(None, 'acme 1000')
+        except RuntimeError as e:
+            errors.append(e)
+    
+    readers = [threading.Thread(target=match) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for number in range(200, 2000):
+        index_company_alias(f'acme {number}', number)
+    for reader in readers:
+        reader.join()
+    
+    assert not errors
@@ -0,0 +1,40 @@
+"""
+Tests for the college count cache
+"""
+import pytest
+from services import database_service
+from services.database_service import count_colleges_cached, invalidate_database_statistics
+
+@pytest.fixture
+def counts(monkeypatch):
+    calls = []
+    
+    def count_colleges(db, filters=None):
+        calls.append(filters)
+        return len(calls)
+    
+    monkeypatch.setattr(database_service, 'count_colleges', count_colleges)
+    invalidate_database_statistics()
+    return calls
+
+def test_counts_are_cached_per_filter_set(counts):
+    assert count_colleges_cached(None, {'type': 'Engineering'}) == 1
+    assert count_colleges_cached(None, {'type': 'Engineering', 'state': ''}) == 1
+    assert count_colleges_cached(None, {'type': 'Medical'}) == 2
+    assert len(counts) == 2
+
+def test_cache_size_is_bounded(counts, monkeypatch):
+    monkeypatch.setattr(database_service, 'COLLEGE_COUNT_CACHE_SIZE', 10)
+    
+    for number in range(50):
+        count_colleges_cached(None, {'search': f'college {number}'})
+    
+    assert len(database_service.college_count_cache) == 10
+    # The most recent searches are kept
+    assert count_colleges_cached(None, {'search': 'college 49'}) == 50
+
+def test_invalidate_clears_counts(counts):
+    count_colleges_cached(None, {'state': 'Kerala'})
+    invalidate_database_statistics()
+    
+    assert count_colleges_cached(None, {'state': 'Kerala'}) == 2
@@ -0,0 +1,82 @@
+"""
+Tests for document detection and the extraction process pool
+"""
+import time
+import pytest
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from config import get_config
+from services import document_service
+from services.document_service import (
+    get_document_format, is_document, format_table, submit_extraction, wait_for_extraction,
+    get_pool_processes, shutdown_document_pool
+)
+
+def slow_extractor(data, max_pages):
+    time.sleep(60)
+    return 'never'
+
+def echo_extractor(data, max_pages):
+    return data.decode('ascii')
+
+@pytest.fixture
+def extractors(monkeypatch):
+    # Set before the pool forks, so the workers see them
+    monkeypatch.setitem(document_service.DOCUMENT_EXTRACTORS, 'pdf', slow_extractor)
+    monkeypatch.setitem(document_service.DOCUMENT_EXTRACTORS, 'docx', echo_extractor)
+    shutdown_document_pool()
+    yield
+    shutdown_document_pool()
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://college.edu/files/Placement-Report.PDF', 'pdf'),
+    ('https://college.edu/fees.docx?version=2', 'docx'),
+    ('https://college.edu/brochure.pptx', 'pptx'),
+    ('https://college.edu/old.doc', None),
+    ('https://college.edu/pdf/index.html', None),
+])
+def test_get_document_format(url, expected):
+    assert get_document_format(url) == expected
+
+def test_is_document_checks_signature():
+    assert is_document(b'%PDF-1.7 ...', 'pdf')
+    assert is_document(b'PK\x03\x04...', 'docx')
+    assert not is_document(b'<!DOCTYPE html>', 'pdf')
+
+def test_format_table():
+    rows = [['Company', 'Package\n(LPA)'], [None, ''], ['TCS', 3.6]]
+    
+    assert format_table(rows) == 'Company | Package (LPA)\nTCS | 3.6'
+
+def test_timeout_recycles_pool(extractors):
+    future = submit_extraction(b'%PDF', 'pdf')
+    stuck_pool = future.document_executor
+    
+    with pytest.raises(FutureTimeoutError):
+        wait_for_extraction(future, 0.5)
+    
+    assert document_service.document_executor is None
+    
+    # The slot held by the stuck document is released and a new pool starts
+    future = submit_extraction(b'PK ok', 'docx')
+    assert future.document_executor is not stuck_pool
+    assert wait_for_extraction(future, 10) == 'PK ok'
+
+def test_more_hung_documents_than_workers_recycles_pool(extractors, monkeypatch):
+    config = get_config()
+    monkeypatch.setattr(config, 'DOCUMENT_EXTRACT_TIMEOUT', 1)
+    
+    # Every worker gets a parser that never finishes
+    hung = [submit_extraction(b'%PDF', 'pdf') for _ in range(config.DOCUMENT_WORKERS)]
+    
+    started = time.monotonic()
+    future = submit_extraction(b'PK ok', 'docx')
+    
+    assert time.monotonic() - started < 10
+    assert wait_for_extraction(future, 10) == 'PK ok'
+    for stuck in hung:
+        with pytest.raises(BrokenProcessPool):
+            stuck.result(timeout=10)
+
+def test_pool_processes_of_unknown_executor():
+    assert get_pool_processes(object()) == []
@@ -0,0 +1,106 @@
+"""
+Tests for the shared HTTP connection pools and streamed body reading
+"""
+import socket
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import pytest
+import requests
+from services import http_service
+from services.http_service import create_session, get_connection_stats, reset_connection_stats
+
+class HelloHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'hello'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(('127.0.0.1', 0), HelloHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def lookups(monkeypatch):
+    calls = []
+    system_getaddrinfo = socket.getaddrinfo
+    
+    def getaddrinfo(host, *args, **kwargs):
+        calls.append(host)
+        return system_getaddrinfo(host, *args, **kwargs)
+    
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    monkeypatch.setattr(http_service, 'dns_cache', {})
+    return calls
+
+def test_pooled_connections_resolve_through_cache(server, lookups):
+    reset_connection_stats()
+    session = create_session({'Connection': 'close'})
+    
+    for _ in range(2):
+        assert session.get(f'http://localhost:{server}/').text == 'hello'
+    
+    assert lookups == ['localhost']
+    assert get_connection_stats()['opened'] == 2
+
+def test_cache_is_not_installed_process_wide(lookups):
+    http_service.resolve_host('localhost')
+    
+    socket.getaddrinfo('localhost', None)
+    
+    assert lookups == ['localhost', 'localhost']
+
+def test_failed_lookups_are_not_cached(lookups):
+    with pytest.raises(requests.exceptions.ConnectionError):
+        create_session().get('http://does-not-exist.invalid/', timeout=5)
+    
+    assert lookups == ['does-not-exist.invalid']
+    assert http_service.dns_cache == {}
+
+class StreamedResponse:
+    """Stand-in for a streamed requests response"""
+    def __init__(self, body, content_type=''):
+        self.body = body
+        self.headers = {'Content-Type': content_type}
+    
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+@pytest.mark.parametrize('content_type, head, expected', [
+    ('text/html; charset=UTF-8', b'', 'utf-8'),
+    ('text/html; charset="ISO-8859-1"', b'', 'cp1252'),
+    ('text/html', b'<meta charset="windows-1252">', 'cp1252'),
+    ('text/html', b'<meta http-equiv="Content-Type" content="text/html; charset=shift_jis">', 'shift_jis'),
+    ('text/html; charset=utf-8', b'\xff\xfe<\x00', 'utf-16'),
+    ('text/html; charset=bogus', b'', 'utf-8'),
+    ('', b'<html>', 'utf-8'),
+])
+def test_detect_encoding(content_type, head, expected):
+    assert http_service.detect_encoding(content_type, head) == expected
+
+def test_read_text_decodes_multibyte_characters_split_across_chunks():
+    text = 'Placement cell ' + 'ट्रेनिंग ' * 400
+    response = StreamedResponse(text.encode('utf-8'), 'text/html; charset=utf-8')
+    
+    assert http_service.read_text(response, 1 << 20, chunk_size=7) == text
+
+def test_read_text_uses_meta_charset_of_short_bodies():
+    body = '<meta charset="windows-1252"><p>Fee – Rs. 50,000 (café)</p>'.encode('cp1252')
+    
+    assert http_service.read_text(StreamedResponse(body), 1 << 20) == body.decode('cp1252')
+
+def test_read_text_gives_up_past_the_size_limit():
+    response = StreamedResponse(b'x' * 5000)
+    
+    assert http_service.read_text(response, 4096, chunk_size=1024) is None
+    assert http_service.read_bytes(StreamedResponse(b'x' * 5000), 4096) is None
@@ -0,0 +1,85 @@
+"""
+Tests for the server-side merge helpers
+
+The in-memory test database can't evaluate $mergeObjects, so the
+pipelines are checked by their shape rather than run.
+"""
+import pytest
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from models.merge import (
+    compact_item, prepare_items, merge_array_expression, merge_object_expression,
+    union_expression, upsert_merge
+)
+
+def test_compact_item_keeps_falsy_values_other_than_empty():
+    assert compact_item({'a': None, 'b': '', 'c': 0, 'd': False, 'e': []}) == {'c': 0, 'd': False, 'e': []}
+
+def test_prepare_items_skips_unkeyed_items_and_keeps_last_duplicate():
+    items = [
+        {'name': 'TCS', 'package': '4 LPA', 'hired': 10},
+        {'name': '', 'package': '5 LPA'},
+        'not an item',
+        {'package': '6 LPA'},
+        {'name': 'TCS', 'package': '4.5 LPA', 'hired': None}
+    ]
+    
+    assert prepare_items(items, 'name') == [{'name': 'TCS', 'package': '4.5 LPA'}]
+    assert prepare_items(None, 'name') == []
+
+def test_incoming_values_are_literals():
+    # Extracted text starting with $ must never be read as a field path
+    incoming = [{'name': '$name', 'note': '$$ROOT'}]
+    
+    expression = merge_array_expression('companies', incoming, 'name')
+    
+    assert expression['$let']['vars'] == {
+        'stored': {'$ifNull': ['$companies', []]},
+        'incoming': {'$literal': incoming}
+    }
+    assert merge_object_expression('stats', {'a': '$b'}) == {
+        '$mergeObjects': [{'$ifNull': ['$stats', {}]}, {'$literal': {'a': '$b'}}]
+    }
+    assert union_expression('urls', ['$x']) == {
+        '$setUnion': [{'$ifNull': ['$urls', []]}, {'$literal': ['$x']}]
+    }
+
+def test_merge_array_matches_items_on_key():
+    expression = merge_array_expression('departments', [], 'department')['$let']['in']['$concatArrays']
+    
+    updated, appended = expression
+    match = updated['$map']['in']['$mergeObjects'][1]['$arrayElemAt'][0]['$filter']['cond']
+    assert match == {'$eq': ['$$new.department', '$$item.department']}
+    assert appended['$filter']['cond'] == {'$not': [{'$in': ['$$new.department', '$$stored.department']}]}
+
+class RacingCollection:
+    """Collection whose first upsert loses an insert race"""
+    def __init__(self):
+        self.calls = []
+    
+    def find_one_and_update(self, query, update, **kwargs):
+        self.calls.append((query, update, kwargs))
+        if len(self.calls) == 1:
+            raise DuplicateKeyError('E11000 duplicate key error')
+        return {'_id': 1, 'merged': True}
+
+def test_upsert_merge_retries_after_losing_insert_race():
+    collection = RacingCollection()
+    merge_fields = {'tags': union_expression('tags', ['a'])}
+    
+    assert upsert_merge(collection, {'college_id': 1}, merge_fields, {'tags': 1}) == {'_id': 1, 'merged': True}
+    
+    assert len(collection.calls) == 2
+    query, update, kwargs = collection.calls[1]
+    assert query == {'college_id': 1}
+    assert update == [{'$set': merge_fields}]
+    assert kwargs == {'projection': {'tags': 1}, 'upsert': True, 'return_document': ReturnDocument.AFTER}
+
+def test_upsert_merge_gives_up_after_second_duplicate():
+    class AlwaysDuplicate(RacingCollection):
+        def find_one_and_update(self, query, update, **kwargs):
+            self.calls.append(query)
+            raise DuplicateKeyError('E11000 duplicate key error')
+    
+    with pytest.raises(DuplicateKeyError):
+        upsert_merge(AlwaysDuplicate(), {'college_id': 1}, {})
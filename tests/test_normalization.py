@@ -0,0 +1,50 @@
+"""
+Tests for normalization of extracted numeric values
+"""
+import pytest
+from models.normalization import normalize_value, normalize_fields, parse_number, PLACEMENT_FIELDS
+
+@pytest.mark.parametrize('text, kind, expected', [
+    ('Rs.4.5 lakh', 'package', 4.5),
+    ('Rs.50,000', 'fee', 50000.0),
+    ('Rs.15000/month', 'stipend', 15000.0),
+    ('Rs.15000/month', 'package', 1.8),
+    ('Rs. 4.5 lakh', 'package', 4.5),
+    ('INR 3,00,000 per annum', 'package', 3.0),
+    ('₹12 LPA', 'package', 12.0),
+    ('₹ 1.2 crore', 'fee', 12000000.0),
+    ('12 LPA', 'package', 12.0),
+    ('50k per month', 'stipend', 50000.0),
+    ('6,00,000 per year', 'stipend', 50000.0),
+    ('.5 lakh', 'fee', 50000.0),
+    ('85%', 'percent', 85.0),
+    ('120%', 'percent', None),
+    ('450 students', 'count', 450),
+    ('$120,000', 'package', None),
+    ('not disclosed', 'package', None),
+])
+def test_normalize_value(text, kind, expected):
+    assert normalize_value(text, kind) == expected
+
+def test_parse_number_uses_range_midpoint():
+    assert parse_number('rs. 4 - 6 lakh') == 5.0
+    assert parse_number('10 to 20') == 15.0
+
+def test_parse_number_ignores_currency_dot():
+    assert parse_number('rs.4.5') == 4.5
+    assert parse_number('rs.50,000') == 50000.0
+
+def test_normalize_value_rejects_non_values():
+    assert normalize_value(None, 'package') is None
+    assert normalize_value(True, 'count') is None
+    assert normalize_value('', 'fee') is None
+
+def test_normalize_fields_adds_numeric_siblings():
+    data = {'average_package': 'Rs.4.5 lakh', 'students_placed': '120', 'notes': 'x',
+            'branch': {'highest_package': '12 LPA'}}
+    normalize_fields(data, PLACEMENT_FIELDS)
+    
+    assert data['average_package_lpa'] == 4.5
+    assert data['students_placed_num'] == 120
+    assert data['branch']['highest_package_lpa'] == 12.0
+    assert 'notes_lpa' not in data
@@ -0,0 +1,52 @@
+"""
+Tests for keyset (cursor) pagination
+"""
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from models.pagination import encode_cursor, decode_cursor, build_keyset_query, split_page
+
+def paginate(collection, sort_by, sort_order, limit):
+    """Walk every page of a collection, returning the _ids in page order"""
+    ids = []
+    cursor = None
+    while True:
+        query = build_keyset_query(sort_by, sort_order, cursor) if cursor else {}
+        docs = list(collection.find(query).sort([(sort_by, sort_order), ('_id', sort_order)]).limit(limit + 1))
+        page, cursor = split_page(docs, sort_by, limit)
+        ids.extend(doc['_id'] for doc in page)
+        if cursor is None:
+            return ids
+
+@pytest.mark.parametrize('value', ['Alpha', 12.5, None, datetime(2024, 1, 2, 3, 4, 5)])
+def test_cursor_round_trips_sort_value_and_id(value):
+    doc_id = ObjectId()
+    
+    assert decode_cursor(encode_cursor(value, doc_id)) == (value, doc_id)
+
+@pytest.mark.parametrize('cursor', ['not base64!', 'bm90IGpzb24=', ''])
+def test_invalid_cursor_gives_no_query(cursor):
+    assert build_keyset_query('name', 1, cursor) is None
+
+@pytest.mark.parametrize('sort_order', [1, -1])
+@pytest.mark.parametrize('limit', [1, 2, 3, 10])
+def test_pages_cover_every_document_once_in_sort_order(db, sort_order, limit):
+    names = ['Beta', None, 'Alpha', 'Beta', None, 'Gamma', 'Alpha']
+    db.colleges.insert_many([{'_id': ObjectId(), 'name': name} if name else {'_id': ObjectId()} for name in names])
+    expected = [doc['_id'] for doc in db.colleges.find().sort([('name', sort_order), ('_id', sort_order)])]
+    
+    assert paginate(db.colleges, 'name', sort_order, limit) == expected
+
+def test_pages_follow_nested_sort_fields(db):
+    db.jobs.insert_many([{'timestamps': {'created': datetime(2024, 1, day)}} for day in (3, 1, 2, 1)])
+    expected = [doc['_id'] for doc in db.jobs.find().sort([('timestamps.created', -1), ('_id', -1)])]
+    
+    assert paginate(db.jobs, 'timestamps.created', -1, 2) == expected
+
+def test_last_page_has_no_cursor():
+    docs = [{'_id': 1, 'name': 'a'}, {'_id': 2, 'name': 'b'}]
+    
+    assert split_page(docs, 'name', 2) == (docs, None)
+    page, cursor = split_page(docs, 'name', 1)
+    assert page == docs[:1]
+    assert decode_cursor(cursor) == ('a', 1)
@@ -0,0 +1,82 @@
+"""
+Tests for the materialized placement rollups
+"""
+from bson import ObjectId
+from models.placement_rollup import (
+    YEAR_ROLLUPS, YEAR_COMPANY_ROLLUPS, COMPANY_ROLLUPS, DEPARTMENT_ROLLUPS,
+    refresh_placement_rollups, rebuild_placement_rollups, get_rollup_status
+)
+
+TCS = ObjectId()
+INFOSYS = ObjectId()
+
+def placement(college, year, companies, percentage=None, departments=()):
+    return {
+        '_id': ObjectId(),
+        'college_id': college,
+        'academic_year': year,
+        'overall_statistics': {'placement_percentage_pct': percentage, 'average_package_lpa': 5.0},
+        'recruiting_companies': [
+            {'company_id': company_id, 'company_name': name, 'package_offered_lpa': package}
+            for company_id, name, package in companies
+        ],
+        'department_statistics': [
+            {'department': department, 'statistics': {'placement_percentage_pct': percentage}}
+            for department in departments
+        ]
+    }
+
+def test_refresh_builds_rollups_for_changed_documents(db):
+    first = placement(1, '2023-24', [(TCS, 'TCS', 4.0), (INFOSYS, 'Infosys', 6.0)], 80, ['CSE'])
+    second = placement(2, '2023-24', [(TCS, 'TCS', 6.0)], 60, ['CSE'])
+    db.placement_data.insert_many([first, second])
+    
+    refresh_placement_rollups(db, first, second)
+    
+    year = db[YEAR_ROLLUPS].find_one({'_id': '2023-24'})
+    assert year['college_count'] == 2
+    assert year['avg_placement_percentage'] == 70
+    assert [company['company_id'] for company in year['top_companies']] == [TCS, INFOSYS]
+    assert db[COMPANY_ROLLUPS].find_one({'_id': TCS})['avg_package'] == 5.0
+    assert db[DEPARTMENT_ROLLUPS].find_one({'_id': 'CSE'})['college_count'] == 2
+
+def test_refresh_removes_rows_without_data_and_keeps_other_companies(db):
+    before = placement(1, '2023-24', [(TCS, 'TCS', 4.0), (INFOSYS, 'Infosys', 6.0)])
+    db.placement_data.insert_one(before)
+    rebuild_placement_rollups(db)
+    
+    after = dict(before, recruiting_companies=before['recruiting_companies'][:1])
+    db.placement_data.replace_one({'_id': before['_id']}, after)
+    refresh_placement_rollups(db, before, after)
+    
+    assert db[COMPANY_ROLLUPS].find_one({'_id': INFOSYS}) is None
+    assert db[YEAR_COMPANY_ROLLUPS].count_documents({'company_id': INFOSYS}) == 0
+    assert db[YEAR_COMPANY_ROLLUPS].count_documents({'company_id': TCS}) == 1
+
+def test_refresh_only_recomputes_affected_companies(db):
+    doc = placement(1, '2023-24', [(TCS, 'TCS', 4.0), (INFOSYS, 'Infosys', 6.0)])
+    db.placement_data.insert_one(doc)
+    rebuild_placement_rollups(db)
+    db[YEAR_COMPANY_ROLLUPS].update_one({'company_id': INFOSYS}, {'$set': {'marker': True}})
+    
+    changed = placement(2, '2023-24', [(TCS, 'TCS', 8.0)])
+    db.placement_data.insert_one(changed)
+    refresh_placement_rollups(db, changed)
+    
+    assert db[YEAR_COMPANY_ROLLUPS].find_one({'company_id': INFOSYS})['marker'] is True
+    assert db[YEAR_COMPANY_ROLLUPS].find_one({'company_id': TCS})['count'] == 2
+
+def test_failed_refresh_is_recorded_until_rebuild(db, monkeypatch):
+    doc = placement(1, '2023-24', [(TCS, 'TCS', 4.0)])
+    db.placement_data.insert_one(doc)
+    
+    def fail(*args, **kwargs):
+        raise RuntimeError('aggregation failed')
+    monkeypatch.setattr('models.placement_rollup.refresh_company_rollups', fail)
+    
+    refresh_placement_rollups(db, doc)
+    assert get_rollup_status(db)['failed_refreshes'] == 1
+    
+    monkeypatch.undo()
+    rebuild_placement_rollups(db)
+    assert get_rollup_status(db)['failed_refreshes'] == 0
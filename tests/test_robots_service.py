@@ -0,0 +1,92 @@
+"""
+Tests for robots.txt and sitemap fetching
+"""
+import gzip
+import io
+import pytest
+from config import get_config
+from services import robots_service
+from services.robots_service import get_robots, get_sitemap_urls, is_same_site
+
+class FakeResponse:
+    """Streamed response serving a fixed body"""
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'text/plain'}
+        self.raw = io.BytesIO(body)
+        self.closed = False
+    
+    def iter_content(self, chunk_size):
+        return iter(lambda: self.raw.read(chunk_size), b'')
+    
+    def close(self):
+        self.closed = True
+
+class FakeSession:
+    """Session serving bodies by URL (404 for anything else)"""
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+    
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        if url not in self.pages:
+            return FakeResponse(b'', 404)
+        return FakeResponse(self.pages[url])
+
+@pytest.fixture(autouse=True)
+def no_waits(monkeypatch):
+    monkeypatch.setattr(robots_service, 'wait_for_host', lambda *args: None)
+    monkeypatch.setattr(robots_service, 'robots_cache', {})
+    monkeypatch.setattr(get_config(), 'FETCH_MAX_BYTES', 4096)
+
+def sitemap(kind, locs):
+    entries = ''.join(f'<{kind}><loc>{loc}</loc></{kind}>' for loc in locs)
+    wrapper = 'urlset' if kind == 'url' else 'sitemapindex'
+    return f'<?xml version="1.0"?><{wrapper} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</{wrapper}>'.encode()
+
+def test_robots_txt_is_parsed():
+    session = FakeSession({'https://college.edu/robots.txt': b'User-agent: *\nDisallow: /admin\nCrawl-delay: 3\n'})
+    
+    robots = get_robots(session, 'https://college.edu/page')
+    
+    assert not robots['parser'].can_fetch('CollegeDataCrawler', 'https://college.edu/admin/x')
+    assert robots['crawl_delay'] == 3
+
+def test_oversized_robots_txt_is_ignored():
+    session = FakeSession({'https://college.edu/robots.txt': b'User-agent: *\nDisallow: /\n' + b'#' * 8192})
+    
+    robots = get_robots(session, 'https://college.edu/')
+    
+    assert robots['parser'].can_fetch('CollegeDataCrawler', 'https://college.edu/placements')
+
+def test_nested_sitemaps_on_other_hosts_are_not_followed():
+    session = FakeSession({
+        'https://college.edu/sitemap.xml': sitemap('sitemap', [
+            'https://www.college.edu/pages.xml', 'https://tracker.example.com/sitemap.xml'
+        ]),
+        'https://www.college.edu/pages.xml': sitemap('url', ['https://www.college.edu/placements'])
+    })
+    
+    urls = get_sitemap_urls(session, 'https://college.edu/')
+    
+    assert list(urls) == ['https://www.college.edu/placements']
+    assert 'https://tracker.example.com/sitemap.xml' not in session.requested
+
+def test_gzip_bomb_sitemap_stops_at_size_limit():
+    locs = [f'https://college.edu/page-{number}' for number in range(2000)]
+    session = FakeSession({'https://college.edu/sitemap.xml.gz': gzip.compress(sitemap('url', locs))})
+    session.pages['https://college.edu/robots.txt'] = b'Sitemap: https://college.edu/sitemap.xml.gz\n'
+    
+    urls = get_sitemap_urls(session, 'https://college.edu/')
+    
+    assert 0 < len(urls) < 100
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://www.college.edu/sitemap.xml', True),
+    ('http://COLLEGE.edu/a', True),
+    ('https://cdn.college.edu/sitemap.xml', False),
+    ('https://other.org/sitemap.xml', False),
+])
+def test_is_same_site(url, expected):
+    assert is_same_site(url, 'https://college.edu/') == expected
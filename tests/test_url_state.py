@@ -0,0 +1,71 @@
+"""
+Tests for adaptive revisit scheduling of crawled URLs
+"""
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from config import get_config
+from models.url_state import (
+    get_change_rate, get_revisit_interval, get_due_urls, has_changed, record_fetch, get_url_states
+)
+
+NOW = datetime(2024, 6, 1)
+
+@pytest.fixture(autouse=True)
+def revisit_bounds(monkeypatch):
+    monkeypatch.setattr(get_config(), 'REVISIT_MIN_DAYS', 1.0)
+    monkeypatch.setattr(get_config(), 'REVISIT_MAX_DAYS', 60.0)
+
+@pytest.mark.parametrize('state, changed, content_type, expected', [
+    (None, True, 'placement', 0.5),
+    (None, True, 'general', 2.0),
+    ({'revisit_days': 8}, True, 'unknown', 4),
+    ({'revisit_days': 8}, False, 'unknown', 16),
+    ({'revisit_days': 1}, True, 'unknown', 1),
+    ({'revisit_days': 50}, False, 'unknown', 60),
+    ({'revisit_days': 50}, False, 'placement', 30),
+    ({'revisit_days': 0}, False, 'admission', 0.75),
+])
+def test_revisit_interval_halves_on_change_and_doubles_otherwise(state, changed, content_type, expected):
+    assert get_revisit_interval(state, changed, content_type) == expected
+
+@pytest.mark.parametrize('state, expected', [
+    ({}, 0.0),
+    ({'first_seen': NOW, 'last_fetched': NOW, 'change_count': 0}, 0.5),
+    ({'first_seen': NOW - timedelta(days=10), 'last_fetched': NOW, 'change_count': 4}, 0.45),
+    ({'first_seen': NOW - timedelta(hours=6), 'last_fetched': NOW, 'change_count': 2}, 2.5),
+])
+def test_change_rate_is_poisson_estimate_over_at_least_a_day(state, expected):
+    assert get_change_rate(state) == pytest.approx(expected)
+
+def test_due_urls_are_ordered_by_change_rate():
+    states = {
+        'static': {'url': 'static', 'first_seen': NOW - timedelta(days=30), 'last_fetched': NOW,
+                   'change_count': 0, 'next_visit': NOW - timedelta(days=1)},
+        'volatile': {'url': 'volatile', 'first_seen': NOW - timedelta(days=30), 'last_fetched': NOW,
+                     'change_count': 20, 'next_visit': NOW - timedelta(days=1)},
+        'not_due': {'url': 'not_due', 'first_seen': NOW - timedelta(days=30), 'last_fetched': NOW,
+                    'change_count': 29, 'next_visit': NOW + timedelta(days=1)}
+    }
+    
+    assert [state['url'] for state in get_due_urls(states, NOW)] == ['volatile', 'static']
+
+def test_record_fetch_tracks_changes_and_schedule(db):
+    college_id = ObjectId()
+    url = 'https://college.edu/placements'
+    
+    assert record_fetch(db, college_id, url, 'placement', 'a' * 40, 2)
+    state = get_url_states(db, college_id)[url]
+    assert state['revisit_days'] == 0.5
+    assert state['change_count'] == 0
+    assert not has_changed(state, 'a' * 40)
+    
+    assert not record_fetch(db, college_id, url, 'placement', 'a' * 40, 1, state)
+    state = get_url_states(db, college_id)[url]
+    assert (state['revisit_days'], state['depth'], state['fetch_count']) == (1.0, 1, 2)
+    
+    assert record_fetch(db, college_id, url, 'placement', 'b' * 40, 3, state)
+    state = get_url_states(db, college_id)[url]
+    assert state['revisit_days'] == 0.5
+    assert state['change_count'] == 1
+    assert state['hash_history'] == ['b' * 12, 'a' * 12]
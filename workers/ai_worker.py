@@ -12,6 +12,7 @@ from models.ai_processing_job import (
     update_ai_processing_job_status
 )
 from services.ai_service import process_content, load_ai_model
+from services.realtime_service import emit_ai_job_update
 from config import get_config
 
 # Configure logging
@@ -96,6 +97,7 @@ def worker_function(worker_id, config):
                 success, message = process_content(job['job_id'])
                 
                 logger.info(f"AI worker {worker_id} completed job {job['job_id']}: {message}")
+                emit_ai_job_update(job['job_id'], 'completed' if success else 'failed', message)
                 
             except Exception as e:
                 logger.error(f"AI worker {worker_id} failed job {job['job_id']}: {str(e)}", exc_info=True)
@@ -104,6 +106,7 @@ def worker_function(worker_id, config):
                     # Get a fresh DB connection for updating status
                     db = get_db()
                     update_ai_processing_job_status(db, job['job_id'], 'failed', str(e))
+                    emit_ai_job_update(job['job_id'], 'failed', str(e))
                 except Exception as db_error:
                     logger.error(f"Failed to update job status: {str(db_error)}")
             
@@ -9,6 +9,9 @@ from datetime import datetime, timedelta
 from models import get_db, init_db
 from models.crawl_job import get_crawl_job_by_id, update_crawl_job_status, count_crawl_jobs
 from services.crawler_service import CollegeCrawler
+from services.realtime_service import emit_crawl_status
+from services.http_service import close_http_pools
+from services.document_service import init_document_pool, shutdown_document_pool
 from config import get_config
 
 # Configure logging
@@ -89,6 +92,7 @@ def worker_function(worker_id, config):
                     # Get a fresh DB connection for updating status
                     db = get_db()
                     update_crawl_job_status(db, job['job_id'], 'failed', str(e))
+                    emit_crawl_status(job['job_id'], job['college_id'], 'failed', str(e))
                 except Exception as db_error:
                     logger.error(f"Failed to update job status: {str(db_error)}")
             
@@ -185,6 +189,12 @@ def stop_workers():
     # Clear thread list
     worker_threads = []
     
+    # Close the keep-alive connections shared by the crawlers
+    close_http_pools()
+    
+    # Stop the document extraction processes
+    shutdown_document_pool()
+    
     logger.info("All worker threads stopped")
 
 def enqueue_job(job_id, college_id):
@@ -266,6 +276,8 @@ def check_stalled_jobs():
 def init_workers():
     try:
         config = get_config()
+        if config.DOCUMENTS_ENABLED:
+            init_document_pool()
         num_workers = config.CRAWLER_WORKERS
         start_workers(num_workers)
     except Exception as e: